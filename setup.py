@@ -46,7 +46,9 @@ setup(
     python_requires=">=3.11",
     entry_points={
         "console_scripts": [
-            "risklab-dashboard=dashboard:main",  
+            "risklab-dashboard=dashboard:run",
+            "risklab=cli:main",
+            "risklab-benchmark=benchmark:main",
         ],
     },
 )
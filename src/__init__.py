@@ -3,8 +3,20 @@ from .portfolio import Portfolio
 from .risk_metrics import RiskMetrics
 from .stress_test import StressTest
 from .liquidity import LiquidityMetrics
+from .liquidation import LiquidationModel
 from .risk_matrix import RiskMatrix
 from .report import Report
+from .returns_store import ReturnsStore
+from .monte_carlo import MonteCarloVaR
+from .book import PortfolioBook
+from .cache import ResultCache, fingerprint
+from .whatif import WhatIf
+# The modules import `instrumentation` by its flat name, so the package must re-export that same module
+# object; a second `src.instrumentation` copy would have its own sink state and record nothing.
+import sys as _sys
+import instrumentation
+_sys.modules[__name__ + ".instrumentation"] = instrumentation
+from instrumentation import instrumented, profile, MemorySink, JsonLinesSink, PrometheusSink
 from .utils import format_percent, normalize_weights, fill_unknowns, weighted_sum
 
 __all__ = [
@@ -12,8 +24,20 @@ __all__ = [
     "RiskMetrics",
     "StressTest",
     "LiquidityMetrics",
+    "LiquidationModel",
     "RiskMatrix",
     "Report",
+    "ReturnsStore",
+    "MonteCarloVaR",
+    "PortfolioBook",
+    "ResultCache",
+    "fingerprint",
+    "WhatIf",
+    "instrumented",
+    "profile",
+    "MemorySink",
+    "JsonLinesSink",
+    "PrometheusSink",
     "format_percent",
     "normalize_weights",
     "fill_unknowns",
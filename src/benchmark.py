@@ -0,0 +1,235 @@
+# src/benchmark.py
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Sequence
+from portfolio import Portfolio
+from risk_metrics import RiskMetrics
+from stress_test import StressTest
+from liquidity import LiquidityMetrics
+from risk_matrix import RiskMatrix
+from report import Report
+
+VERSION = "0.1.0"
+ASSET_TYPES = ("Equity", "Bond", "Commodity", "Cash")
+DIMENSIONS = ("assets", "days", "scenarios", "portfolios")
+
+def synthetic_holdings(assets: int, seed: int = 0) -> pd.DataFrame:
+    """Random holdings in the CSV layout: Ticker, Allocation, AssetType."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Ticker": [f"T{i:05d}" for i in range(assets)],
+        "Allocation": rng.dirichlet(np.ones(assets)),
+        "AssetType": rng.choice(ASSET_TYPES, assets),
+    })
+
+def synthetic_returns(tickers: Sequence[str], days: int, seed: int = 0) -> pd.DataFrame:
+    """Daily returns with a common market factor, so the covariance is not diagonal."""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0, 0.008, (days, 1))
+    values = market * rng.uniform(0.5, 1.5, len(tickers)) + rng.normal(0, 0.01, (days, len(tickers)))
+    return pd.DataFrame(values, columns=list(tickers))
+
+def synthetic_scenarios(scenarios: int, tickers: Sequence[str], seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """Shock scenarios mixing AssetType-wide shocks with a few single-ticker shocks."""
+    rng = np.random.default_rng(seed)
+    result = {}
+    for i in range(scenarios):
+        shocks = {t: float(rng.uniform(-0.5, 0.1)) for t in ASSET_TYPES if rng.random() < 0.5}
+        for t in rng.choice(tickers, min(3, len(tickers)), replace=False):
+            shocks[str(t)] = float(rng.uniform(-0.5, 0.1))
+        result[f"Scenario {i}"] = shocks
+    return result
+
+def measure(func: Callable[[], object], setup: Optional[Callable[[], object]] = None, repeat: int = 3) -> Dict[str, float]:
+    """
+    Time func: best wall time over `repeat` runs, then peak traced memory over one more run.
+    Tracing slows Python code down, so it is kept out of the timed runs.
+    :param setup: Optional callable run before every call, outside the timing
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+def run_case(assets: int, days: int, scenarios: int, portfolios: int, repeat: int = 3,
+             seed: int = 0) -> List[Dict]:
+    """
+    Benchmark every stage for one problem size.
+    Each compute_* call starts from an empty RiskMetrics cache, so its time includes the covariance or
+    return series it needs.
+    :return: One record per stage with seconds, throughput (units per second) and peak_bytes
+    """
+    size = {"assets": assets, "days": days, "scenarios": scenarios, "portfolios": portfolios}
+    records: List[Dict] = []
+
+    def record(stage: str, units: int, unit: str, func, setup=None):
+        result = measure(func, setup, repeat)
+        throughput = units / result["seconds"] if result["seconds"] > 0 else float("inf")
+        records.append({"stage": stage, **size, **result, "throughput": throughput, "unit": unit})
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = []
+        for p in range(portfolios):
+            path = os.path.join(workdir, f"portfolio_{p}.csv")
+            synthetic_holdings(assets, seed + p).to_csv(path, index=False)
+            paths.append(path)
+        record("Portfolio.from_csv", assets * portfolios, "rows/s",
+               lambda: [Portfolio.from_csv(path) for path in paths])
+
+        portfolio = Portfolio.from_csv(paths[0])
+        returns = synthetic_returns(portfolio.tickers, days, seed)
+        shocks = synthetic_scenarios(scenarios, portfolio.tickers, seed)
+
+        risk_metrics = RiskMetrics(portfolio, returns)
+        for name in ("compute_volatility", "compute_var", "compute_cvar", "compute_sharpe"):
+            record(f"RiskMetrics.{name}", days * assets, "cells/s",
+                   getattr(risk_metrics, name), risk_metrics.invalidate_cache)
+
+        stress = StressTest(portfolio, returns)
+        record("StressTest.apply_scenario", scenarios, "scenarios/s",
+               lambda: [stress.apply_scenario(name, s) for name, s in shocks.items()],
+               lambda: setattr(stress, "returns", returns))
+
+        liquidity = LiquidityMetrics(portfolio, dict(zip(portfolio.tickers, np.linspace(0.2, 1.0, assets))))
+        record("LiquidityMetrics.apply_scenario", scenarios, "scenarios/s",
+               lambda: [liquidity.apply_scenario(name, s) for name, s in shocks.items()])
+
+        risk_matrix = RiskMatrix(portfolio, risk_metrics)
+        record("RiskMatrix.compute_matrix", assets * assets, "cells/s", risk_matrix.compute_matrix)
+
+        # Every report gets the same modules, and setup() builds them from scratch before each run so
+        # the timing covers the memoized computations as well as the file writes.
+        books = [Portfolio.from_csv(path) for path in paths]
+        reports: List[Report] = []
+
+        def build_reports():
+            reports.clear()
+            for book in books:
+                book_metrics = RiskMetrics(book, returns)
+                book_stress = StressTest(book, returns, risk_metrics=book_metrics)
+                book_stress.apply_scenarios(shocks)
+                book_liquidity = LiquidityMetrics(book, dict(zip(book.tickers, np.linspace(0.2, 1.0, assets))))
+                book_liquidity.apply_scenarios(shocks)
+                reports.append(Report(book, book_metrics, book_stress, book_liquidity,
+                                      RiskMatrix(book, book_metrics), output_dir=workdir))
+
+        def write_reports():
+            with contextlib.redirect_stdout(io.StringIO()):
+                for p, report in enumerate(reports):
+                    report.generate_csv(f"report_{p}.csv")
+        record("Report.generate_csv", portfolios, "reports/s", write_reports, build_reports)
+    return records
+
+def scaling_curves(records: List[Dict], grid: Dict[str, List[int]]) -> Dict[str, Dict[str, List[List[float]]]]:
+    """
+    Seconds per stage along each dimension given more than one size, holding the other
+    dimensions at their first value: {dimension: {stage: [[size, seconds], ...]}}.
+    """
+    curves: Dict[str, Dict[str, List[List[float]]]] = {}
+    for dimension, sizes in grid.items():
+        if len(sizes) < 2:
+            continue
+        fixed = {d: grid[d][0] for d in DIMENSIONS if d != dimension}
+        curve: Dict[str, List[List[float]]] = {}
+        for r in records:
+            if all(r[d] == v for d, v in fixed.items()):
+                curve.setdefault(r["stage"], []).append([r[dimension], r["seconds"]])
+        curves[dimension] = {stage: sorted(points) for stage, points in curve.items()}
+    return curves
+
+def run_suite(grid: Dict[str, List[int]], repeat: int = 3, seed: int = 0) -> Dict:
+    """Run every size combination in the grid and return the JSON-ready results document."""
+    records: List[Dict] = []
+    for values in itertools.product(*(grid[d] for d in DIMENSIONS)):
+        records.extend(run_case(*values, repeat=repeat, seed=seed))
+    return {
+        "risklab_version": VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "grid": grid,
+        "repeat": repeat,
+        "results": records,
+        "curves": scaling_curves(records, grid),
+    }
+
+def compare(baseline: Dict, current: Dict, tolerance: float = 0.2) -> List[Dict]:
+    """
+    Match results by stage and size and report the ones slower than baseline by more than `tolerance`.
+    :return: List of regressions with both timings and the ratio current / baseline
+    """
+    key = lambda r: (r["stage"],) + tuple(r[d] for d in DIMENSIONS)
+    previous = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        base = previous.get(key(r))
+        if base and base["seconds"] > 0 and r["seconds"] > base["seconds"] * (1 + tolerance):
+            regressions.append({"stage": r["stage"], **{d: r[d] for d in DIMENSIONS},
+                                "baseline_seconds": base["seconds"], "seconds": r["seconds"],
+                                "ratio": r["seconds"] / base["seconds"]})
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="risklab-benchmark",
+                                     description="Time RiskLab stages on synthetic portfolios and write JSON results.")
+    parser.add_argument("--assets", type=int, nargs="+", default=[100], help="Asset counts (several values give a scaling curve)")
+    parser.add_argument("--days", type=int, nargs="+", default=[252], help="Return history lengths")
+    parser.add_argument("--scenarios", type=int, nargs="+", default=[10], help="Stress/liquidity scenario counts")
+    parser.add_argument("--portfolios", type=int, nargs="+", default=[1], help="Portfolios loaded and reported")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", "-o", help="JSON file to write (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Baseline JSON; exit with status 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    grid = {d: getattr(args, d) for d in DIMENSIONS}
+    results = run_suite(grid, args.repeat, args.seed)
+
+    document = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(document)
+        for r in results["results"]:
+            print(f"{r['stage']:<34} assets={r['assets']:<6} {r['seconds']*1000:10.2f} ms "
+                  f"{r['throughput']:14.1f} {r['unit']:<12} peak {r['peak_bytes']/2**20:8.2f} MiB")
+    else:
+        print(document)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['stage']} assets={r['assets']} days={r['days']}: "
+                  f"{r['baseline_seconds']*1000:.2f} ms -> {r['seconds']*1000:.2f} ms (x{r['ratio']:.2f})", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# src/book.py
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Union
+from portfolio import Portfolio, build_group_index, load_holdings
+from returns_store import ReturnsStore, weighted_returns
+from risk_metrics import batch_metrics
+from stress_test import scenario_multipliers
+
+class PortfolioBook:
+    """
+    Evaluate many portfolios against one shared returns panel.
+    Weights are held as a portfolios x assets matrix aligned to the return columns, so the
+    covariance is computed once and metrics, stress scenarios and liquidity are batched matrix operations.
+    """
+
+    def __init__(self, weights: pd.DataFrame, returns: Optional[Union[pd.DataFrame, ReturnsStore]] = None,
+                 asset_types: Optional[Dict[str, str]] = None, liquidity_scores: Optional[Dict[str, float]] = None,
+                 risk_free_rate: float = 0.0):
+        """
+        :param weights: portfolios x tickers DataFrame; each row is normalized to sum to 1
+        :param returns: Shared returns DataFrame or ReturnsStore; weights are aligned to its columns
+        :raises ValueError: If a ticker with non-zero weight has no returns column
+        :param asset_types: Optional dict of ticker -> AssetType, used to resolve AssetType shocks
+        :param liquidity_scores: Optional dict of ticker -> liquidity score (defaults to 0.5)
+        :param risk_free_rate: Annual risk-free rate used for Sharpe
+        """
+        self.returns = returns
+        self.risk_free_rate = risk_free_rate
+        tickers = list(returns.columns) if returns is not None else list(weights.columns)
+
+        held = weights.columns[(weights.fillna(0.0) != 0).any(axis=0)]
+        missing = list(held.difference(tickers, sort=False))
+        if missing:
+            raise ValueError(f"No returns for held tickers {missing}; dropping them would rescale the other weights.")
+        aligned = weights.reindex(columns=tickers, fill_value=0.0).fillna(0.0).astype(float)
+        totals = aligned.sum(axis=1)
+        if (totals == 0).any():
+            raise ValueError(f"Total weight is zero for: {list(totals.index[totals == 0])}")
+        self.weights = aligned.div(totals, axis=0)
+        self.tickers = tickers
+        self.asset_types = [(asset_types or {}).get(t, "Unknown") for t in tickers]
+        self.groups = build_group_index(self.asset_types)
+
+        self.liquidity_scores = np.full(len(tickers), 0.5)
+        for i, t in enumerate(tickers):
+            if liquidity_scores and t in liquidity_scores:
+                self.liquidity_scores[i] = max(0.0, min(1.0, liquidity_scores[t]))
+
+        self._cov_matrix: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_portfolios(cls, portfolios: Dict[str, Portfolio], returns: Optional[Union[pd.DataFrame, ReturnsStore]] = None,
+                        **kwargs) -> "PortfolioBook":
+        """
+        Build a book from named Portfolio objects; tickers missing from a portfolio get zero weight.
+        """
+        weights = pd.DataFrame({name: pd.Series(np.asarray(p.weights, dtype=float), index=p.tickers)
+                                for name, p in portfolios.items()}).T.fillna(0.0)
+        asset_types = {}
+        for p in portfolios.values():
+            asset_types.update(zip(p.tickers, p.asset_types))
+        kwargs.setdefault("asset_types", asset_types)
+        return cls(weights, returns, **kwargs)
+
+    @classmethod
+    def from_holdings(cls, holdings: pd.DataFrame, returns: Optional[Union[pd.DataFrame, ReturnsStore]] = None,
+                      **kwargs) -> "PortfolioBook":
+        """
+        Build a book from long holdings with columns Portfolio, Ticker, Weight (or Allocation) and optional AssetType.
+        Repeated (portfolio, ticker) rows are summed; the weights matrix is filled in one scatter-add.
+        """
+        weight_column = "Weight" if "Weight" in holdings.columns else "Allocation"
+        rows, names = pd.factorize(holdings["Portfolio"], sort=False)
+        cols, tickers = pd.factorize(holdings["Ticker"], sort=False)
+        matrix = np.zeros((len(names), len(tickers)))
+        np.add.at(matrix, (rows, cols), holdings[weight_column].to_numpy(dtype=np.float64, na_value=0.0))
+        weights = pd.DataFrame(matrix, index=pd.Index(names, name="Portfolio"), columns=tickers)
+
+        if "AssetType" in holdings.columns and "asset_types" not in kwargs:
+            labelled = holdings[["Ticker", "AssetType"]].dropna().drop_duplicates("Ticker")
+            kwargs["asset_types"] = dict(zip(labelled["Ticker"], labelled["AssetType"].astype(str)))
+        return cls(weights, returns, **kwargs)
+
+    @classmethod
+    def from_files(cls, source: Union[str, Iterable[str]], returns: Optional[Union[pd.DataFrame, ReturnsStore]] = None,
+                   workers: Optional[int] = None, columns: Optional[List[str]] = None, **kwargs) -> "PortfolioBook":
+        """
+        Build a book from a directory, glob pattern or list of holdings files, read concurrently.
+        Each file becomes one portfolio named by its path relative to the files' common directory, without
+        suffix (see portfolio.book_ids), so same-named files in different folders stay separate.
+        :param workers: Reader thread pool size
+        :param columns: Optional column projection, e.g. ['Ticker', 'Allocation', 'AssetType']
+        """
+        return cls.from_holdings(load_holdings(source, workers, columns), returns, **kwargs)
+
+    @property
+    def names(self) -> pd.Index:
+        return self.weights.index
+
+    @property
+    def cov_matrix(self) -> np.ndarray:
+        """Asset covariance shared by every portfolio, computed once."""
+        if self._cov_matrix is None:
+            self._cov_matrix = self.returns.cov().to_numpy() # type: ignore
+        return self._cov_matrix
+
+    def _metrics_frame(self, weights: np.ndarray, confidence: float) -> pd.DataFrame:
+        if self.returns is None:
+            raise ValueError("Returns are required to compute risk metrics.")
+        portfolio_returns = weighted_returns(self.returns, weights)
+        metrics = batch_metrics(portfolio_returns, weights, self.cov_matrix, confidence, self.risk_free_rate)
+        return pd.DataFrame(metrics, index=self.names)
+
+    def compute_metrics(self, confidence: float = 0.95) -> pd.DataFrame:
+        """
+        Volatility, VaR, CVaR and Sharpe for every portfolio (one row per portfolio).
+        """
+        return self._metrics_frame(self.weights.to_numpy(), confidence)
+
+    def apply_scenarios(self, scenarios: Dict[str, Dict[str, float]], confidence: float = 0.95) -> Dict[str, pd.DataFrame]:
+        """
+        Stress every portfolio under every scenario; a shock scales asset returns, so each
+        scenario is the base returns against shocked weights.
+        :return: Dict of scenario name -> portfolios x metrics DataFrame
+        """
+        multipliers = scenario_multipliers(scenarios, self.tickers, self.groups)
+        weights = self.weights.to_numpy()
+        return {name: self._metrics_frame(weights * multipliers[row], confidence)
+                for row, name in enumerate(scenarios)}
+
+    def liquidity(self, scenarios: Optional[Dict[str, Dict[str, float]]] = None) -> pd.DataFrame:
+        """
+        Weighted liquidity of every portfolio, base and under each liquidity shock scenario.
+        Shocked scores are clipped to [0, 1]; all scenarios are one matrix product.
+        :return: portfolios x scenarios DataFrame, with a 'Base' column first
+        """
+        scenarios = scenarios or {}
+        multipliers = scenario_multipliers(scenarios, self.tickers, self.groups)
+        scores = np.vstack([self.liquidity_scores, np.clip(multipliers * self.liquidity_scores, 0.0, 1.0)])
+        liquidity = np.round(self.weights.to_numpy() @ scores.T, 4)
+        return pd.DataFrame(liquidity, index=self.names, columns=["Base"] + list(scenarios))
+
+    def summary(self, scenarios: Optional[Dict[str, Dict[str, float]]] = None,
+                liquidity_scenarios: Optional[Dict[str, Dict[str, float]]] = None,
+                confidence: float = 0.95) -> pd.DataFrame:
+        """
+        All results in one tidy DataFrame with columns Portfolio, Scenario, Metric, Value.
+        Base metrics use the scenario name 'Base'; liquidity rows use the metric 'Liquidity'.
+        """
+        frames = {"Base": self.compute_metrics(confidence)}
+        frames.update(self.apply_scenarios(scenarios or {}, confidence))
+
+        tidy = []
+        for scenario, frame in frames.items():
+            long = frame.rename_axis("Portfolio").reset_index().melt(id_vars="Portfolio", var_name="Metric", value_name="Value")
+            long.insert(1, "Scenario", scenario)
+            tidy.append(long)
+
+        liquidity = self.liquidity(liquidity_scenarios).rename_axis("Portfolio").reset_index()
+        liquidity = liquidity.melt(id_vars="Portfolio", var_name="Scenario", value_name="Value")
+        liquidity.insert(2, "Metric", "Liquidity")
+        tidy.append(liquidity)
+
+        return pd.concat(tidy, ignore_index=True)
+
+    def __repr__(self):
+        return f"<PortfolioBook: {len(self.names)} portfolios x {len(self.tickers)} assets>"
+
+if __name__ == "__main__":
+    portfolio = Portfolio.from_csv("../data/sample_portfolio.csv")
+    np.random.seed(42)
+    returns = pd.DataFrame(np.random.normal(0, 0.01, (252, len(portfolio.tickers))), columns=portfolio.tickers)
+
+    weights = pd.DataFrame(np.random.rand(5, len(portfolio.tickers)), columns=portfolio.tickers,
+                           index=[f"Client {i}" for i in range(5)])
+    book = PortfolioBook(weights, returns, asset_types=dict(zip(portfolio.tickers, portfolio.asset_types)),
+                         liquidity_scores={t: 0.8 for t in portfolio.tickers})
+
+    print(book.compute_metrics())
+    print(book.summary({"Market Crash": {"Equity": -0.1}}, {"Liquidity Crunch": {"Equity": -0.2}}))
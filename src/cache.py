@@ -0,0 +1,201 @@
+# src/cache.py
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from returns_store import ReturnsStore
+
+_MISSING = object()
+
+def _feed(digest, obj: Any):
+    """Feed a canonical byte encoding of obj into the hash."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        digest.update(b"frame")
+        labels = obj.columns if isinstance(obj, pd.DataFrame) else [obj.name]
+        digest.update(json.dumps([str(c) for c in labels]).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, ReturnsStore):
+        # A store can be far larger than RAM, so it is identified by its index and the values file stamp.
+        stat = os.stat(os.path.join(obj.path, obj.VALUES_FILE))
+        with open(os.path.join(obj.path, obj.INDEX_FILE), "rb") as f:
+            digest.update(b"store" + f.read())
+        digest.update(f"{os.path.abspath(obj.path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    elif isinstance(obj, np.ndarray):
+        array = np.ascontiguousarray(obj)
+        digest.update(f"array:{array.dtype.str}:{array.shape}".encode())
+        digest.update(array.tobytes() if array.dtype != object else repr(array.tolist()).encode())
+    elif isinstance(obj, dict):
+        digest.update(b"dict")
+        for key in sorted(obj, key=str):
+            _feed(digest, str(key))
+            _feed(digest, obj[key])
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f"seq:{len(obj)}".encode())
+        for item in obj:
+            _feed(digest, item)
+    else:
+        digest.update(f"{type(obj).__name__}:{obj!r}".encode())
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Content hash of weights, returns, scenario definitions and parameters, used as a cache key.
+    DataFrames are hashed by value (pd.util.hash_pandas_object), arrays by their bytes.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        _feed(digest, part)
+    return digest.hexdigest()
+
+def portfolio_fingerprint(portfolio) -> str:
+    """Hash of the holdings (tickers, asset types, group columns) and the current weights."""
+    return fingerprint(portfolio.data, portfolio.group_columns, np.asarray(portfolio.weights, dtype=float))
+
+class ResultCache:
+    """
+    Two-tier result cache: an in-memory LRU of at most max_items entries, plus an optional
+    on-disk tier of pickled results that evicts least recently used files beyond max_bytes.
+    Keys are fingerprint() strings, so results survive process restarts when a path is given.
+    The disk tier size is tracked in memory and the directory is only rescanned when the tracked size
+    crosses max_bytes; several processes may share one directory (files removed by another process are skipped).
+    One instance may be shared by threads: the LRU and the size counter are guarded by a lock, and every
+    write goes through its own temp file.
+    """
+
+    def __init__(self, max_items: int = 256, path: Optional[str] = None, max_bytes: int = 512 * 2**20):
+        """
+        :param max_items: Maximum number of results kept in memory
+        :param path: Optional directory for the on-disk tier
+        :param max_bytes: Size budget of the on-disk tier
+        """
+        self.max_items = max_items
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.pkl") # type: ignore
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Look a key up in memory, then on disk (promoting disk hits to memory)."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        if self.path and os.path.exists(self._file(key)):
+            try:
+                with open(self._file(key), "rb") as f:
+                    value = pickle.load(f)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                value = _MISSING
+            if value is not _MISSING:
+                try:
+                    os.utime(self._file(key))
+                except FileNotFoundError:
+                    pass
+                self._remember(key, value)
+                with self._lock:
+                    self.hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key: str, value: Any):
+        """Store a result in memory and, if configured, on disk."""
+        self._remember(key, value)
+        if self.path:
+            fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=self.path)
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            with self._lock:
+                try:
+                    size -= os.stat(self._file(key)).st_size  # overwriting a key replaces its old file
+                except FileNotFoundError:
+                    pass
+                os.replace(tmp, self._file(key))
+                self._disk_bytes += size
+                if self._disk_bytes > self.max_bytes:
+                    self._evict_disk(keep=f"{key}.pkl")
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for key, computing and storing it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def _remember(self, key: str, value: Any):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def _disk_entries(self) -> list:
+        """(mtime, size, name) of every file in the disk tier; files removed meanwhile are skipped."""
+        entries = []
+        for name in os.listdir(self.path):
+            if name.endswith(".pkl"):
+                try:
+                    stat = os.stat(os.path.join(self.path, name)) # type: ignore
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, name))
+        return entries
+
+    def _evict_disk(self, keep: str = ""):
+        """
+        Delete the least recently used files (other than `keep`) until the disk tier fits in max_bytes.
+        Called with the lock held.
+        """
+        entries = self._disk_entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.path, name)) # type: ignore
+            except FileNotFoundError:
+                pass  # already evicted by another process
+            total -= size
+        self._disk_bytes = total
+
+    def clear(self):
+        """Drop every cached result from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self.path:
+                for name in os.listdir(self.path):
+                    if name.endswith(".pkl"):
+                        try:
+                            os.remove(os.path.join(self.path, name))
+                        except FileNotFoundError:
+                            pass
+                self._disk_bytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._memory or bool(self.path and os.path.exists(self._file(key)))
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def __repr__(self):
+        return f"<ResultCache: {len(self._memory)} in memory, {self.hits} hits, {self.misses} misses>"
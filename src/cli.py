@@ -0,0 +1,282 @@
+# src/cli.py
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple, Union
+from portfolio import Portfolio, book_ids, holdings_files
+from returns_store import ReturnsStore
+from risk_metrics import RiskMetrics
+from stress_test import StressTest
+from liquidity import LiquidityMetrics
+from risk_matrix import RiskMatrix
+from report import Report
+from cache import ResultCache
+from parallel import BACKENDS, iter_parallel
+
+DEFAULT_SECTIONS = list(Report.TABLES)
+CHECKPOINT_FILE = "checkpoint.jsonl"
+SUMMARY_FILE = "run_summary.json"
+
+def load_job(path: str) -> Dict[str, Any]:
+    """
+    Read and validate a JSON job spec; relative paths are resolved against the spec's directory.
+
+    {
+      "portfolios": "holdings/*.csv",            directory, glob or list of holdings files (see job_books)
+      "group_columns": ["Sector"],               optional extra shock keys
+      "returns": "returns.csv",                  .csv/.parquet/.feather (dates x tickers), a ReturnsStore
+                                                 directory, or {"synthetic": {"days": 252, "seed": 42}}
+      "risk_free_rate": 0.0,
+      "scenarios": {"stress": {name: shocks}, "liquidity": {name: shocks}},
+      "liquidity_scores": {ticker: score},
+      "likelihoods": {ticker: likelihood},
+      "metrics": ["RiskMetrics", "StressTest"],  report sections (default: all)
+      "outputs": {"dir": "reports/nightly", "format": "csv"},
+      "cache": "reports/.cache",                 optional on-disk ResultCache shared by workers
+      "workers": 4, "backend": "process"
+    }
+    """
+    with open(path) as f:
+        spec = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    for key in ("portfolios", "returns"):
+        if key not in spec:
+            raise ValueError(f"Job spec {path} has no '{key}' entry.")
+
+    def resolve(value):
+        return value if os.path.isabs(value) else os.path.join(base, value)
+
+    portfolios = spec["portfolios"]
+    spec["portfolios"] = resolve(portfolios) if isinstance(portfolios, str) else [resolve(p) for p in portfolios]
+    if isinstance(spec["returns"], str):
+        spec["returns"] = resolve(spec["returns"])
+    outputs = spec.setdefault("outputs", {})
+    outputs["dir"] = resolve(outputs.get("dir", "reports"))
+    outputs.setdefault("format", "csv")
+    if spec.get("cache"):
+        spec["cache"] = resolve(spec["cache"])
+
+    sections = spec.setdefault("metrics", DEFAULT_SECTIONS)
+    unknown = [s for s in sections if s not in Report.TABLES]
+    if unknown:
+        raise ValueError(f"Unknown metrics {unknown}; expected any of {list(Report.TABLES)}.")
+    spec.setdefault("scenarios", {})
+    return spec
+
+def load_returns(source: Union[str, Dict]) -> Union[pd.DataFrame, ReturnsStore, Dict]:
+    """Open the returns source once per run; synthetic specs are generated per book."""
+    if isinstance(source, dict):
+        return source
+    if os.path.isdir(source):
+        return ReturnsStore(source)
+    suffix = os.path.splitext(source)[1].lower()
+    if suffix == ".csv":
+        return pd.read_csv(source, index_col=0, parse_dates=True)
+    if suffix in (".parquet", ".pq"):
+        return pd.read_parquet(source)
+    if suffix in (".feather", ".arrow"):
+        # Feather has no index; a leading non-float column (e.g. dates) is used as one.
+        frame = pd.read_feather(source)
+        return frame if pd.api.types.is_float_dtype(frame.iloc[:, 0]) else frame.set_index(frame.columns[0])
+    raise ValueError(f"Unsupported returns source '{source}'.")
+
+def book_returns(returns: Union[pd.DataFrame, ReturnsStore, Dict], tickers: List[str]) -> Union[pd.DataFrame, ReturnsStore]:
+    """
+    Returns aligned to a book's positions (weights apply to return columns by position).
+    A store is used as is when its columns match, otherwise only the book's columns are read from it.
+    :raises ValueError: If some tickers have no returns column (their metrics would silently be NaN)
+    """
+    if isinstance(returns, dict):
+        options = returns.get("synthetic", {})
+        rng = np.random.default_rng(options.get("seed", 42))
+        return pd.DataFrame(rng.normal(0, options.get("volatility", 0.01), (options.get("days", 252), len(tickers))),
+                            columns=tickers)
+    missing = [t for t in tickers if t not in returns.columns]
+    if missing:
+        raise ValueError(f"No returns for tickers {missing}.")
+    if isinstance(returns, ReturnsStore):
+        return returns if list(returns.columns) == list(tickers) else returns.select(tickers)
+    return returns.reindex(columns=tickers)
+
+def job_books(spec: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    Holdings files of a job with their book ids (see portfolio.book_ids), which key the checkpoint
+    and the report files.
+    :return: List of (path, book id)
+    """
+    paths = holdings_files(spec["portfolios"])
+    if not paths:
+        raise ValueError(f"No portfolio files found for {spec['portfolios']!r}.")
+    return list(zip(paths, book_ids(paths)))
+
+# Result cache of the current (worker) process, opened on first use.
+_CACHES: Dict[str, ResultCache] = {}
+
+def _run_book(context: tuple, book: Tuple[str, str]) -> Dict[str, Any]:
+    """
+    Run the pipeline for one holdings file and write its report under <outputs dir>/<book id>_<Table>;
+    failures are returned, not raised.
+    """
+    spec, returns = context
+    path, name = book
+    try:
+        cache = None
+        if spec.get("cache"):
+            if spec["cache"] not in _CACHES:
+                _CACHES[spec["cache"]] = ResultCache(path=spec["cache"])
+            cache = _CACHES[spec["cache"]]
+        sections = spec["metrics"]
+        scenarios = spec["scenarios"]
+
+        portfolio = Portfolio.from_file(path, spec.get("group_columns"))
+        panel = book_returns(returns, portfolio.tickers)
+        risk_metrics = RiskMetrics(portfolio, panel, spec.get("risk_free_rate", 0.0), cache=cache)
+
+        stress = liquidity = risk_matrix = None
+        if "StressTest" in sections:
+            stress = StressTest(portfolio, panel, cache=cache, risk_metrics=risk_metrics)
+            if scenarios.get("stress"):
+                stress.apply_scenarios(scenarios["stress"])
+        if "Liquidity" in sections:
+            liquidity = LiquidityMetrics(portfolio, spec.get("liquidity_scores"), cache=cache)
+            if scenarios.get("liquidity"):
+                liquidity.apply_scenarios(scenarios["liquidity"])
+        if "RiskMatrix" in sections:
+            risk_matrix = RiskMatrix(portfolio, risk_metrics, spec.get("likelihoods"), cache=cache)
+
+        outputs = spec["outputs"]
+        folder, stem = os.path.split(name)
+        report = Report(portfolio, risk_metrics, stress, liquidity, risk_matrix,
+                        output_dir=os.path.join(outputs["dir"], folder))
+        tables = report.export(f"{stem}.{outputs['format']}", workers=1, sections=sections)
+        return {"portfolio": name, "status": "ok", "assets": len(portfolio.tickers), "tables": tables,
+                "metrics": risk_metrics.summary(formatted=False) if "RiskMetrics" in sections else {}}
+    except Exception as exc:
+        return {"portfolio": name, "status": "error", "error": f"{type(exc).__name__}: {exc}"}
+
+class Checkpoint:
+    """
+    Append-only JSON lines log of finished books; a rerun skips books recorded as 'ok'.
+    Each line is flushed and fsynced, so a crash loses at most the books still in flight.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from a crash
+                    if record.get("status") == "ok":
+                        self.done[record["portfolio"]] = record
+                    else:
+                        self.done.pop(record.get("portfolio"), None)
+
+    def record(self, record: Dict[str, Any]):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, default=float) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if record["status"] == "ok":
+            self.done[record["portfolio"]] = record
+
+    def reset(self):
+        self.done = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def run_job(spec: Dict[str, Any], workers: Optional[int] = None, backend: Optional[str] = None,
+            resume: bool = True, progress: bool = True) -> Dict[str, Any]:
+    """
+    Run a job spec (see load_job) over all its portfolios on a worker pool.
+    Progress is checkpointed per book in <outputs dir>/checkpoint.jsonl; with resume, books already
+    finished are skipped. The returns source is opened once and sent to each worker once.
+    :return: Run summary, also written to <outputs dir>/run_summary.json
+    """
+    started = time.time()
+    outputs_dir = spec["outputs"]["dir"]
+    os.makedirs(outputs_dir, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(outputs_dir, CHECKPOINT_FILE))
+    if not resume:
+        checkpoint.reset()
+
+    books = job_books(spec)
+    pending = [book for book in books if book[1] not in checkpoint.done]
+
+    workers = workers if workers is not None else spec.get("workers")
+    backend = backend or spec.get("backend", "process")
+    returns = load_returns(spec["returns"])
+
+    failures: List[Dict] = []
+    assets = 0
+    book_seconds = 0.0
+    for done, (_, record, seconds) in enumerate(iter_parallel(_run_book, pending, (spec, returns), workers, backend), 1):
+        record["seconds"] = seconds
+        checkpoint.record(record)
+        book_seconds += seconds
+        if record["status"] == "ok":
+            assets += record["assets"]
+        else:
+            failures.append(record)
+        if progress:
+            print(f"[{done}/{len(pending)}] {record['portfolio']}: {record['status']} ({seconds:.2f}s)", file=sys.stderr)
+
+    elapsed = time.time() - started
+    completed = len(pending) - len(failures)
+    summary = {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+        "seconds": elapsed,
+        "books_total": len(books),
+        "books_resumed": len(books) - len(pending),
+        "books_completed": completed,
+        "books_failed": len(failures),
+        "books_per_second": completed / elapsed if elapsed > 0 else 0.0,
+        "assets_per_second": assets / elapsed if elapsed > 0 else 0.0,
+        "mean_book_seconds": book_seconds / len(pending) if pending else 0.0,
+        "workers": workers,
+        "backend": backend,
+        "failures": [{"portfolio": f["portfolio"], "error": f["error"]} for f in failures],
+    }
+    with open(os.path.join(outputs_dir, SUMMARY_FILE), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="risklab", description="Run RiskLab jobs over many portfolios.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run a job spec, resuming from its checkpoint")
+    run.add_argument("job", help="JSON job spec")
+    run.add_argument("--workers", type=int, help="Worker pool size (default: spec 'workers' or CPU count)")
+    run.add_argument("--backend", choices=BACKENDS, help="Worker pool type (default: spec 'backend' or process)")
+    run.add_argument("--fresh", action="store_true", help="Ignore the checkpoint and recompute every book")
+    run.add_argument("--quiet", action="store_true", help="No per-book progress lines")
+
+    status = commands.add_parser("status", help="Show checkpoint progress of a job spec")
+    status.add_argument("job", help="JSON job spec")
+    args = parser.parse_args(argv)
+
+    try:
+        spec = load_job(args.job)
+        if args.command == "status":
+            checkpoint = Checkpoint(os.path.join(spec["outputs"]["dir"], CHECKPOINT_FILE))
+            books = [book for _, book in job_books(spec)]
+            print(f"{sum(book in checkpoint.done for book in books)}/{len(books)} books finished")
+            return 0
+        summary = run_job(spec, args.workers, args.backend, resume=not args.fresh, progress=not args.quiet)
+    except (OSError, ValueError) as exc:
+        print(f"risklab: {exc}", file=sys.stderr)
+        return 2
+
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["books_failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,79 +1,137 @@
 # src/dashboard.py
+import io
+import os
+import sys
+import time
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import numpy as np
+from typing import Dict, Optional, Tuple
 
-from portfolio import Portfolio
+from portfolio import Portfolio, FORMATS, read_holdings
 from risk_metrics import RiskMetrics
 from stress_test import StressTest
 from liquidity import LiquidityMetrics
 from risk_matrix import RiskMatrix
+from whatif import WhatIf
+from cache import fingerprint
 
-portfolio = Portfolio.from_csv("../data/sample_portfolio.csv")
+SAMPLE_PORTFOLIO = "../data/sample_portfolio.csv"
 
-np.random.seed(42)
-returns = pd.DataFrame(np.random.normal(0, 0.01, (252, len(portfolio.tickers))), columns=portfolio.tickers)
+# Data layer: every function is cached on the content of its arguments (uploaded bytes, frames,
+# scenario dicts), so a widget interaction only recomputes what its inputs actually changed.
 
-rm = RiskMetrics(portfolio, returns)
-rm.compute_volatility()
-rm.compute_var()
-rm.compute_cvar()
-rm.compute_sharpe()
+@st.cache_data(show_spinner=False)
+def load_uploaded_holdings(data: Optional[bytes], name: str) -> pd.DataFrame:
+    """Normalized holdings from an uploaded file, or the bundled sample when nothing is uploaded."""
+    if data is None:
+        return Portfolio.from_csv(SAMPLE_PORTFOLIO).data # type: ignore
+    fmt = FORMATS.get(os.path.splitext(name)[1].lower(), "csv")
+    return Portfolio.from_frame(read_holdings(io.BytesIO(data), fmt=fmt)).data # type: ignore
 
-st_test = StressTest(portfolio, returns)
-scenarios = {
-    "Base": {t: 0.0 for t in portfolio.tickers},
-    "Market Crash": {t: -0.1 for t in portfolio.tickers},
-    "Tech Dip": {t: -0.15 for t in portfolio.tickers},
-    "Bond Rally": {t: 0.05 for t in portfolio.tickers},
-}
-for name, adjustments in scenarios.items():
-    st_test.apply_scenario(name, adjustments)
+@st.cache_data(show_spinner=False)
+def load_returns(data: Optional[bytes], name: str, tickers: Tuple[str, ...]) -> pd.DataFrame:
+    """Returns from an uploaded CSV/Parquet (dates in the first column), or seeded synthetic returns."""
+    if data is None:
+        rng = np.random.RandomState(42)
+        return pd.DataFrame(rng.normal(0, 0.01, (252, len(tickers))), columns=list(tickers))
+    if name.lower().endswith((".parquet", ".pq")):
+        returns = pd.read_parquet(io.BytesIO(data))
+    else:
+        returns = pd.read_csv(io.BytesIO(data), index_col=0)
+    return returns.reindex(columns=list(tickers))
 
-scores = {t: 0.8 for t in portfolio.tickers}
-lm = LiquidityMetrics(portfolio, scores)
-lm.apply_scenario("Liquidity Crunch", {"Equity": -0.2, "Bond": -0.05})
-lm.apply_scenario("Tech Rally", {"Equity": 0.1, "Bond": 0.02})
+@st.cache_resource(show_spinner=False)
+def build_portfolio(holdings: pd.DataFrame) -> Portfolio:
+    """
+    One shared Portfolio per holdings content; treated as read-only by every section.
+    Extra text columns (e.g. Sector) become group columns.
+    """
+    return Portfolio.from_frame(holdings.copy(), group_columns=label_columns(holdings))
 
-likelihoods = {t: 0.1 + 0.1*np.random.rand() for t in portfolio.tickers}
-rmat = RiskMatrix(portfolio, rm, likelihoods)
+def label_columns(holdings: pd.DataFrame) -> list:
+    return [c for c in holdings.columns if c not in ("Ticker", "Weight", "AssetType")
+            and not pd.api.types.is_numeric_dtype(holdings[c])]
 
-st.set_page_config(page_title="RiskLab Dashboard", layout="wide")
-st.title("📊 RiskLab Interactive Dashboard")
+@st.cache_data(show_spinner="Computing risk metrics...")
+def compute_risk_metrics(holdings: pd.DataFrame, returns: pd.DataFrame) -> Tuple[dict, dict]:
+    rm = RiskMetrics(build_portfolio(holdings), returns)
+    return dict(rm.summary(formatted=False)), dict(rm.summary(formatted=True))
 
-tabs = st.tabs(["Portfolio", "Risk Metrics", "Stress Test", "Liquidity", "Risk Matrix"])
+@st.cache_data(show_spinner="Running stress scenarios...")
+def compute_stress(holdings: pd.DataFrame, returns: pd.DataFrame, scenarios: Dict[str, Dict[str, float]]) -> pd.DataFrame:
+    st_test = StressTest(build_portfolio(holdings), returns)
+    st_test.apply_scenarios(scenarios)
+    return st_test.summary()
 
-with tabs[0]:
-    st.subheader("Portfolio Overview")
-    st.dataframe(portfolio.data.style.format({"Weight": "{:.2%}"}))  # type: ignore
+@st.cache_data(show_spinner="Running liquidity scenarios...")
+def compute_liquidity(holdings: pd.DataFrame, scores: Dict[str, float], scenarios: Dict[str, Dict[str, float]]) -> pd.DataFrame:
+    lm = LiquidityMetrics(build_portfolio(holdings), scores)
+    lm.apply_scenarios(scenarios)
+    return lm.summary()
 
-with tabs[1]:
-    st.subheader("Portfolio Risk Metrics")
+@st.cache_data(show_spinner="Building risk matrix...")
+def compute_risk_matrix(holdings: pd.DataFrame, returns: pd.DataFrame, likelihoods: Dict[str, float],
+                        view: str = "Full matrix", option=None, drill: Optional[Tuple[int, int]] = None) -> pd.DataFrame:
+    """
+    One view of the risk matrix: the full ticker matrix, a group aggregate (option = group column),
+    the top pairs (option = k) or a tiles x tiles downsample (option = tiles), optionally one tile drilled into.
+    """
+    portfolio = build_portfolio(holdings)
+    rmat = RiskMatrix(portfolio, RiskMetrics(portfolio, returns), likelihoods)
+    if view == "By group":
+        return rmat.aggregate(by=option)
+    if view == "Top pairs":
+        return rmat.compute_matrix(output="topk", k=option) # type: ignore
+    if view == "Tiles":
+        return rmat.drill_down(*drill, tiles=option) if drill else rmat.downsample(tiles=option)
+    return rmat.compute_matrix() # type: ignore
+
+def default_likelihoods(tickers) -> Dict[str, float]:
+    rng = np.random.RandomState(7)
+    return {t: 0.1 + 0.1 * v for t, v in zip(tickers, rng.rand(len(tickers)))}
+
+def stress_scenarios(tickers) -> Dict[str, Dict[str, float]]:
+    return {
+        "Base": {t: 0.0 for t in tickers},
+        "Market Crash": {t: -0.1 for t in tickers},
+        "Tech Dip": {t: -0.15 for t in tickers},
+        "Bond Rally": {t: 0.05 for t in tickers},
+    }
+
+LIQUIDITY_SCENARIOS = {
+    "Liquidity Crunch": {"Equity": -0.2, "Bond": -0.05},
+    "Tech Rally": {"Equity": 0.1, "Bond": 0.02},
+}
 
-    metrics_numeric = rm.summary(formatted=False)
-    metrics_display = rm.summary(formatted=True)
+# Sections: only the selected one runs, and it only asks the data layer for what it displays.
 
-    metrics_df = pd.DataFrame([metrics_numeric], index=["Base"])
-    metrics_display_df = pd.DataFrame([metrics_display], index=["Base"])
+def show_portfolio(holdings: pd.DataFrame, returns: pd.DataFrame):
+    st.subheader("Portfolio Overview")
+    st.dataframe(holdings.style.format({"Weight": "{:.2%}"}))  # type: ignore
 
-    st.dataframe(metrics_display_df)
+def show_risk_metrics(holdings: pd.DataFrame, returns: pd.DataFrame):
+    st.subheader("Portfolio Risk Metrics")
+    _, metrics_display = compute_risk_metrics(holdings, returns)
+    st.dataframe(pd.DataFrame([metrics_display], index=["Base"]))
 
-with tabs[2]:
+def show_stress_test(holdings: pd.DataFrame, returns: pd.DataFrame):
     st.subheader("Stress Test Scenarios")
-    st.dataframe(st_test.summary())
+    summary = compute_stress(holdings, returns, stress_scenarios(holdings["Ticker"]))
+    st.dataframe(summary)
 
-    scenario_df = st_test.summary().copy()
-    scenario_df.reset_index(inplace=True)
+    scenario_df = summary.reset_index()
     scenario_df.rename(columns={scenario_df.columns[0]: "Scenario"}, inplace=True)
 
     scenario_df_plot = scenario_df.melt(id_vars="Scenario", var_name="Metric", value_name="Value")
     fig = px.line(scenario_df_plot, x="Scenario", y="Value", color="Metric", markers=True)
     st.plotly_chart(fig, use_container_width=True)
 
-with tabs[3]:
+def show_liquidity(holdings: pd.DataFrame, returns: pd.DataFrame):
     st.subheader("Liquidity Metrics")
-    liq_df = lm.summary().copy()
+    scores = {t: 0.8 for t in holdings["Ticker"]}
+    liq_df = compute_liquidity(holdings, scores, LIQUIDITY_SCENARIOS)
     st.dataframe(liq_df)
 
     liq_df_reset = liq_df.reset_index()
@@ -87,48 +145,125 @@ with tabs[3]:
     )
     st.plotly_chart(fig_liq, use_container_width=True)
 
-with tabs[4]:
+def heatmap(matrix: pd.DataFrame, annotate_max_cells: int):
+    """Heatmap of a square frame; cell annotations only when the matrix is small enough to stay responsive."""
+    fig_heat = px.imshow(
+        matrix.values,
+        labels=dict(x="Ticker", y="Ticker", color="Risk Score"),
+        x=[str(c) for c in matrix.columns],
+        y=[str(i) for i in matrix.index],
+        color_continuous_scale="RdYlGn_r",
+        text_auto=".4f" if matrix.size <= annotate_max_cells else False # type: ignore
+    )
+    st.plotly_chart(fig_heat, use_container_width=True)
+
+def show_risk_matrix(holdings: pd.DataFrame, returns: pd.DataFrame):
     st.subheader("Risk Matrix Heatmap")
-    rm_df = rmat.compute_matrix().copy()
-
-    rm_df.columns = rm_df.columns.str.strip()
-
-    if "RiskScore" in rm_df.columns:
-        rm_values = rm_df["RiskScore"].values.reshape(-1, 1) # type: ignore
-        labels = rm_df.index.tolist()
-        fig_heat = px.imshow(
-            rm_values,
-            labels=dict(x="Risk Score", y="Ticker", color="Risk Score"),
-            x=["RiskScore"],
-            y=labels,
-            color_continuous_scale="RdYlGn_r",
-            text_auto=".4f" # type: ignore
-        )
-    
-    elif rm_df.shape[0] == rm_df.shape[1]:
-        rm_values = rm_df.values
-        labels = rm_df.index.tolist()  
-        fig_heat = px.imshow(
-            rm_values,
-            labels=dict(x="Ticker", y="Ticker", color="Risk Score"),
-            x=rm_df.columns,
-            y=labels,
-            color_continuous_scale="RdYlGn_r",
-            text_auto=".4f" # type: ignore
-        )
-    
+    likelihoods = default_likelihoods(holdings["Ticker"])
+    n = len(holdings)
+
+    full_limit = st.sidebar.number_input("Full matrix up to (tickers)", min_value=2, value=100, step=10)
+    annotate_max_cells = st.sidebar.number_input("Annotate heatmaps up to (cells)", min_value=0, value=400, step=100)
+
+    views = ["Full matrix", "By group", "Top pairs", "Tiles"] if n <= full_limit else ["Tiles", "By group", "Top pairs"]
+    view = st.radio("View", views, horizontal=True)
+
+    if view == "By group":
+        group = st.selectbox("Group by", ["AssetType"] + label_columns(holdings))
+        heatmap(compute_risk_matrix(holdings, returns, likelihoods, view, group), annotate_max_cells)
+    elif view == "Top pairs":
+        k = st.slider("Pairs", min_value=5, max_value=200, value=20)
+        pairs = compute_risk_matrix(holdings, returns, likelihoods, view, k)
+        st.dataframe(pairs)
+        pairs = pairs.assign(Pair=pairs["Ticker1"] + " / " + pairs["Ticker2"])
+        st.plotly_chart(px.bar(pairs, x="Pair", y="RiskScore", color="RiskScore",
+                               color_continuous_scale="RdYlGn_r"), use_container_width=True)
+    elif view == "Tiles":
+        tiles = st.slider("Tiles per axis", min_value=2, max_value=min(100, max(2, n)), value=min(40, max(2, n)))
+        tiled = compute_risk_matrix(holdings, returns, likelihoods, view, tiles)
+        heatmap(tiled, annotate_max_cells)
+
+        st.caption("Drill down into one tile")
+        row, col = st.columns(2)
+        row_tile = row.selectbox("Row tile", range(len(tiled)), format_func=lambda i: tiled.index[i])
+        col_tile = col.selectbox("Column tile", range(len(tiled)), format_func=lambda i: tiled.columns[i])
+        heatmap(compute_risk_matrix(holdings, returns, likelihoods, view, tiles, (row_tile, col_tile)), annotate_max_cells)
     else:
-        st.error("Risk matrix has an unexpected format. Showing dummy zeros.")
-        rm_df["RiskScore"] = np.zeros(len(rm_df))
-        rm_values = rm_df["RiskScore"].values.reshape(-1, 1) # type: ignore
-        labels = rm_df.index.tolist()
-        fig_heat = px.imshow(
-            rm_values,
-            labels=dict(x="Risk Score", y="Ticker", color="Risk Score"),
-            x=["RiskScore"],
-            y=labels,
-            color_continuous_scale="RdYlGn_r",
-            text_auto=".4f" # type: ignore
-        )
-
-    st.plotly_chart(fig_heat, use_container_width=True)
\ No newline at end of file
+        heatmap(compute_risk_matrix(holdings, returns, likelihoods), annotate_max_cells)
+
+def whatif_engine(holdings: pd.DataFrame, returns: pd.DataFrame) -> WhatIf:
+    """The session's WhatIf state, rebuilt only when the holdings or returns content changes."""
+    key = fingerprint(holdings, returns)
+    if st.session_state.get("whatif_key") != key:
+        st.session_state["whatif_key"] = key
+        st.session_state["whatif"] = WhatIf(build_portfolio(holdings), returns)
+    return st.session_state["whatif"]
+
+def show_whatif(holdings: pd.DataFrame, returns: pd.DataFrame):
+    st.subheader("What-If Analysis")
+    engine = whatif_engine(holdings, returns)
+
+    if st.button("Reset"):
+        engine.reset()
+        for key in [k for k in st.session_state if str(k).startswith("whatif_shock_") or k == "whatif_weights"]:
+            del st.session_state[key]
+
+    st.caption("Shocks per AssetType")
+    labels = list(engine.portfolio.groups["AssetType"])
+    columns = st.columns(min(len(labels), 4))
+    shocks = {label: columns[i % len(columns)].slider(label, -0.5, 0.5, 0.0, 0.01, key=f"whatif_shock_{label}")
+              for i, label in enumerate(labels)}
+
+    st.caption("Weights")
+    edited = st.data_editor(pd.DataFrame({"Ticker": engine.tickers, "Weight": engine.base_weights}),
+                            disabled=["Ticker"], key="whatif_weights", hide_index=True)
+
+    # Only inputs that differ from the engine's state are applied, each as an incremental update.
+    start = time.perf_counter()
+    for label, shock in shocks.items():
+        if engine.shocks.get(label, 0.0) != shock:
+            engine.set_shock(label, shock)
+    new_weights = edited["Weight"].to_numpy(dtype=float)
+    changed = np.flatnonzero(new_weights != engine.weights)
+    if len(changed):
+        engine.set_weights({engine.tickers[i]: new_weights[i] for i in changed})
+    whatif = engine.summary()
+    elapsed = time.perf_counter() - start
+
+    _, base = compute_risk_metrics(holdings, returns)
+    base = {**base, "Total Weight": round(float(engine.base_weights.sum()), 4)}
+    st.dataframe(pd.DataFrame([base, whatif], index=["Base", "What-If"]))
+    st.caption(f"Updated in {elapsed * 1000:.1f} ms")
+
+SECTION_VIEWS = {
+    "Portfolio": show_portfolio,
+    "Risk Metrics": show_risk_metrics,
+    "Stress Test": show_stress_test,
+    "Liquidity": show_liquidity,
+    "Risk Matrix": show_risk_matrix,
+    "What-If": show_whatif,
+}
+
+def main():
+    st.set_page_config(page_title="RiskLab Dashboard", layout="wide")
+    st.title("📊 RiskLab Interactive Dashboard")
+
+    holdings_file = st.sidebar.file_uploader("Portfolio holdings", type=[s.lstrip(".") for s in FORMATS])
+    returns_file = st.sidebar.file_uploader("Returns (optional)", type=["csv", "parquet"])
+    section = st.sidebar.radio("Section", list(SECTION_VIEWS))
+
+    holdings = load_uploaded_holdings(holdings_file.getvalue() if holdings_file else None,
+                                      holdings_file.name if holdings_file else "")
+    returns = load_returns(returns_file.getvalue() if returns_file else None,
+                           returns_file.name if returns_file else "", tuple(holdings["Ticker"]))
+
+    SECTION_VIEWS[section](holdings, returns)
+
+def run():
+    """Console-script entry point: serve this file with `streamlit run`, passing extra arguments through."""
+    from streamlit.web import cli as stcli
+    sys.argv = ["streamlit", "run", os.path.abspath(__file__)] + sys.argv[1:]
+    sys.exit(stcli.main())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# src/instrumentation.py
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Active sink; None means instrumentation is off and timed() wrappers only pay one global lookup.
+_SINK: Optional["Sink"] = None
+_TRACK_MEMORY = False
+_STARTED_TRACING = False
+
+class Sink(ABC):
+    """Receives one record per instrumented call; see timed() for the record fields."""
+
+    @abstractmethod
+    def emit(self, record: Dict[str, Any]):
+        ...
+
+    def close(self):
+        pass
+
+class MemorySink(Sink):
+    """Keep records in a list, e.g. for tests or an interactive session."""
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+
+    def emit(self, record: Dict[str, Any]):
+        self.records.append(record)
+
+    def summary(self):
+        """Calls, total and max wall time, CPU time and allocated bytes per stage, slowest first."""
+        import pandas as pd
+        if not self.records:
+            return pd.DataFrame()
+        frame = pd.DataFrame(self.records)
+        summary = frame.groupby("stage").agg(calls=("wall_seconds", "size"), wall_seconds=("wall_seconds", "sum"),
+                                             max_wall_seconds=("wall_seconds", "max"), cpu_seconds=("cpu_seconds", "sum"),
+                                             alloc_bytes=("alloc_bytes", "sum"))
+        return summary.sort_values("wall_seconds", ascending=False)
+
+class JsonLinesSink(Sink):
+    """Append each record as one JSON line to a file, for nightly logs."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a")
+
+    def emit(self, record: Dict[str, Any]):
+        line = json.dumps(record)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class PrometheusSink(Sink):
+    """
+    Aggregate records per stage into counters and render them in the Prometheus text exposition format.
+    :param path: Optional file (e.g. a node-exporter textfile) written by close()
+    """
+
+    METRICS = (
+        ("calls_total", "counter", "Instrumented calls"),
+        ("wall_seconds_total", "counter", "Wall-clock time spent in the stage"),
+        ("cpu_seconds_total", "counter", "Process CPU time spent in the stage"),
+        ("alloc_bytes_total", "counter", "Net bytes allocated by the stage (0 unless memory tracking is on)"),
+        ("wall_seconds_max", "gauge", "Slowest single call"),
+    )
+
+    def __init__(self, path: Optional[str] = None, prefix: str = "risklab_stage"):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._values: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def emit(self, record: Dict[str, Any]):
+        with self._lock:
+            values = self._values[record["stage"]]
+            values["calls_total"] += 1
+            values["wall_seconds_total"] += record["wall_seconds"]
+            values["cpu_seconds_total"] += record["cpu_seconds"]
+            values["alloc_bytes_total"] += record["alloc_bytes"]
+            values["wall_seconds_max"] = max(values["wall_seconds_max"], record["wall_seconds"])
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, kind, help_text in self.METRICS:
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} {kind}")
+                for stage in sorted(self._values):
+                    lines.append(f'{metric}{{stage="{stage}"}} {self._values[stage][name]:g}')
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        if self.path:
+            with open(self.path, "w") as f:
+                f.write(self.render())
+
+def enable(sink: Sink, track_memory: bool = False):
+    """
+    Start sending records to `sink`.
+    :param track_memory: Also record net allocated bytes via tracemalloc (slows Python-heavy code noticeably)
+    """
+    global _SINK, _TRACK_MEMORY, _STARTED_TRACING
+    _SINK, _TRACK_MEMORY = sink, track_memory
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _STARTED_TRACING = True
+
+def disable():
+    """Stop recording and close the active sink."""
+    global _SINK, _TRACK_MEMORY, _STARTED_TRACING
+    sink, _SINK = _SINK, None
+    if _STARTED_TRACING:
+        tracemalloc.stop()
+    _TRACK_MEMORY = _STARTED_TRACING = False
+    if sink is not None:
+        sink.close()
+
+@contextmanager
+def instrumented(sink: Optional[Sink] = None, track_memory: bool = False) -> Iterator[Sink]:
+    """Record every instrumented call made inside the block, e.g. `with instrumented() as sink: ...`."""
+    sink = sink if sink is not None else MemorySink()
+    enable(sink, track_memory)
+    try:
+        yield sink
+    finally:
+        disable()
+
+def _length(value: Any) -> Optional[int]:
+    shape = getattr(value, "shape", None)
+    if shape is not None and len(shape):
+        return int(shape[0])
+    return None
+
+def input_sizes(args: tuple, kwargs: dict, result: Any = None) -> Dict[str, int]:
+    """
+    Best-effort sizes of an instrumented call: assets (portfolio positions), rows (return history)
+    and scenarios (size of a scenarios dict argument, or 1 for a single shocks dict).
+    """
+    sizes: Dict[str, int] = {}
+    owner = args[0] if args else None
+    portfolio = getattr(owner, "portfolio", None)
+    for candidate in (portfolio, owner, result):
+        tickers = getattr(candidate, "tickers", None)
+        if isinstance(tickers, list):
+            sizes["assets"] = len(tickers)
+            break
+    rows = _length(getattr(owner, "returns", None))
+    if rows is not None:
+        sizes["rows"] = rows
+
+    scenarios = kwargs.get("scenarios")
+    if scenarios is None:
+        scenarios = next((a for a in args[1:] if isinstance(a, dict)), None)
+    if isinstance(scenarios, dict) and scenarios:
+        nested = all(isinstance(v, dict) or callable(v) for v in scenarios.values())
+        sizes["scenarios"] = len(scenarios) if nested else 1
+    return sizes
+
+def timed(stage: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """
+    Decorator recording wall time, CPU time, allocated bytes and input sizes of each call to the active sink.
+    When instrumentation is disabled the wrapper just calls through.
+    Records: {'stage', 'wall_seconds', 'cpu_seconds', 'alloc_bytes', 'start', 'thread', 'error', **input_sizes}.
+    :param stage: Record name; defaults to the function's qualified name (e.g. 'RiskMetrics.compute_var')
+    """
+    def decorator(func: Callable) -> Callable:
+        name = stage or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            sink = _SINK
+            if sink is None:
+                return func(*args, **kwargs)
+
+            track = _TRACK_MEMORY and tracemalloc.is_tracing()
+            allocated = tracemalloc.get_traced_memory()[0] if track else 0
+            start, wall, cpu = time.time(), time.perf_counter(), time.process_time()
+            result, error = None, None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except BaseException as exc:
+                error = type(exc).__name__
+                raise
+            finally:
+                record = {
+                    "stage": name,
+                    "wall_seconds": time.perf_counter() - wall,
+                    "cpu_seconds": time.process_time() - cpu,
+                    "alloc_bytes": tracemalloc.get_traced_memory()[0] - allocated if track else 0,
+                    "start": start,
+                    "thread": threading.current_thread().name,
+                    "error": error,
+                }
+                record.update(input_sizes(args, kwargs, result))
+                sink.emit(record)
+        return wrapper
+    return decorator
+
+class ProfileResult:
+    """Output of profile(): cProfile statistics and the top tracemalloc allocation sites."""
+
+    def __init__(self):
+        self.stats: Optional[pstats.Stats] = None
+        self.stats_text = ""
+        self.memory_text = ""
+        self.peak_bytes = 0
+
+@contextmanager
+def profile(path: Optional[str] = None, top: int = 25, sort: str = "cumulative") -> Iterator[ProfileResult]:
+    """
+    Profile one run with cProfile and tracemalloc.
+    :param path: Optional output prefix; writes <path>.prof (for snakeviz/pstats), <path>_cpu.txt and <path>_memory.txt
+    :param top: Number of functions and allocation sites listed in the text reports
+    :param sort: pstats sort key
+    """
+    result = ProfileResult()
+    profiler = cProfile.Profile()
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        result.peak_bytes = tracemalloc.get_traced_memory()[1]
+        if started_tracing:
+            tracemalloc.stop()
+
+        buffer = io.StringIO()
+        result.stats = pstats.Stats(profiler, stream=buffer)
+        result.stats.sort_stats(sort).print_stats(top)
+        result.stats_text = buffer.getvalue()
+        lines = [f"Peak traced memory: {result.peak_bytes / 2**20:.2f} MiB"]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:top]]
+        result.memory_text = "\n".join(lines) + "\n"
+
+        if path:
+            profiler.dump_stats(f"{path}.prof")
+            with open(f"{path}_cpu.txt", "w") as f:
+                f.write(result.stats_text)
+            with open(f"{path}_memory.txt", "w") as f:
+                f.write(result.memory_text)
+
+if __name__ == "__main__":
+    import numpy as np
+    import pandas as pd
+    from portfolio import Portfolio
+    from risk_metrics import RiskMetrics
+    from stress_test import StressTest
+    # Use the imported module's state, which the instrumented modules share, not this __main__ copy.
+    from instrumentation import PrometheusSink, instrumented, profile
+
+    sink = PrometheusSink()
+    with instrumented(sink, track_memory=True):
+        portfolio = Portfolio.from_csv("../data/sample_portfolio.csv")
+        np.random.seed(42)
+        returns = pd.DataFrame(np.random.normal(0, 0.01, (252, len(portfolio.tickers))), columns=portfolio.tickers)
+        rm = RiskMetrics(portfolio, returns)
+        st = StressTest(portfolio, returns)
+        st.apply_scenario("Market Crash", {"Equity": -0.2})
+    print(sink.render())
+
+    with profile(top=10) as run:
+        RiskMetrics(portfolio, returns).compute_tail_ladder()
+    print(run.stats_text)
@@ -0,0 +1,191 @@
+# src/liquidation.py
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+from portfolio import Portfolio
+from liquidity import LiquidityMetrics
+from stress_test import scenario_multipliers
+from instrumentation import timed
+
+class LiquidationModel(LiquidityMetrics):
+    """
+    Liquidation horizon and market-impact cost on top of LiquidityMetrics.
+    Each position is sold at a fixed participation rate of its average daily volume (ADV), and
+    impact follows the square-root law: cost = impact_coef * daily vol * sqrt(size / ADV) * size.
+    Liquidity shock scenarios (ticker or AssetType keyed, as in apply_scenario) scale ADV by (1 + shock).
+    """
+
+    def __init__(self, portfolio: Portfolio, adv: Dict[str, float], position_values: Optional[Dict[str, float]] = None,
+                 portfolio_value: float = 1_000_000.0, volatility: Optional[Dict[str, float]] = None,
+                 participation: float = 0.1, impact_coef: float = 1.0, default_volatility: float = 0.02,
+                 liquidity_scores: Optional[Dict[str, float]] = None):
+        """
+        :param portfolio: Portfolio object
+        :param adv: Dict of ticker -> average daily traded value (same currency as positions)
+        :param position_values: Optional dict of ticker -> position value; defaults to weight * portfolio_value
+        :param portfolio_value: Total portfolio value used when position_values is not given
+        :param volatility: Optional dict of ticker -> daily return volatility
+        :param participation: Fraction of ADV that can be traded per day
+        :param impact_coef: Square-root law coefficient
+        :param default_volatility: Daily volatility for tickers missing from `volatility`
+        :param liquidity_scores: Optional dict of ticker -> liquidity score (see LiquidityMetrics)
+        """
+        super().__init__(portfolio, liquidity_scores)
+        if not 0 < participation <= 1:
+            raise ValueError("participation must be in (0, 1].")
+        self.participation = participation
+        self.impact_coef = impact_coef
+
+        self.adv = self._aligned(adv, np.nan)
+        missing = [t for t, v in zip(self.portfolio.tickers, self.adv) if not v > 0]
+        if missing:
+            raise ValueError(f"ADV must be positive for every position; missing or invalid: {missing}")
+        if position_values is None:
+            self.position_values = self.portfolio.weights * portfolio_value
+        else:
+            self.position_values = np.abs(self._aligned(position_values, 0.0))
+        self.volatility = self._aligned(volatility or {}, default_volatility)
+
+        self.liquidation_results = pd.DataFrame()
+
+    def _aligned(self, values: Dict[str, float], default: float) -> np.ndarray:
+        """Ticker-keyed values as an array in portfolio order; tickers not in the portfolio are ignored."""
+        array = np.full(len(self.portfolio.tickers), default, dtype=np.float64)
+        index = self.portfolio.ticker_index
+        for t, v in values.items():
+            if t in index:
+                array[index[t]] = v
+        return array
+
+    def _base_terms(self):
+        """Per-position days to liquidate and impact cost at base ADV."""
+        days = self.position_values / (self.participation * self.adv)
+        cost = self.impact_coef * self.volatility * self.position_values * np.sqrt(self.position_values / self.adv)
+        return days, cost
+
+    def position_liquidation(self, shocks: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+        """
+        Days to liquidate and impact cost for every position, at base ADV or under one shock dict.
+        """
+        days, cost = self._base_terms()
+        multiplier = scenario_multipliers({"": shocks or {}}, self.portfolio.tickers, self.portfolio.group_positions())[0]
+        volume = self.adv * np.clip(multiplier, 0.0, None)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inverse = np.where(self.position_values > 0, 1.0 / np.clip(multiplier, 0.0, None), 0.0)
+        return pd.DataFrame({
+            "Ticker": self.portfolio.tickers,
+            "Position Value": self.position_values,
+            "ADV": volume,
+            "Days to Liquidate": days * inverse,
+            "Impact Cost": cost * np.sqrt(inverse),
+        })
+
+    def _position_classes(self, active: np.ndarray):
+        """
+        Partition the active positions into classes sharing every group label, so a group-keyed
+        shock scales whole classes.
+        :return: (class id per active position, group label -> class ids)
+        """
+        codes = [np.zeros(int(active.sum()), dtype=np.intp)]
+        for index in self.portfolio.groups.values():
+            column = np.full(len(active), -1, dtype=np.intp)
+            for code, idx in enumerate(index.values()):
+                column[idx] = code
+            codes.append(column[active])
+        _, class_ids = np.unique(np.vstack(codes), axis=1, return_inverse=True)
+        class_ids = class_ids.ravel()
+
+        compact = np.cumsum(active) - 1
+        label_classes = {label: np.unique(class_ids[compact[idx[active[idx]]]])
+                         for label, idx in self.portfolio.group_positions().items()}
+        return class_ids, label_classes
+
+    @timed()
+    def liquidate(self, scenarios: Optional[Dict[str, Dict[str, float]]] = None) -> pd.DataFrame:
+        """
+        Portfolio liquidation horizon and impact cost, at base ADV and under every shock scenario.
+        Scaling ADV by m divides days by m and impact by sqrt(m). Positions sharing all group labels
+        get the same group shocks, so scenarios are evaluated on a scenarios x classes matrix and
+        ticker-keyed shocks are applied as sparse corrections; the cost barely depends on position count.
+        :param scenarios: Dict mapping scenario name to a shocks dict (see apply_scenario)
+        :return: DataFrame indexed by scenario ('Base' first) with Days to Liquidate (slowest position),
+                 Avg Days (value weighted), Impact Cost and Impact Cost % (of portfolio value)
+        """
+        scenarios = {"Base": {}, **(scenarios or {})}
+        active = self.position_values > 0
+        days, cost = self._base_terms()
+        days, cost, values = days[active], cost[active], self.position_values[active]
+        total = values.sum()
+        ticker_index = {t: i for i, t in enumerate(t for t, a in zip(self.portfolio.tickers, active) if a)}
+
+        class_ids, label_classes = self._position_classes(active)
+        n_classes = int(class_ids.max()) + 1 if len(class_ids) else 0
+        day_values = days * values
+        class_day_values = np.bincount(class_ids, day_values, n_classes)
+        class_cost = np.bincount(class_ids, cost, n_classes)
+        # Positions ordered by class, slowest first, to find each class's slowest unshocked position.
+        order = np.lexsort((-days, class_ids))
+        starts = np.searchsorted(class_ids[order], np.arange(n_classes + 1))
+        class_days = days[order[starts[:-1]]]
+
+        factors = np.ones((len(scenarios), n_classes))
+        ticker_shocks = []
+        for row, shocks in enumerate(scenarios.values()):
+            hits: Dict[int, float] = {}
+            for key, shock in shocks.items():
+                if key in ticker_index:
+                    hits[ticker_index[key]] = hits.get(ticker_index[key], 1.0) * (1 + shock)
+                elif key in label_classes:
+                    factors[row, label_classes[key]] *= 1 + shock
+            ticker_shocks.append(hits)
+
+        class_count = np.bincount(class_ids, minlength=n_classes)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inverse = 1.0 / np.clip(factors, 0.0, None)
+            horizon = (inverse * class_days).max(axis=1, initial=0.0)
+            avg_days = inverse @ class_day_values
+            impact = np.sqrt(inverse) @ class_cost
+
+            for row, hits in enumerate(ticker_shocks):
+                if not hits:
+                    continue
+                # Take the shocked positions out of their classes and evaluate them on their own.
+                positions = np.fromiter(hits, dtype=np.intp, count=len(hits))
+                classes = class_ids[positions]
+                own_inverse = 1.0 / np.clip(factors[row, classes] * np.fromiter(hits.values(), dtype=float), 0.0, None)
+                remaining = class_count - np.bincount(classes, minlength=n_classes)
+                rest_day_values = class_day_values - np.bincount(classes, day_values[positions], n_classes)
+                rest_cost = class_cost - np.bincount(classes, cost[positions], n_classes)
+
+                shocked = np.zeros(len(days), dtype=bool)
+                shocked[positions] = True
+                rest_days = class_days.copy()
+                for c in np.unique(classes):
+                    members = order[starts[c]:starts[c + 1]]
+                    unshocked = members[~shocked[members]]
+                    rest_days[c] = days[unshocked[0]] if len(unshocked) else 0.0
+
+                keep = remaining > 0
+                horizon[row] = max((inverse[row, keep] * rest_days[keep]).max(initial=0.0),
+                                   (own_inverse * days[positions]).max())
+                avg_days[row] = inverse[row, keep] @ rest_day_values[keep] + own_inverse @ day_values[positions]
+                impact[row] = np.sqrt(inverse[row, keep]) @ rest_cost[keep] + np.sqrt(own_inverse) @ cost[positions]
+
+        avg_days = avg_days / total if total else np.zeros(len(scenarios))
+        results = np.column_stack([horizon, avg_days, impact, impact / total if total else impact])
+        frame = pd.DataFrame(results, index=list(scenarios),
+                             columns=["Days to Liquidate", "Avg Days", "Impact Cost", "Impact Cost %"])
+        self.liquidation_results = frame
+        return frame
+
+if __name__ == "__main__":
+    portfolio = Portfolio.from_csv("../data/sample_portfolio.csv")
+
+    adv = {
+        "AAPL": 1.2e10, "MSFT": 9e9, "TSLA": 2.5e10, "AMZN": 8e9,
+        "GOOG": 5e9, "NVDA": 3e10, "JPM": 2e9, "XOM": 1.5e9
+    }
+    model = LiquidationModel(portfolio, adv, portfolio_value=5e9, participation=0.1)
+
+    print(model.position_liquidation())
+    print(model.liquidate({"Liquidity Crunch": {"Equity": -0.5, "Bond": -0.3}, "Frozen Bonds": {"Bond": -1.0}}))
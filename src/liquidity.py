@@ -1,43 +1,81 @@
 # src/liquidity.py
+import numpy as np
 import pandas as pd
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional, Union
 from portfolio import Portfolio
+from parallel import run_parallel
+from stress_test import scenario_multipliers
+from cache import ResultCache, fingerprint, portfolio_fingerprint
+from instrumentation import timed
+
+# A non-linear liquidity scenario maps the ticker -> score dict to shocked scores.
+LiquidityScenarioFunc = Callable[[Dict[str, float]], Dict[str, float]]
+
+def _liquidity_task(context: tuple, scenario: Union[Dict[str, float], LiquidityScenarioFunc]) -> float:
+    """Evaluate one liquidity scenario in a worker."""
+    tickers, groups, weights, scores = context
+    if callable(scenario):
+        shocked = scores.copy()
+        index = {t: i for i, t in enumerate(tickers)}
+        for t, v in scenario(dict(zip(tickers, scores.tolist()))).items():
+            if t in index:
+                shocked[index[t]] = v
+    else:
+        shocked = scenario_multipliers({"": scenario}, tickers, groups)[0] * scores
+    return round(float(weights @ np.clip(shocked, 0.0, 1.0)), 4)
 
 class LiquidityMetrics:
     """
     Measure portfolio liquidity and simulate liquidity shocks.
-    Liquidity scores range from 0 (illiquid) to 1 (highly liquid).
+    Liquidity scores range from 0 (illiquid) to 1 (highly liquid) and are held as an array
+    aligned to the portfolio positions.
     """
 
-    def __init__(self, portfolio: Portfolio, liquidity_scores: Optional[Dict[str, float]] = None):
+    def __init__(self, portfolio: Portfolio, liquidity_scores: Optional[Dict[str, float]] = None,
+                 cache: Optional[ResultCache] = None):
         """
         :param portfolio: Portfolio object
         :param liquidity_scores: Optional dict of ticker -> liquidity score
+        :param cache: Optional ResultCache; scenarios seen before with the same weights and scores are reused
         """
         self.portfolio = portfolio
-        self.scores = {t: 0.5 for t in self.portfolio.tickers}
+        self.cache = cache
+        self.score_array = np.full(len(self.portfolio.tickers), 0.5)
         if liquidity_scores:
-            for t, v in liquidity_scores.items():
-                if t in self.scores:
-                    self.scores[t] = max(0.0, min(1.0, v))  
+            self.set_liquidity_scores(liquidity_scores)
         self.scenario_results: Dict[str, float] = {}
+        self.scenario_timings: Dict[str, float] = {}
+
+    @property
+    def scores(self) -> Mapping[str, float]:
+        """
+        Read-only ticker -> liquidity score view; item assignment raises TypeError.
+        Change scores with set_liquidity_scores or by assigning a dict to `scores`.
+        """
+        return MappingProxyType(dict(zip(self.portfolio.tickers, self.score_array.tolist())))
+
+    @scores.setter
+    def scores(self, scores: Dict[str, float]):
+        self.set_liquidity_scores(scores)
 
     def set_liquidity_scores(self, scores: Dict[str, float]):
         """
-        Update liquidity scores
+        Update liquidity scores; tickers not in the portfolio are ignored and values are clipped to [0, 1].
         """
-        for t, v in scores.items():
-            if t in self.scores:
-                self.scores[t] = max(0.0, min(1.0, v))
+        index = self.portfolio.ticker_index
+        known = [(index[t], v) for t, v in scores.items() if t in index]
+        if known:
+            positions, values = zip(*known)
+            self.score_array[list(positions)] = np.clip(values, 0.0, 1.0)
 
     def portfolio_liquidity(self) -> float:
         """
         Compute weighted average liquidity of the portfolio
         """
-        total_liq = sum(self.portfolio.weights[i] * self.scores[t] 
-                        for i, t in enumerate(self.portfolio.tickers))
-        return round(total_liq, 4)
+        return round(float(self.portfolio.weights @ self.score_array), 4)
 
+    @timed()
     def apply_scenario(self, name: str, shocks: Dict[str, float]) -> float:
         """
         Apply liquidity shock scenario and compute new portfolio liquidity.
@@ -45,21 +83,61 @@ class LiquidityMetrics:
         :param shocks: Dict mapping ticker or AssetType to shock percentage (negative for drop)
         :return: portfolio liquidity under scenario
         """
-        scenario_scores = self.scores.copy()
-
-        for key, shock in shocks.items():
-            if key in scenario_scores:
-                scenario_scores[key] = max(0.0, min(1.0, scenario_scores[key] * (1 + shock)))
-            else:
-                indices = [i for i, t in enumerate(self.portfolio.asset_types) if t == key]
-                for i in indices:
-                    ticker = self.portfolio.tickers[i]
-                    scenario_scores[ticker] = max(0.0, min(1.0, scenario_scores[ticker] * (1 + shock)))
-
-        total_liq = sum(self.portfolio.weights[i] * scenario_scores[t] 
-                        for i, t in enumerate(self.portfolio.tickers))
-        self.scenario_results[name] = round(total_liq, 4)
-        return self.scenario_results[name]
+        return self.apply_scenarios({name: shocks})[name]
+
+    @timed()
+    def apply_scenarios(self, scenarios: Dict[str, Dict[str, float]], chunk_size: int = 256) -> Dict[str, float]:
+        """
+        Apply many liquidity shock scenarios at once.
+        Each scenario is a row of multipliers (1 + shock); shocks hitting the same position compound,
+        and the shocked scores are clipped to [0, 1] before one matrix-vector product with the weights.
+        :param scenarios: Dict mapping scenario name to a shocks dict (see apply_scenario)
+        :param chunk_size: Scenarios evaluated per block, bounding the scenarios x assets matrix
+        :return: Dict of scenario name -> portfolio liquidity
+        """
+        names = list(scenarios)
+        keys: Dict[str, str] = {}
+        if self.cache is not None:
+            base_key = fingerprint("LiquidityMetrics", portfolio_fingerprint(self.portfolio), self.score_array)
+            pending = []
+            for name in names:
+                keys[name] = fingerprint(base_key, scenarios[name])
+                cached = self.cache.get(keys[name])
+                if cached is None:
+                    pending.append(name)
+                else:
+                    self.scenario_results[name] = cached
+            names = pending
+        groups = self.portfolio.group_positions()
+        for start in range(0, len(names), chunk_size):
+            block = {name: scenarios[name] for name in names[start:start + chunk_size]}
+            multipliers = scenario_multipliers(block, self.portfolio.tickers, groups)
+            shocked = np.clip(multipliers * self.score_array, 0.0, 1.0)
+            liquidity = np.round(shocked @ self.portfolio.weights, 4)
+            self.scenario_results.update(zip(block, liquidity.tolist()))
+        for name in names:
+            if name in keys:
+                self.cache.set(keys[name], self.scenario_results[name]) # type: ignore
+        return {name: self.scenario_results[name] for name in scenarios}
+
+    @timed()
+    def run_scenarios(self, scenarios: Dict[str, Union[Dict[str, float], LiquidityScenarioFunc]],
+                      workers: Optional[int] = None, backend: str = "process") -> Dict[str, float]:
+        """
+        Run liquidity scenarios one per task on a process or thread pool.
+        The base scores are sent to each worker once. Results keep the order of `scenarios`; per-scenario wall times are stored in scenario_timings.
+        :param scenarios: Dict mapping scenario name to a shocks dict (see apply_scenario) or to a
+                          picklable function taking the ticker -> score dict and returning shocked scores
+        :param workers: Pool size; 1 runs everything in the calling thread
+        :param backend: 'process' or 'thread'
+        :return: Dict of scenario name -> portfolio liquidity
+        """
+        context = (self.portfolio.tickers, self.portfolio.group_positions(), self.portfolio.weights, self.score_array)
+        outcomes = run_parallel(_liquidity_task, list(scenarios.values()), context, workers, backend)
+        for name, (liquidity, seconds) in zip(scenarios, outcomes):
+            self.scenario_results[name] = liquidity
+            self.scenario_timings[name] = seconds
+        return {name: self.scenario_results[name] for name in scenarios}
 
     def summary(self) -> pd.DataFrame:
         """
@@ -0,0 +1,144 @@
+# src/monte_carlo.py
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Dict, Optional
+from portfolio import Portfolio
+from risk_metrics import level_label, format_metric, tail_probability
+
+def _cholesky(cov: np.ndarray) -> np.ndarray:
+    """
+    Lower-triangular factor L with L @ L.T == cov.
+    Falls back to a symmetric square root for singular (positive semi-definite) matrices.
+    """
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(cov)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+def _simulate_chunk(task: tuple) -> tuple:
+    """
+    Draw one chunk of correlated scenarios and reduce it to portfolio tail statistics.
+    Runs in worker processes, so it only takes plain arrays.
+    :return: (ascending lowest `keep` portfolio returns, chunk VaR, chunk CVaR)
+    """
+    seed_seq, rows, loading, mean_return, keep, tail_fraction = task
+    rng = np.random.default_rng(seed_seq)
+    # Correlated asset draws are mean + L @ z; the portfolio only needs their projection on the weights.
+    portfolio_returns = mean_return + rng.standard_normal((rows, loading.size)) @ loading
+
+    threshold = np.percentile(portfolio_returns, tail_fraction * 100)
+    tail_mean = portfolio_returns[portfolio_returns <= threshold].mean()
+
+    keep = min(keep, rows)
+    lowest = np.partition(portfolio_returns, keep - 1)[:keep] if keep < rows else portfolio_returns
+    return np.sort(lowest), -threshold, -tail_mean
+
+class MonteCarloVaR:
+    """
+    Monte Carlo VaR/CVaR for a Portfolio.
+    Fits a multivariate normal (mean, covariance) to historical returns and draws correlated
+    scenarios through a Cholesky factor, in memory-bounded chunks spread over a process pool.
+    Every chunk has its own SeedSequence stream, so results depend on the seed but not on the worker count.
+    """
+
+    def __init__(self, portfolio: Portfolio, returns: pd.DataFrame, n_paths: int = 100_000,
+                 chunk_size: Optional[int] = None, workers: int = 1, seed: Optional[int] = None,
+                 max_chunk_bytes: int = 64 * 2**20):
+        """
+        :param portfolio: Portfolio object
+        :param returns: Historical returns DataFrame (columns aligned to portfolio tickers)
+        :param n_paths: Number of simulated paths
+        :param chunk_size: Paths per chunk; defaults to what fits in max_chunk_bytes
+        :param workers: Number of worker processes (1 runs in-process)
+        :param seed: Seed for the root SeedSequence
+        :param max_chunk_bytes: Memory budget for one chunk of asset draws
+        """
+        self.portfolio = portfolio
+        self.returns = returns
+        self.n_paths = n_paths
+        self.workers = workers
+        self.seed = seed
+        n_assets = returns.shape[1]
+        self.chunk_size = chunk_size or max(1, min(n_paths, max_chunk_bytes // (8 * n_assets)))
+
+        self.mean = returns.mean().to_numpy()
+        self.cov_matrix = returns.cov().to_numpy()
+        self.metrics: dict = {}
+        self.formatted_metrics: dict = {}
+
+    def simulate(self, confidence: float = 0.95, ci_level: float = 0.95) -> Dict[str, float]:
+        """
+        Run the simulation and compute VaR and CVaR with batch-means confidence intervals.
+        With a single chunk there are no batch means, so the intervals use the normal approximation of the
+        sample quantile (density of the fitted normal at the threshold) and of the tail mean.
+        :param confidence: VaR/CVaR confidence level
+        :param ci_level: Confidence level of the interval around each estimate
+        :return: Dict with e.g. 'VaR_95', 'VaR_95_low', 'VaR_95_high' and the CVaR equivalents
+        """
+        weights = np.asarray(self.portfolio.weights, dtype=float)
+        loading = _cholesky(self.cov_matrix).T @ weights
+        mean_return = float(self.mean @ weights)
+
+        tail_fraction = tail_probability(confidence)
+        keep = int(np.floor(tail_fraction * (self.n_paths - 1))) + 2
+        sizes = [min(self.chunk_size, self.n_paths - start) for start in range(0, self.n_paths, self.chunk_size)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        tasks = [(s, rows, loading, mean_return, keep, tail_fraction) for s, rows in zip(seeds, sizes)]
+
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                chunks = list(executor.map(_simulate_chunk, tasks))
+        else:
+            chunks = [_simulate_chunk(task) for task in tasks]
+
+        tail = np.sort(np.concatenate([lowest for lowest, _, _ in chunks]))[:keep]
+        # The global order statistics needed for the percentile all sit in the merged lowest values.
+        position = tail_fraction * (self.n_paths - 1)
+        lower = int(np.floor(position))
+        frac = position - lower
+        below, above = tail[lower], tail[min(lower + 1, keep - 1)]
+        threshold = float(above - (above - below) * (1 - frac) if frac >= 0.5 else below + (above - below) * frac)
+        count = np.searchsorted(tail, threshold, side="right")
+        var, cvar = -threshold, -tail[:count].mean()
+
+        if len(chunks) > 1:
+            errors = [np.std([c[i] for c in chunks], ddof=1) / np.sqrt(len(chunks)) for i in (1, 2)]
+        else:
+            sigma = float(np.sqrt(loading @ loading))
+            density = NormalDist(mean_return, sigma).pdf(threshold) if sigma > 0 else np.inf
+            tail_values = tail[:count]
+            errors = [np.sqrt(tail_fraction * (1 - tail_fraction) / self.n_paths) / density,
+                      np.sqrt((tail_values.var() + (1 - tail_fraction) * (tail_values.mean() - threshold) ** 2)
+                              / (self.n_paths * tail_fraction))]
+
+        z = NormalDist().inv_cdf(0.5 + ci_level / 2)
+        label = level_label(confidence)
+        results = {}
+        for (name, estimate), error in zip(((f'VaR_{label}', var), (f'CVaR_{label}', cvar)), errors):
+            half_width = z * error
+            results[name] = float(estimate)
+            results[f'{name}_low'] = float(estimate - half_width)
+            results[f'{name}_high'] = float(estimate + half_width)
+
+        self.metrics.update(results)
+        self.formatted_metrics.update({k: format_metric(k, v) for k, v in results.items()})
+        return results
+
+    def summary(self, formatted: bool = True) -> dict:
+        """
+        Return a dictionary of simulated metrics.
+        :param formatted: True for human-readable strings (e.g., '0.36%'), False for numeric values
+        """
+        return self.formatted_metrics if formatted else self.metrics
+
+if __name__ == "__main__":
+    portfolio = Portfolio.from_csv("../data/sample_portfolio.csv")
+    np.random.seed(42)
+    returns = pd.DataFrame(np.random.normal(0, 0.01, (252, len(portfolio.tickers))), columns=portfolio.tickers)
+
+    mc = MonteCarloVaR(portfolio, returns, n_paths=1_000_000, chunk_size=100_000, workers=4, seed=7)
+    mc.simulate(confidence=0.99)
+    print(mc.summary())
@@ -0,0 +1,121 @@
+# src/online.py
+import bisect
+import numpy as np
+from typing import Iterable, Optional
+
+def sorted_quantile(ordered, q):
+    """
+    Linearly interpolated quantile of an ascending sequence, matching np.percentile.
+    :param ordered: Ascending ndarray (or list when q is a scalar)
+    :param q: Quantile in [0, 1], scalar or array
+    """
+    n = len(ordered)
+    position = np.asarray(q, dtype=float) * (n - 1)
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, n - 1)
+    frac = position - lower
+    if np.ndim(position) == 0:
+        below, above = ordered[int(lower)], ordered[int(upper)]
+    else:
+        below, above = ordered[lower], ordered[upper]
+    return np.where(frac >= 0.5,
+                    above - (above - below) * (1 - frac),
+                    below + (above - below) * frac)
+
+class OnlineCovariance:
+    """
+    Running mean and covariance of asset returns, updated one row at a time.
+    Equal weighting uses Welford's algorithm and supports removing rows for rolling windows;
+    with a halflife, rows are exponentially weighted instead.
+    """
+
+    def __init__(self, n_assets: int, halflife: Optional[float] = None):
+        """
+        :param n_assets: Number of assets (columns)
+        :param halflife: Optional halflife in rows for exponential weighting
+        """
+        self.count = 0
+        self.mean = np.zeros(n_assets)
+        self.m2 = np.zeros((n_assets, n_assets))
+        self.alpha = None if halflife is None else 1 - 0.5 ** (1 / halflife)
+
+    def add(self, row: np.ndarray):
+        """Add one row of returns in O(N^2)."""
+        self.count += 1
+        delta = row - self.mean
+        if self.alpha is None:
+            self.mean += delta / self.count
+            self.m2 += np.outer(delta, row - self.mean)
+        elif self.count == 1:
+            self.mean = row.astype(float)
+        else:
+            self.mean += self.alpha * delta
+            self.m2 = (1 - self.alpha) * (self.m2 + self.alpha * np.outer(delta, delta))
+
+    def add_rows(self, rows: np.ndarray):
+        """Add a block of rows; equal-weighted blocks are merged in one step (Chan et al.)."""
+        if self.alpha is not None:
+            for row in rows:
+                self.add(row)
+            return
+        n_block = len(rows)
+        if n_block == 0:
+            return
+        block_mean = rows.mean(axis=0)
+        centered = rows - block_mean
+        total = self.count + n_block
+        delta = block_mean - self.mean
+        self.m2 += centered.T @ centered + np.outer(delta, delta) * self.count * n_block / total
+        self.mean += delta * n_block / total
+        self.count = total
+
+    def remove(self, row: np.ndarray):
+        """Remove a previously added row (equal weighting only), reversing Welford's update."""
+        if self.alpha is not None:
+            raise ValueError("Rows cannot be removed from an exponentially weighted covariance.")
+        if self.count <= 1:
+            self.count = 0
+            self.mean[:] = 0.0
+            self.m2[:] = 0.0
+            return
+        self.count -= 1
+        old_mean = self.mean - (row - self.mean) / self.count
+        self.m2 -= np.outer(row - old_mean, row - self.mean)
+        self.mean = old_mean
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance (ddof=1), or the exponentially weighted covariance."""
+        if self.alpha is not None:
+            return self.m2
+        if self.count < 2:
+            return np.full_like(self.m2, np.nan)
+        return self.m2 / (self.count - 1)
+
+class RollingQuantile:
+    """
+    Sorted buffer of portfolio returns supporting inserts, removals and tail statistics.
+    Lookups are O(log T); inserts and removals shift a Python list of floats.
+    """
+
+    def __init__(self, values: Iterable[float] = ()):
+        self._sorted = sorted(float(v) for v in values)
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def add(self, value: float):
+        bisect.insort(self._sorted, float(value))
+
+    def remove(self, value: float):
+        i = bisect.bisect_left(self._sorted, float(value))
+        if i < len(self._sorted) and self._sorted[i] == value:
+            del self._sorted[i]
+
+    def quantile(self, q: float) -> float:
+        """Quantile in [0, 1], interpolated like np.percentile."""
+        return float(sorted_quantile(self._sorted, q))
+
+    def tail_mean(self, threshold: float) -> float:
+        """Mean of all values at or below threshold."""
+        count = bisect.bisect_right(self._sorted, threshold)
+        return sum(self._sorted[:count]) / count if count else float("nan")
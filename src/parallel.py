@@ -0,0 +1,114 @@
+# src/parallel.py
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+BACKENDS = ("process", "thread")
+
+# Shared-memory blocks already attached in this worker process, keyed by block name.
+_ATTACHED: Dict[str, Tuple[SharedMemory, np.ndarray]] = {}
+
+class SharedArraySpec:
+    """
+    Picklable handle to an array in shared memory; workers attach to it instead of receiving a copy.
+    """
+
+    def __init__(self, name: str, shape: tuple, dtype: str):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    def attach(self) -> np.ndarray:
+        """Map the shared block into this process (once per process) and return a read-only view."""
+        if self.name not in _ATTACHED:
+            shm = SharedMemory(name=self.name)
+            array = np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+            array.flags.writeable = False
+            _ATTACHED[self.name] = (shm, array)
+        return _ATTACHED[self.name][1]
+
+@contextmanager
+def shared(array: Any, backend: str) -> Iterator[Any]:
+    """
+    Make an array available to workers without per-task pickling.
+    Threads share the object directly; processes get a SharedArraySpec backed by shared memory.
+    Objects that are not ndarrays (e.g. a file-backed ReturnsStore) are passed through unchanged.
+    """
+    if backend == "thread" or not isinstance(array, np.ndarray):
+        yield array
+        return
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    try:
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        yield SharedArraySpec(shm.name, array.shape, array.dtype.str)
+    finally:
+        shm.close()
+        shm.unlink()
+
+def resolve(source: Any) -> Any:
+    """Turn a SharedArraySpec back into an array inside a worker; anything else is returned as-is."""
+    return source.attach() if isinstance(source, SharedArraySpec) else source
+
+# Context shared by every task, installed once per worker process by the pool initializer.
+_CONTEXT: Any = None
+
+def _init_worker(context: Any):
+    global _CONTEXT
+    _CONTEXT = context
+
+def _timed(func: Callable, context: Any, task: Any) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = func(context, task)
+    return result, time.perf_counter() - start
+
+def _timed_in_worker(item: Tuple[Callable, Any]) -> Tuple[Any, float]:
+    func, task = item
+    return _timed(func, _CONTEXT, task)
+
+def run_parallel(func: Callable, tasks: Sequence[Any], context: Any = None, workers: Optional[int] = None,
+                 backend: str = "process") -> List[Tuple[Any, float]]:
+    """
+    Run func(context, task) for every task on a process or thread pool.
+    The context is sent to each worker process once, not with every task.
+    :param func: Module-level function (must be picklable for the process backend)
+    :param tasks: Task arguments, one per call
+    :param context: Arguments shared by all tasks (e.g. SharedArraySpec handles)
+    :param workers: Pool size; None lets the executor choose, 1 runs in the calling thread
+    :param backend: 'process' or 'thread'
+    :return: (result, seconds) per task, in task order
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}.")
+    if workers == 1 or len(tasks) <= 1:
+        return [_timed(func, context, task) for task in tasks]
+    if backend == "thread":
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda task: _timed(func, context, task), tasks))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(context,)) as executor:
+        return list(executor.map(_timed_in_worker, [(func, task) for task in tasks]))
+
+def iter_parallel(func: Callable, tasks: Sequence[Any], context: Any = None, workers: Optional[int] = None,
+                  backend: str = "process") -> Iterator[Tuple[int, Any, float]]:
+    """
+    Like run_parallel, but yield (task position, result, seconds) as soon as each task finishes,
+    so callers can checkpoint progress while the pool is still running.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}.")
+    if workers == 1 or len(tasks) <= 1:
+        for position, task in enumerate(tasks):
+            yield (position,) + _timed(func, context, task)
+        return
+    if backend == "thread":
+        executor = ThreadPoolExecutor(max_workers=workers)
+        submit = lambda task: executor.submit(_timed, func, context, task)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(context,))
+        submit = lambda task: executor.submit(_timed_in_worker, (func, task))
+    with executor:
+        futures = {submit(task): position for position, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            yield (futures[future],) + future.result()
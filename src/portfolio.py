@@ -1,66 +1,207 @@
 # src/portfolio.py
+import glob
+import os
+import numpy as np
 import pandas as pd
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+from instrumentation import timed
+
+# Explicit dtypes for the holdings columns, so readers skip type inference.
+COLUMN_DTYPES = {"Ticker": str, "Allocation": np.float64, "Weight": np.float64, "AssetType": "category"}
+
+# File suffix -> holdings format, used by read_holdings and load_holdings.
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet",
+           ".feather": "feather", ".arrow": "feather", ".json": "json"}
+
+def _index_codes(codes: np.ndarray, labels: Sequence) -> Dict[str, np.ndarray]:
+    """Map each label to the positions of its integer code."""
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+    return {label: order[bounds[i]:bounds[i + 1]] for i, label in enumerate(labels)}
+
+def build_group_index(labels: Sequence) -> Dict[str, np.ndarray]:
+    """
+    Map each distinct label to the integer positions where it occurs, in first-seen order.
+    """
+    codes, uniques = pd.factorize(pd.Series(labels, dtype=object), sort=False)
+    return _index_codes(codes, uniques)
+
+def _projection(columns: Optional[List[str]], group_columns: Optional[List[str]]) -> Optional[List[str]]:
+    """Columns to read: the requested ones plus the group columns, or None for all."""
+    if columns is None:
+        return None
+    return list(dict.fromkeys(list(columns) + list(group_columns or [])))
+
+def read_holdings(path: str, columns: Optional[List[str]] = None, fmt: Optional[str] = None) -> pd.DataFrame:
+    """
+    Read a raw holdings file with explicit dtypes and optional column projection.
+    Column names are stripped and 'Allocation' is renamed to 'Weight'; weights are not normalized.
+    :param columns: Optional column names to read (matched after stripping whitespace)
+    :param fmt: 'csv', 'parquet', 'feather' or 'json'; defaults to the file suffix
+    """
+    if fmt is None:
+        suffix = os.path.splitext(str(path))[1].lower()
+        if suffix not in FORMATS:
+            raise ValueError(f"Unsupported portfolio file type '{suffix}'; expected one of {sorted(FORMATS)}.")
+        fmt = FORMATS[suffix]
+
+    if fmt == "csv":
+        usecols = None if columns is None else (lambda col: col.strip() in columns)
+        df = pd.read_csv(path, dtype=COLUMN_DTYPES, usecols=usecols) # type: ignore
+    elif fmt == "parquet":
+        df = pd.read_parquet(path, columns=columns)
+    elif fmt == "feather":
+        df = pd.read_feather(path, columns=columns)
+    elif fmt == "json":
+        df = pd.read_json(path, orient="records", dtype=COLUMN_DTYPES) # type: ignore
+        if columns is not None:
+            df = df[[c for c in df.columns if str(c).strip() in columns]]
+    else:
+        raise ValueError(f"Unknown holdings format '{fmt}'.")
+
+    # The frame is freshly read, so the columns can be relabelled in place without a copy.
+    df.columns = ["Weight" if name == "Allocation" else name for name in (str(col).strip() for col in df.columns)]
+    return df
 
 class Portfolio:
     """
     Portfolio class for loading, normalizing, and summarizing financial portfolios.
     Works with CSVs using 'Ticker' and 'Allocation' as weight.
+    Weights are a contiguous float64 array and asset types are categorical codes,
+    so downstream modules work on arrays without converting back and forth.
     """
 
-    def __init__(self, data: Optional[pd.DataFrame] = None):
+    def __init__(self, data: Optional[pd.DataFrame] = None, group_columns: Optional[List[str]] = None):
         """
         Initialize a Portfolio object.
         :param data: Optional DataFrame containing portfolio data
+        :param group_columns: Optional extra columns (e.g. Sector, Country) usable as scenario shock keys
         """
         self.data = data
         self.tickers: List[str] = []
-        self.weights: List[float] = []
-        self.asset_types: List[str] = []
+        self.ticker_index: Dict[str, int] = {}
+        self.weights: np.ndarray = np.empty(0)
+        self.asset_types: pd.Categorical = pd.Categorical([])
+        self.asset_type_codes: np.ndarray = np.empty(0, dtype=np.int8)
+        self.group_columns: List[str] = list(group_columns or [])
+        self.groups: Dict[str, Dict[str, np.ndarray]] = {}
 
     @classmethod
-    def from_csv(cls, path: str) -> "Portfolio":
+    @timed()
+    def from_frame(cls, df: pd.DataFrame, group_columns: Optional[List[str]] = None) -> "Portfolio":
         """
-        Load portfolio from a CSV file.
-        CSV should have columns: Ticker, Allocation (used as Weight), AssetType (optional)
+        Build a normalized portfolio from a raw holdings DataFrame.
+        Column names are stripped and 'Allocation' is used as 'Weight'.
         """
-        df = pd.read_csv(path)
-
-        df.columns = [col.strip() for col in df.columns]
-
+        df = df.rename(columns=lambda col: str(col).strip())
         if "Allocation" in df.columns:
             df = df.rename(columns={"Allocation": "Weight"})
 
-        portfolio = cls(df)
+        portfolio = cls(df, group_columns)
         portfolio._normalize()
         return portfolio
 
+    @classmethod
+    @timed()
+    def from_csv(cls, path: str, group_columns: Optional[List[str]] = None,
+                 columns: Optional[List[str]] = None) -> "Portfolio":
+        """
+        Load portfolio from a CSV file.
+        CSV should have columns: Ticker, Allocation (used as Weight), AssetType (optional)
+        :param group_columns: Optional extra columns (e.g. Sector, Country) usable as scenario shock keys
+        :param columns: Optional columns to read (e.g. ['Ticker', 'Allocation']); others are skipped while parsing
+        """
+        return cls.from_frame(read_holdings(path, _projection(columns, group_columns), "csv"), group_columns)
+
+    @classmethod
+    @timed()
+    def from_parquet(cls, path: str, group_columns: Optional[List[str]] = None,
+                     columns: Optional[List[str]] = None) -> "Portfolio":
+        """
+        Load portfolio from a Parquet file (requires pyarrow or fastparquet).
+        :param columns: Optional columns to read; only these column chunks are decoded
+        """
+        return cls.from_frame(read_holdings(path, _projection(columns, group_columns), "parquet"), group_columns)
+
+    @classmethod
+    @timed()
+    def from_feather(cls, path: str, group_columns: Optional[List[str]] = None,
+                     columns: Optional[List[str]] = None) -> "Portfolio":
+        """
+        Load portfolio from a Feather / Arrow IPC file (requires pyarrow).
+        :param columns: Optional columns to read
+        """
+        return cls.from_frame(read_holdings(path, _projection(columns, group_columns), "feather"), group_columns)
+
+    @classmethod
+    @timed()
+    def from_json(cls, path: str, group_columns: Optional[List[str]] = None,
+                  columns: Optional[List[str]] = None) -> "Portfolio":
+        """
+        Load portfolio from a JSON file of records, e.g. [{"Ticker": "AAPL", "Allocation": 0.2}, ...].
+        :param columns: Optional columns to keep
+        """
+        return cls.from_frame(read_holdings(path, _projection(columns, group_columns), "json"), group_columns)
+
+    @classmethod
+    @timed()
+    def from_file(cls, path: str, group_columns: Optional[List[str]] = None,
+                  columns: Optional[List[str]] = None) -> "Portfolio":
+        """
+        Load portfolio from any supported file, chosen by suffix (.csv, .parquet, .feather, .arrow, .json).
+        """
+        return cls.from_frame(read_holdings(path, _projection(columns, group_columns)), group_columns)
+
     def _normalize(self):
         """
         Normalize portfolio data: 
         - Strip whitespace
         - Fill missing asset types as 'Unknown'
         - Ensure weights sum to 1
+        - Index positions by AssetType and any extra group columns
         """
         if self.data is None:
             raise ValueError("Portfolio data is not loaded.")
 
         if "AssetType" not in self.data.columns:
-            self.data["AssetType"] = "Unknown"
-        else:
-            self.data["AssetType"] = self.data["AssetType"].fillna("Unknown")
+            self.data["AssetType"] = pd.Categorical(["Unknown"] * len(self.data))
+        elif self.data["AssetType"].isna().any() or not isinstance(self.data["AssetType"].dtype, pd.CategoricalDtype):
+            self.data["AssetType"] = self.data["AssetType"].astype(object).fillna("Unknown").astype("category")
 
         if "Weight" not in self.data.columns:
             raise ValueError("Portfolio CSV must have a 'Weight' or 'Allocation' column.")
 
-        total_weight = self.data["Weight"].sum()
+        weights = self.data["Weight"].to_numpy(dtype=np.float64)
+        total_weight = weights.sum()
         if total_weight == 0:
             raise ValueError("Total weight of portfolio is zero.")
-        self.data["Weight"] = self.data["Weight"] / total_weight
+        self.weights = np.ascontiguousarray(weights / total_weight)
+        self.data["Weight"] = self.weights
 
         self.tickers = self.data["Ticker"].tolist()
-        self.weights = self.data["Weight"].tolist()
-        self.asset_types = self.data["AssetType"].tolist()
+        self.ticker_index = {t: i for i, t in enumerate(self.tickers)}
+        self.asset_types = self.data["AssetType"].array
+        self.asset_type_codes = self.asset_types.codes
+
+        missing = [c for c in self.group_columns if c not in self.data.columns]
+        if missing:
+            raise ValueError(f"Portfolio data has no group column(s): {missing}")
+        self.groups = {"AssetType": _index_codes(self.asset_type_codes, list(self.asset_types.categories))}
+        for column in self.group_columns:
+            if column != "AssetType":
+                self.groups[column] = build_group_index(self.data[column].fillna("Unknown"))
+
+    def group_positions(self) -> Dict[str, np.ndarray]:
+        """
+        Flatten the group indexes into label -> positions, AssetType first; used to resolve shock keys.
+        When a label appears in several columns, the earlier column wins.
+        """
+        positions: Dict[str, np.ndarray] = {}
+        for index in self.groups.values():
+            for label, idx in index.items():
+                positions.setdefault(label, idx)
+        return positions
 
     def summary(self) -> pd.DataFrame:
         """
@@ -71,7 +212,55 @@ class Portfolio:
         return self.data.copy()
 
     def __repr__(self):
-        return f"<Portfolio: {len(self.tickers)} assets, Total Weight: {sum(self.weights):.2f}>"
+        return f"<Portfolio: {len(self.tickers)} assets, Total Weight: {np.sum(self.weights):.2f}>"
+
+def holdings_files(source: Union[str, Iterable[str]]) -> List[str]:
+    """
+    Expand a directory, glob pattern or list of paths into sorted holdings files of supported types.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        source = str(source)
+        pattern = os.path.join(source, "*") if os.path.isdir(source) else source
+        paths = glob.glob(pattern)
+    else:
+        paths = [str(p) for p in source]
+    return sorted(p for p in paths if os.path.splitext(p)[1].lower() in FORMATS)
+
+def book_ids(paths: List[str]) -> List[str]:
+    """
+    Book id of each holdings file: its path relative to the files' common directory, without suffix
+    (e.g. 'a/fund'), with '/' separators.
+    :raises ValueError: If two files map to the same id (e.g. 'fund.csv' and 'fund.json')
+    """
+    absolute = [os.path.abspath(p) for p in paths]
+    root = os.path.commonpath(absolute) if len(absolute) > 1 else os.path.dirname(absolute[0])
+    ids = [os.path.splitext(os.path.relpath(a, root))[0].replace(os.sep, "/") for a in absolute]
+    seen: Dict[str, str] = {}
+    for path, book in zip(paths, ids):
+        if book in seen:
+            raise ValueError(f"Portfolio files {seen[book]} and {path} map to the same book id '{book}'.")
+        seen[book] = path
+    return ids
+
+def load_holdings(source: Union[str, Iterable[str]], workers: Optional[int] = None,
+                  columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read many holdings files concurrently on a thread pool and stack them into one long frame.
+    Files are read raw (no per-file Portfolio), so the per-file cost is just the parse.
+    :param source: Directory, glob pattern (e.g. 'holdings/*.parquet') or list of paths
+    :param workers: Thread pool size; None lets the executor choose
+    :param columns: Optional column projection passed to every reader
+    :return: DataFrame with a leading 'Portfolio' column (the book_ids of the files), in sorted path order
+    """
+    paths = holdings_files(source)
+    if not paths:
+        raise ValueError(f"No portfolio files found for {source!r}.")
+    names = book_ids(paths)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        frames = list(executor.map(lambda p: read_holdings(p, columns), paths))
+    holdings = pd.concat(frames, ignore_index=True)
+    holdings.insert(0, "Portfolio", np.repeat(names, [len(f) for f in frames]))
+    return holdings
 
 if __name__ == "__main__":
     portfolio = Portfolio.from_csv("../data/sample_portfolio.csv")
@@ -1,17 +1,24 @@
 # src/report.py
 import os
+import threading
+import numpy as np
 import pandas as pd
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 from portfolio import Portfolio
 from risk_metrics import RiskMetrics
 from stress_test import StressTest
 from liquidity import LiquidityMetrics
 from risk_matrix import RiskMatrix
+from instrumentation import timed
 
 class Report:
     """
     Generate combined reports for RiskLab.
-    Supports CSV and Excel export into a dedicated 'reports/' folder.
+    Supports CSV, Parquet, Feather and Excel export into a dedicated 'reports/' folder.
+    Sections are nodes of a small DAG (NODES) evaluated lazily, so only the requested sections and
+    their inputs are computed. Pass the RiskMetrics to the StressTest before running scenarios
+    (StressTest(..., risk_metrics=...)) so both use one covariance matrix.
     """
 
     def __init__(
@@ -32,89 +39,259 @@ class Report:
         self.output_dir = output_dir
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def generate_summary_tables(self) -> dict:
+        self._nodes: Dict[str, Any] = {}
+        self._node_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    TABLES = ("Portfolio", "RiskMetrics", "StressTest", "Liquidity", "RiskMatrix")
+
+    # Report DAG: node -> (input nodes, builder). Builders receive their inputs positionally.
+    # 'metrics' is the shared intermediate; the TABLES are the sections. It only touches the covariance
+    # and return series when RiskMetrics has no metrics yet (e.g. a ResultCache hit fills them without either).
+    # StressTest and Liquidity only read stored scenario results, so they need no intermediates.
+    NODES: Dict[str, Tuple[Tuple[str, ...], str]] = {
+        "metrics": ((), "_build_metrics"),
+        "Portfolio": ((), "_build_portfolio"),
+        "RiskMetrics": (("metrics",), "_build_risk_metrics"),
+        "StressTest": ((), "_build_stress_test"),
+        "Liquidity": ((), "_build_liquidity"),
+        "RiskMatrix": (("metrics",), "_build_risk_matrix"),
+    }
+
+    def plan(self, sections: Optional[Sequence[str]] = None) -> List[str]:
         """
-        Returns a dictionary of all summary tables as DataFrames.
-        Empty tables are replaced with a notice.
+        Nodes needed for the requested sections, in evaluation order (inputs first).
+        :param sections: Table names (see TABLES); None for all
         """
-        tables = {}
+        order: List[str] = []
+
+        def visit(name: str):
+            if name in order:
+                return
+            for dependency in self.NODES[name][0]:
+                visit(dependency)
+            order.append(name)
+
+        for name in self._sections(sections):
+            visit(name)
+        return order
+
+    def _sections(self, sections: Optional[Sequence[str]]) -> Tuple[str, ...]:
+        if sections is None:
+            return self.TABLES
+        unknown = [name for name in sections if name not in self.TABLES]
+        if unknown:
+            raise ValueError(f"Unknown section(s) {unknown}; expected any of {self.TABLES}.")
+        return tuple(sections)
+
+    def _lock(self, name: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._node_locks.setdefault(name, threading.Lock())
+
+    def _evaluate(self, name: str, memoize: bool = True) -> Any:
+        """Evaluate a node once its inputs are available; concurrent callers of one node wait for a single evaluation."""
+        if name in self._nodes:
+            return self._nodes[name]
+        dependencies, builder = self.NODES[name]
+        inputs = [self.node(dependency) for dependency in dependencies]
+        if not memoize:
+            return getattr(self, builder)(*inputs)
+        with self._lock(name):
+            if name not in self._nodes:
+                self._nodes[name] = getattr(self, builder)(*inputs)
+        return self._nodes[name]
+
+    def node(self, name: str) -> Any:
+        """Value of a report node (see NODES), computed on first use and memoized."""
+        if name not in self.NODES:
+            raise ValueError(f"Unknown report node '{name}'; expected one of {list(self.NODES)}.")
+        return self._evaluate(name)
+
+    def invalidate(self):
+        """Forget memoized nodes, e.g. after running more scenarios on the attached modules."""
+        self._nodes.clear()
 
-        tables["Portfolio"] = self.portfolio.data.copy() if not self.portfolio.data.empty else pd.DataFrame({"Notice": ["No portfolio data"]}) # type: ignore
+    def _build_metrics(self) -> dict:
+        """Numeric risk metrics, computed only if RiskMetrics has none yet."""
+        if not self.risk_metrics.metrics and self.risk_metrics.returns is not None:
+            self.risk_metrics._compute_all_metrics()
+        return self.risk_metrics.summary(formatted=False)
 
+    def _build_portfolio(self) -> pd.DataFrame:
+        # Writers only read the holdings, so they are not copied here; generate_table copies them for callers.
+        return self.portfolio.data if not self.portfolio.data.empty else pd.DataFrame({"Notice": ["No portfolio data"]}) # type: ignore
+
+    def _build_risk_metrics(self, metrics: dict) -> pd.DataFrame:
         rm_summary = self.risk_metrics.summary()
-        tables["RiskMetrics"] = pd.DataFrame(rm_summary, index=[0]) if rm_summary else pd.DataFrame({"Notice": ["No risk metrics computed"]})
-
-        if self.stress_test:
-            st_summary = self.stress_test.summary()
-            tables["StressTest"] = st_summary if not st_summary.empty else pd.DataFrame({"Notice": ["No stress test results"]})
-        else:
-            tables["StressTest"] = pd.DataFrame({"Notice": ["No stress test module provided"]})
-
-        if self.liquidity_metrics:
-            lm_summary = self.liquidity_metrics.summary() if self.liquidity_metrics.scenario_results else pd.DataFrame({
-                "Portfolio Liquidity": [self.liquidity_metrics.portfolio_liquidity()]
-            }, index=["Base"])
-            tables["Liquidity"] = lm_summary
-        else:
-            tables["Liquidity"] = pd.DataFrame({"Notice": ["No liquidity module provided"]})
-
-        if self.risk_matrix:
-            rm_df = self.risk_matrix.compute_matrix()
-            tables["RiskMatrix"] = rm_df if not rm_df.empty else pd.DataFrame({"Notice": ["No risk matrix computed"]})
-        else:
-            tables["RiskMatrix"] = pd.DataFrame({"Notice": ["No risk matrix module provided"]})
-
-        return tables
-
-    def generate_csv(self, filename: str):
+        return pd.DataFrame(rm_summary, index=[0]) if metrics else pd.DataFrame({"Notice": ["No risk metrics computed"]})
+
+    def _build_stress_test(self) -> pd.DataFrame:
+        if not self.stress_test:
+            return pd.DataFrame({"Notice": ["No stress test module provided"]})
+        st_summary = self.stress_test.summary()
+        return st_summary if not st_summary.empty else pd.DataFrame({"Notice": ["No stress test results"]})
+
+    def _build_liquidity(self) -> pd.DataFrame:
+        if not self.liquidity_metrics:
+            return pd.DataFrame({"Notice": ["No liquidity module provided"]})
+        return self.liquidity_metrics.summary() if self.liquidity_metrics.scenario_results else pd.DataFrame({
+            "Portfolio Liquidity": [self.liquidity_metrics.portfolio_liquidity()]
+        }, index=["Base"])
+
+    def _build_risk_matrix(self, metrics: dict) -> pd.DataFrame:
+        if not self.risk_matrix:
+            return pd.DataFrame({"Notice": ["No risk matrix module provided"]})
+        rm_df = self.risk_matrix.compute_matrix()
+        return rm_df if not rm_df.empty else pd.DataFrame({"Notice": ["No risk matrix computed"]}) # type: ignore
+
+    @timed()
+    def generate_table(self, name: str) -> pd.DataFrame:
         """
-        Export all summary tables to CSV or Excel in reports folder.
+        Build one summary table by name (see TABLES), evaluating only the nodes it depends on.
+        The table itself is not memoized, so streaming exports release it once written; its inputs are.
+        Empty tables are replaced with a notice. The Portfolio table is a copy of the holdings.
         """
-        tables = self.generate_summary_tables()
-        filepath = os.path.join(self.output_dir, filename)
+        self._sections([name])
+        table = self._evaluate(name, memoize=False)
+        return table.copy() if table is self.portfolio.data else table
+
+    def iter_tables(self, sections: Optional[Sequence[str]] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Yield (name, table) one at a time, so only one table is held in memory."""
+        for name in self._sections(sections):
+            yield name, self.generate_table(name)
 
-        sheets_written = []
-        if filepath.endswith(".csv"):
-            for name, df in tables.items():
-                out_file = filepath.replace(".csv", f"_{name}.csv")
-                df.to_csv(out_file, index=True)
-                sheets_written.append(name)
-        elif filepath.endswith(".xlsx"):
+    def generate_summary_tables(self, sections: Optional[Sequence[str]] = None) -> dict:
+        """
+        Returns a dictionary of summary tables as DataFrames.
+        Empty tables are replaced with a notice.
+        :param sections: Optional table names, e.g. ['StressTest', 'Liquidity']; only these and their inputs are computed
+        """
+        return dict(self.iter_tables(sections))
+
+    def _table_path(self, filepath: str, name: str) -> str:
+        root, ext = os.path.splitext(filepath)
+        return f"{root}_{name}{ext}"
+
+    def _write_one(self, filepath: str, fmt: str, name: str) -> str:
+        """Build one table and write it to its own file; the table is released once written."""
+        out_file = self._table_path(filepath, name)
+        write_table(self._evaluate(name, memoize=False), out_file, fmt)
+        return name
+
+    def _tasks(self, filepath: str, fmt: str, sections: Optional[Sequence[str]] = None) -> List[Tuple["Report", str, str, str]]:
+        return [(self, filepath, fmt, name) for name in self._sections(sections)]
+
+    @timed()
+    def export(self, filename: str, workers: Optional[int] = None, sections: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Export all summary tables into the reports folder, format chosen by suffix.
+        .csv, .parquet and .feather write one file per table (report_<Table>.<ext>); each table is built
+        and written by its own thread task, so tables are never all held at once.
+        .xlsx streams the tables one by one into a single workbook (falls back to CSV without openpyxl).
+        :param workers: Writer threads for per-table formats; None lets the executor choose
+        :param sections: Optional table names to export; None for all
+        :return: Names of the tables written
+        """
+        filepath = os.path.join(self.output_dir, filename)
+        fmt = os.path.splitext(filepath)[1].lower().lstrip(".")
+        if fmt == "xlsx":
             try:
                 with pd.ExcelWriter(filepath) as writer:
-                    for name, df in tables.items():
-                        df.to_excel(writer, sheet_name=name, index=True)
-                        sheets_written.append(name)
+                    for name in self._sections(sections):
+                        self._evaluate(name, memoize=False).to_excel(writer, sheet_name=name, index=True)
+                return list(self._sections(sections))
             except ModuleNotFoundError:
                 print("openpyxl not installed. Falling back to CSV export.")
-                for name, df in tables.items():
-                    out_file = filepath.replace(".xlsx", f"_{name}.csv")
-                    df.to_csv(out_file, index=True)
-                    sheets_written.append(name)
+                filepath, fmt = filepath[:-len(".xlsx")] + ".csv", "csv"
+        if fmt not in WRITERS:
+            raise ValueError(f"Unsupported report format '{fmt}'; expected xlsx or one of {sorted(WRITERS)}.")
+        return _run_writes(self._tasks(filepath, fmt, sections), workers)
+
+    @timed()
+    def generate_csv(self, filename: str, sections: Optional[Sequence[str]] = None):
+        """
+        Export summary tables to CSV or Excel in reports folder.
+        :param sections: Optional table names to export; None for all
+        """
+        filepath = os.path.join(self.output_dir, filename)
+        sheets_written = self.export(filename, sections=sections)
 
         print(f"Report exported to {filepath}")
         print("Sheets included:", ", ".join(sheets_written))
 
+    @staticmethod
+    @timed()
+    def export_batch(reports: Dict[str, "Report"], fmt: str = "parquet", workers: Optional[int] = None,
+                     sections: Optional[Sequence[str]] = None) -> Dict[str, List[str]]:
+        """
+        Export many reports in one pass: every (report, table) pair is a task on one shared thread pool,
+        so small reports don't each pay for their own pool. Files are <output_dir>/<name>_<Table>.<fmt>.
+        :param reports: Dict of report name -> Report
+        :param fmt: 'csv', 'parquet' or 'feather'
+        :param sections: Optional table names to export from every report; None for all
+        :return: Dict of report name -> table names written
+        """
+        if fmt not in WRITERS:
+            raise ValueError(f"Unsupported batch format '{fmt}'; expected one of {sorted(WRITERS)}.")
+        tasks = [task for name, report in reports.items()
+                 for task in report._tasks(os.path.join(report.output_dir, f"{name}.{fmt}"), fmt, sections)]
+        written = iter(_run_writes(tasks, workers))
+        return {name: [next(written) for _ in report._sections(sections)] for name, report in reports.items()}
+
+def _write_feather(df: pd.DataFrame, path: str):
+    # Feather needs a default index and string column names.
+    frame = df.reset_index()
+    frame.columns = [str(c) for c in frame.columns]
+    frame.to_feather(path)
+
+def _write_parquet(df: pd.DataFrame, path: str):
+    frame = df.copy(deep=False)
+    frame.columns = [str(c) for c in frame.columns]
+    frame.to_parquet(path, index=True)
+
+# Report format -> table writer.
+WRITERS: Dict[str, Callable[[pd.DataFrame, str], None]] = {
+    "csv": lambda df, path: df.to_csv(path, index=True),
+    "parquet": _write_parquet,
+    "feather": _write_feather,
+}
+
+def write_table(df: pd.DataFrame, path: str, fmt: str):
+    """Write one table as csv, parquet (pyarrow or fastparquet) or feather (pyarrow)."""
+    WRITERS[fmt](df, path)
+
+def _run_writes(tasks: List[Tuple[Report, str, str, str]], workers: Optional[int]) -> List[str]:
+    """Run (report, filepath, fmt, table) writes on a thread pool, returning table names in task order."""
+    if workers == 1 or len(tasks) <= 1:
+        return [report._write_one(path, fmt, name) for report, path, fmt, name in tasks]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda task: task[0]._write_one(*task[1:]), tasks))
+
 if __name__ == "__main__":
     import numpy as np
+    from cache import ResultCache
 
     portfolio = Portfolio.from_csv("../data/sample_portfolio.csv")
 
+    np.random.seed(42)
     returns = pd.DataFrame(np.random.normal(0, 0.01, (252, len(portfolio.tickers))), columns=portfolio.tickers)
 
-    rm = RiskMetrics(portfolio, returns)
-    rm.compute_volatility(); rm.compute_var(); rm.compute_cvar(); rm.compute_sharpe()
+    # Reruns with unchanged holdings and returns are served from the on-disk cache.
+    cache = ResultCache(path="../reports/.cache")
+
+    rm = RiskMetrics(portfolio, returns, cache=cache)
 
-    st = StressTest(portfolio, returns)
+    st = StressTest(portfolio, returns, cache=cache, risk_metrics=rm)
     st.apply_scenario("Base", {t:0.0 for t in portfolio.tickers})
     st.apply_scenario("Market Crash", {t:-0.1 for t in portfolio.tickers})
 
     scores = {t: 0.8 for t in portfolio.tickers}
-    lm = LiquidityMetrics(portfolio, scores)
+    lm = LiquidityMetrics(portfolio, scores, cache=cache)
     lm.apply_scenario("Liquidity Crunch", {"Equity": -0.2, "Bond": -0.05})
 
     likelihoods = {t: 0.1 + 0.1*np.random.rand() for t in portfolio.tickers}
-    rmat = RiskMatrix(portfolio, rm, likelihoods)
+    rmat = RiskMatrix(portfolio, rm, likelihoods, cache=cache)
 
     report = Report(portfolio, rm, st, lm, rmat)
-    report.generate_csv("RiskLab_Report.xlsx")
\ No newline at end of file
+    report.generate_csv("RiskLab_Report.xlsx")
+    print(cache)
\ No newline at end of file
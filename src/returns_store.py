@@ -0,0 +1,234 @@
+# src/returns_store.py
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import Iterator, List, Optional, Union
+
+class ReturnsStore:
+    """
+    On-disk returns panel for universes that don't fit in RAM.
+    Values live in a raw memory-mapped binary file (rows = dates, columns = tickers) and dates in an
+    append-only text file (one JSON value per line), next to a JSON index holding tickers, dtype and shape.
+    The index is replaced atomically after the data files are flushed, so it is the commit point of append():
+    bytes past the committed row count are ignored when reading and overwritten by the next append.
+    Statistics are computed in row chunks, so memory stays bounded by chunk_rows x assets.
+    """
+
+    VALUES_FILE = "values.bin"
+    DATES_FILE = "dates.jsonl"
+    INDEX_FILE = "index.json"
+
+    def __init__(self, path: str, chunk_rows: int = 50_000):
+        """
+        Open an existing store.
+        :param path: Store directory created by ReturnsStore.create or ReturnsStore.from_frame
+        :param chunk_rows: Number of rows processed per chunk by streaming computations
+        """
+        self.path = path
+        self.chunk_rows = chunk_rows
+        with open(os.path.join(path, self.INDEX_FILE)) as f:
+            meta = json.load(f)
+        self.dtype = np.dtype(meta["dtype"])
+        self.columns = pd.Index(meta["tickers"])
+        self._n_rows = int(meta["rows"])
+        self._dates_bytes = int(meta["dates_bytes"])
+        self._dates_are_datetime = bool(meta["dates_are_datetime"])
+        with open(os.path.join(path, self.DATES_FILE), "rb") as f:
+            dates = [json.loads(line) for line in f.read(self._dates_bytes).splitlines()]
+        self.index = pd.Index(pd.to_datetime(dates)) if self._dates_are_datetime else pd.Index(dates)
+
+    @classmethod
+    def create(cls, path: str, tickers: List[str], dtype: str = "float64", chunk_rows: int = 50_000) -> "ReturnsStore":
+        """
+        Create an empty store for the given tickers; fill it with append().
+        """
+        os.makedirs(path, exist_ok=True)
+        open(os.path.join(path, cls.VALUES_FILE), "wb").close()
+        open(os.path.join(path, cls.DATES_FILE), "wb").close()
+        cls._write_index(path, list(tickers), np.dtype(dtype), 0, 0, False)
+        return cls(path, chunk_rows)
+
+    @classmethod
+    def from_frame(cls, returns: pd.DataFrame, path: str, dtype: str = "float64", chunk_rows: int = 50_000) -> "ReturnsStore":
+        """
+        Write an in-memory returns DataFrame to a new store.
+        """
+        store = cls.create(path, [str(c) for c in returns.columns], dtype, chunk_rows)
+        store.append(returns)
+        return store
+
+    @staticmethod
+    def _write_index(path: str, tickers: list, dtype: np.dtype, rows: int, dates_bytes: int, dates_are_datetime: bool):
+        meta = {
+            "tickers": tickers,
+            "dates_are_datetime": dates_are_datetime,
+            "dates_bytes": dates_bytes,
+            "dtype": dtype.str,
+            "rows": rows,
+        }
+        target = os.path.join(path, ReturnsStore.INDEX_FILE)
+        with open(target + ".tmp", "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(target + ".tmp", target)
+
+    @staticmethod
+    def _append_at(filename: str, offset: int, data: bytes):
+        """Write data at offset, dropping any uncommitted tail, and flush it to disk."""
+        with open(filename, "r+b") as f:
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def append(self, rows: pd.DataFrame):
+        """
+        Append return rows to the store; columns are aligned to the store tickers.
+        Only the new rows and dates are written, so the cost does not grow with the stored history.
+        """
+        block = np.ascontiguousarray(rows.reindex(columns=self.columns).to_numpy(dtype=self.dtype))
+        is_datetime = isinstance(rows.index, pd.DatetimeIndex) or (self._n_rows > 0 and self._dates_are_datetime)
+        new_dates = [str(d) for d in rows.index] if is_datetime else rows.index.tolist()
+        lines = "".join(json.dumps(d) + "\n" for d in new_dates).encode()
+
+        row_bytes = len(self.columns) * self.dtype.itemsize
+        self._append_at(os.path.join(self.path, self.VALUES_FILE), self._n_rows * row_bytes, block.tobytes())
+        self._append_at(os.path.join(self.path, self.DATES_FILE), self._dates_bytes, lines)
+        self._write_index(self.path, self.columns.tolist(), self.dtype, self._n_rows + len(rows),
+                          self._dates_bytes + len(lines), is_datetime)
+
+        self._n_rows += len(rows)
+        self._dates_bytes += len(lines)
+        self._dates_are_datetime = is_datetime
+        new_index = pd.Index(pd.to_datetime(new_dates)) if is_datetime else pd.Index(new_dates)
+        self.index = self.index.append(new_index) if len(self.index) else new_index
+
+    @property
+    def shape(self) -> tuple:
+        return (self._n_rows, len(self.columns))
+
+    def __len__(self) -> int:
+        return self._n_rows
+
+    @property
+    def values(self) -> np.ndarray:
+        """Read-only memory map over the full panel; nothing is loaded until sliced."""
+        if self._n_rows == 0:
+            return np.empty((0, len(self.columns)), dtype=self.dtype)
+        return np.memmap(os.path.join(self.path, self.VALUES_FILE), dtype=self.dtype, mode="r", shape=self.shape)
+
+    def iter_chunks(self) -> Iterator[np.ndarray]:
+        """Yield consecutive row blocks of at most chunk_rows rows as float64 arrays."""
+        values = self.values
+        for start in range(0, self._n_rows, self.chunk_rows):
+            yield np.asarray(values[start:start + self.chunk_rows], dtype=float)
+
+    def select(self, tickers: List[str]) -> pd.DataFrame:
+        """
+        Load only the given columns, chunk by chunk, so memory is bounded by rows x len(tickers).
+        :raises KeyError: If a ticker is not in the store
+        """
+        positions = self.columns.get_indexer(tickers)
+        if (positions < 0).any():
+            raise KeyError(f"Tickers not in the store: {[t for t, i in zip(tickers, positions) if i < 0]}")
+        out = np.empty((self._n_rows, len(tickers)))
+        values = self.values
+        for start in range(0, self._n_rows, self.chunk_rows):
+            out[start:start + self.chunk_rows] = values[start:start + self.chunk_rows][:, positions]
+        return pd.DataFrame(out, index=self.index, columns=list(tickers))
+
+    def to_frame(self) -> pd.DataFrame:
+        """Load the whole panel into a DataFrame (only for panels that fit in memory)."""
+        return pd.DataFrame(np.asarray(self.values, dtype=float), index=self.index, columns=self.columns)
+
+    def portfolio_returns(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Weighted returns computed chunk by chunk; missing returns count as zero.
+        :param weights: Length-N weight vector, or K x N matrix of weight vectors
+        :return: Length-T vector, or T x K matrix for a weight matrix
+        """
+        weights = np.asarray(weights, dtype=float)
+        out = np.empty((self._n_rows,) + weights.shape[:-1])
+        start = 0
+        for chunk in self.iter_chunks():
+            out[start:start + len(chunk)] = np.nan_to_num(chunk) @ weights.T
+            start += len(chunk)
+        return out
+
+    def cov(self) -> pd.DataFrame:
+        """
+        Streaming sample covariance with pandas' pairwise handling of missing values.
+        Each column is shifted by its first-chunk mean to keep the sums well conditioned.
+        """
+        n = len(self.columns)
+        shift: Optional[np.ndarray] = None
+        sum_xx = np.zeros((n, n))
+        sum_x_mask = np.zeros((n, n))
+        pair_counts = np.zeros((n, n))
+
+        for chunk in self.iter_chunks():
+            if shift is None:
+                with np.errstate(invalid="ignore"):
+                    shift = np.nan_to_num(np.nanmean(chunk, axis=0)) if np.isnan(chunk).any() else chunk.mean(axis=0)
+            centered = chunk - shift
+            present = ~np.isnan(centered)
+            if present.all():
+                sum_xx += centered.T @ centered
+                sum_x_mask += centered.sum(axis=0)[:, None]
+                pair_counts += len(chunk)
+            else:
+                zeroed = np.where(present, centered, 0.0)
+                mask = present.astype(float)
+                sum_xx += zeroed.T @ zeroed
+                sum_x_mask += zeroed.T @ mask
+                pair_counts += mask.T @ mask
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (sum_xx - sum_x_mask * sum_x_mask.T / pair_counts) / (pair_counts - 1)
+        cov[pair_counts < 2] = np.nan
+        return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+    def __repr__(self):
+        return f"<ReturnsStore: {self._n_rows} rows x {len(self.columns)} assets at {self.path}>"
+
+
+def weighted_returns(returns: Union[pd.DataFrame, ReturnsStore, np.ndarray], weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted returns for a DataFrame, ReturnsStore or T x N array; missing returns count as zero.
+    :param weights: Length-N weight vector, or K x N matrix of weight vectors (gives T x K)
+    """
+    if isinstance(returns, ReturnsStore):
+        return returns.portfolio_returns(weights)
+    values = returns.to_numpy(dtype=float) if isinstance(returns, pd.DataFrame) else np.asarray(returns, dtype=float)
+    weighted = values @ np.asarray(weights).T
+    if np.isnan(weighted).any():
+        weighted = np.nan_to_num(values) @ np.asarray(weights).T
+    return weighted
+
+def zero_filled_mean(returns: Union[pd.DataFrame, ReturnsStore]) -> np.ndarray:
+    """
+    Per-asset mean return with missing values counted as zero, consistent with weighted_returns.
+    """
+    if isinstance(returns, ReturnsStore):
+        total = np.zeros(len(returns.columns))
+        for chunk in returns.iter_chunks():
+            total += np.nan_to_num(chunk).sum(axis=0)
+        return total / len(returns)
+    return returns.sum().to_numpy(dtype=float) / len(returns)
+
+if __name__ == "__main__":
+    import tempfile
+
+    np.random.seed(42)
+    tickers = ["AAPL", "MSFT", "TSLA", "AMZN"]
+    returns = pd.DataFrame(np.random.normal(0, 0.01, (1000, len(tickers))), columns=tickers,
+                           index=pd.bdate_range("2020-01-01", periods=1000))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ReturnsStore.from_frame(returns, os.path.join(tmp, "returns"), chunk_rows=128)
+        print(store)
+        print(store.cov())
+        print(store.portfolio_returns(np.full(len(tickers), 0.25))[:5])
@@ -1,8 +1,11 @@
 # src/risk_matrix.py
+import numpy as np
 import pandas as pd
-from typing import Dict, Optional
+from typing import Dict, Optional, Union
 from portfolio import Portfolio
 from risk_metrics import RiskMetrics
+from cache import ResultCache, fingerprint, portfolio_fingerprint
+from instrumentation import timed
 
 class RiskMatrix:
     """
@@ -13,16 +16,19 @@ class RiskMatrix:
     """
 
     def __init__(self, portfolio: Portfolio, risk_metrics: RiskMetrics,
-                 likelihoods: Optional[Dict[str, float]] = None, impact_metric: str = "VaR_95"):
+                 likelihoods: Optional[Dict[str, float]] = None, impact_metric: str = "VaR_95",
+                 cache: Optional[ResultCache] = None):
         """
         :param portfolio: Portfolio object
         :param risk_metrics: RiskMetrics object with metrics computed
         :param likelihoods: Optional dict of ticker -> likelihood (0-1)
         :param impact_metric: Risk metric to use as impact ('VaR_95' or 'CVaR_95')
+        :param cache: Optional ResultCache; matrices are reused for unchanged holdings, likelihoods and impact
         """
         self.portfolio = portfolio
         self.risk_metrics = risk_metrics
         self.impact_metric = impact_metric
+        self.cache = cache
 
         # Default likelihoods 0.1
         self.likelihoods = {t: 0.1 for t in self.portfolio.tickers}
@@ -31,30 +37,124 @@ class RiskMatrix:
                 if t in self.likelihoods:
                     self.likelihoods[t] = max(0.0, min(1.0, v))
 
-    def compute_matrix(self) -> pd.DataFrame:
+    def _impact(self) -> float:
+        """Numeric impact taken from the RiskMetrics metric values."""
+        return float(self.risk_metrics.summary(formatted=False).get(self.impact_metric, 0))
+
+    def likelihood_array(self) -> np.ndarray:
+        """Likelihoods as an array aligned to portfolio tickers."""
+        return np.array([self.likelihoods.get(t, 0.1) for t in self.portfolio.tickers], dtype=float)
+
+    @timed()
+    def compute_matrix(self, output: str = "frame", k: int = 20) -> Union[pd.DataFrame, np.ndarray]:
         """
         Compute a square n x n risk matrix where each element is:
         (likelihood_ticker1 + likelihood_ticker2)/2 * impact
+        :param output: 'frame' for a ticker-labelled DataFrame, 'array' for a raw float32 ndarray,
+                       'topk' for the k riskiest ticker pairs without building the full matrix
+        :param k: Number of pairs returned when output='topk'
         """
+        impact = self._impact()
+        likelihood = self.likelihood_array()
+        if self.cache is None:
+            return self._build_matrix(likelihood, impact, output, k)
+        key = fingerprint("RiskMatrix", portfolio_fingerprint(self.portfolio), likelihood, impact, output, k)
+        return self.cache.get_or_compute(key, lambda: self._build_matrix(likelihood, impact, output, k)).copy()
+
+    def _build_matrix(self, likelihood: np.ndarray, impact: float, output: str, k: int) -> Union[pd.DataFrame, np.ndarray]:
         tickers = self.portfolio.tickers
+        if output == "topk":
+            return self._top_pairs(likelihood, impact, k)
+
+        if output == "array":
+            likelihood = likelihood.astype(np.float32)
+            return (likelihood[:, None] + likelihood[None, :]) / 2 * np.float32(impact)
+
+        if output != "frame":
+            raise ValueError("output must be 'frame', 'array' or 'topk'.")
+
+        matrix = np.round((likelihood[:, None] + likelihood[None, :]) / 2 * impact, 6)
+        return pd.DataFrame(matrix, index=tickers, columns=tickers)
+
+    def _top_pairs(self, likelihood: np.ndarray, impact: float, k: int) -> pd.DataFrame:
+        """
+        Return the k highest-scoring unordered ticker pairs.
+        Every top-k pair only involves the k tickers with the most extreme likelihoods,
+        so only that k x k block is ever scored.
+        """
+        tickers = np.asarray(self.portfolio.tickers, dtype=object)
+        n = len(tickers)
+        m = min(k, n)
+        ranked = likelihood if impact >= 0 else -likelihood
+        candidates = np.sort(np.argpartition(-ranked, m - 1)[:m]) if m < n else np.arange(n)
 
-        # Get impact from RiskMetrics summary
-        impact_val = self.risk_metrics.summary().get(self.impact_metric, 0)
-        if isinstance(impact_val, str) and "%" in impact_val:
-            impact_val = float(impact_val.strip('%')) / 100
-        impact = float(impact_val)
+        block = (likelihood[candidates][:, None] + likelihood[candidates][None, :]) / 2 * impact
+        rows, cols = np.triu_indices(len(candidates))
+        scores = block[rows, cols]
+        order = np.argsort(-scores, kind="stable")[:k]
 
-        # Initialize square DataFrame
-        matrix = pd.DataFrame(index=tickers, columns=tickers, dtype=float)
+        return pd.DataFrame({
+            "Ticker1": tickers[candidates[rows[order]]],
+            "Ticker2": tickers[candidates[cols[order]]],
+            "RiskScore": np.round(scores[order], 6),
+        })
 
-        for t1 in tickers:
-            for t2 in tickers:
-                likelihood1 = self.likelihoods.get(t1, 0.1)
-                likelihood2 = self.likelihoods.get(t2, 0.1)
-                # Example risk score between two tickers
-                matrix.loc[t1, t2] = round(((likelihood1 + likelihood2) / 2) * impact, 6)
+    def _pair_scores(self, row_likelihood: np.ndarray, col_likelihood: np.ndarray) -> np.ndarray:
+        return (row_likelihood[:, None] + col_likelihood[None, :]) / 2 * self._impact()
+
+    @timed()
+    def aggregate(self, by: str = "AssetType", how: str = "mean") -> pd.DataFrame:
+        """
+        Group x group risk matrix, e.g. by AssetType or a Sector group column.
+        Cells are separable in the two likelihoods, so a block's mean or max comes from per-group
+        likelihood means or extremes without building the ticker matrix.
+        :param by: 'AssetType' or one of the portfolio's group columns
+        :param how: 'mean' or 'max' over the tickers of each block
+        """
+        if by not in self.portfolio.groups:
+            raise ValueError(f"Unknown group column '{by}'; available: {list(self.portfolio.groups)}")
+        labels = list(self.portfolio.groups[by])
+        values = self._reduce(self.likelihood_array(), list(self.portfolio.groups[by].values()), how)
+        return pd.DataFrame(np.round(self._pair_scores(values, values), 6), index=labels, columns=labels)
+
+    def _reduce(self, likelihood: np.ndarray, blocks: list, how: str) -> np.ndarray:
+        """Per-block likelihood mean, or the extreme that maximizes the score (min when impact is negative)."""
+        if how == "mean":
+            return np.array([likelihood[idx].mean() for idx in blocks])
+        if how == "max":
+            pick = np.max if self._impact() >= 0 else np.min
+            return np.array([pick(likelihood[idx]) for idx in blocks])
+        raise ValueError("how must be 'mean' or 'max'.")
+
+    def tile_edges(self, tiles: int = 50) -> np.ndarray:
+        """Start positions of `tiles` contiguous ticker ranges, plus the end position."""
+        n = len(self.portfolio.tickers)
+        return np.unique(np.linspace(0, n, min(tiles, n) + 1).astype(int))
+
+    @timed()
+    def downsample(self, tiles: int = 50, how: str = "mean") -> pd.DataFrame:
+        """
+        Tiles x tiles view of the risk matrix over contiguous ticker ranges, for heatmaps of large universes.
+        Tiles are labelled 'FIRST..LAST'; use drill_down to get the ticker cells of a tile.
+        :param tiles: Maximum number of tiles per axis
+        :param how: 'mean' or 'max' over the cells of each tile
+        """
+        edges = self.tile_edges(tiles)
+        tickers = self.portfolio.tickers
+        blocks = [np.arange(start, stop) for start, stop in zip(edges[:-1], edges[1:])]
+        labels = [tickers[b[0]] if len(b) == 1 else f"{tickers[b[0]]}..{tickers[b[-1]]}" for b in blocks]
+        values = self._reduce(self.likelihood_array(), blocks, how)
+        return pd.DataFrame(np.round(self._pair_scores(values, values), 6), index=labels, columns=labels)
 
-        return matrix
+    def drill_down(self, row_tile: int, col_tile: int, tiles: int = 50) -> pd.DataFrame:
+        """Ticker-level cells of one tile of downsample(tiles)."""
+        edges = self.tile_edges(tiles)
+        rows = np.arange(edges[row_tile], edges[row_tile + 1])
+        cols = np.arange(edges[col_tile], edges[col_tile + 1])
+        likelihood = self.likelihood_array()
+        tickers = np.asarray(self.portfolio.tickers, dtype=object)
+        return pd.DataFrame(np.round(self._pair_scores(likelihood[rows], likelihood[cols]), 6),
+                            index=tickers[rows], columns=tickers[cols])
 
 if __name__ == "__main__":
     from portfolio import Portfolio
@@ -1,66 +1,448 @@
 # src/risk_metrics.py
 import numpy as np
 import pandas as pd
-from typing import Optional
+from collections import deque
+from statistics import NormalDist
+from typing import Dict, Optional, Sequence, Tuple, Union
 from portfolio import Portfolio
+from returns_store import ReturnsStore, weighted_returns, zero_filled_mean
+from online import OnlineCovariance, RollingQuantile, sorted_quantile
+from cache import ResultCache, fingerprint, portfolio_fingerprint
+from instrumentation import timed
+
+DEFAULT_CONFIDENCE_LADDER = (0.90, 0.95, 0.975, 0.99, 0.995)
+VAR_METHODS = {"historical": "", "gaussian": "_gaussian", "cornish_fisher": "_cf"}
+
+def level_label(confidence: float) -> str:
+    """
+    Label a confidence level for metric keys: 0.95 -> '95', 0.975 -> '97.5'.
+    """
+    pct = round(confidence * 100, 6)
+    return str(int(pct)) if pct == int(pct) else f"{pct:g}"
+
+def tail_probability(confidence):
+    """
+    Tail probability 1 - confidence (float or array). The * 100 / 100 round trip is not a no-op: it reproduces
+    the float rounding np.percentile applies to (1 - confidence) * 100, so thresholds match compute_var exactly.
+    """
+    return (1 - confidence) * 100 / 100
+
+def format_metric(key: str, value: float):
+    """
+    Format a metric the way RiskMetrics.summary() does: ratios rounded, everything else as a percentage.
+    """
+    return round(float(value), 4) if key == 'Sharpe' else f"{value*100:.2f}%"
+
+def batch_metrics(portfolio_returns: np.ndarray, weights: np.ndarray, cov_matrix: np.ndarray,
+                  confidence: float = 0.95, risk_free_rate: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Compute Volatility, VaR, CVaR and Sharpe for many weight vectors at once.
+    :param portfolio_returns: T x K matrix, one column of portfolio returns per weight vector
+    :param weights: K x N matrix of weight vectors
+    :param cov_matrix: N x N asset covariance matrix
+    :return: Dict of length-K arrays keyed like RiskMetrics.metrics
+    """
+    label = level_label(confidence)
+    volatility = np.sqrt(np.einsum('ij,jk,ik->i', weights, cov_matrix, weights))
+
+    thresholds = np.percentile(portfolio_returns, (1 - confidence) * 100, axis=0)
+    in_tail = portfolio_returns <= thresholds
+    tail_means = (portfolio_returns * in_tail).sum(axis=0) / in_tail.sum(axis=0)
+
+    excess_returns = portfolio_returns - risk_free_rate / 252
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = excess_returns.mean(axis=0) / excess_returns.std(axis=0, ddof=1)
+
+    return {
+        'Volatility': volatility,
+        f'VaR_{label}': -thresholds,
+        f'CVaR_{label}': -tail_means,
+        'Sharpe': sharpe,
+    }
+
+def return_moments(portfolio_returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bias-corrected skewness and excess kurtosis of each column (same estimators as pandas).
+    :param portfolio_returns: T x K matrix of portfolio returns
+    """
+    n = portfolio_returns.shape[0]
+    centered = portfolio_returns - portfolio_returns.mean(axis=0)
+    m2 = (centered ** 2).mean(axis=0)
+    m3 = (centered ** 3).mean(axis=0)
+    m4 = (centered ** 4).mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        skew = np.sqrt(n * (n - 1)) / (n - 2) * m3 / m2 ** 1.5
+        kurt = ((n + 1) * (m4 / m2 ** 2 - 3) + 6) * (n - 1) / ((n - 2) * (n - 3))
+    return skew, kurt
+
+def parametric_tail(mean: np.ndarray, volatility: np.ndarray, confidence: float = 0.95,
+                    skew: Optional[np.ndarray] = None, kurt: Optional[np.ndarray] = None,
+                    grid_points: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Delta-normal VaR/CVaR, or Cornish-Fisher adjusted when skew and excess kurtosis are given.
+    The Cornish-Fisher CVaR averages the adjusted quantile over a midpoint grid of the tail.
+    :return: (VaR, CVaR) arrays, as positive losses
+    """
+    tail_fraction = 1 - confidence
+    normal = NormalDist()
+    z = normal.inv_cdf(tail_fraction)
+
+    if skew is None:
+        var = -(mean + z * volatility)
+        cvar = -(mean - volatility * normal.pdf(z) / tail_fraction)
+        return var, cvar
+
+    def adjusted(q):
+        return (q + (q ** 2 - 1) * skew / 6 + (q ** 3 - 3 * q) * kurt / 24
+                - (2 * q ** 3 - 5 * q) * skew ** 2 / 36)
+
+    grid = [normal.inv_cdf((k + 0.5) / grid_points * tail_fraction) for k in range(grid_points)]
+    tail_quantile = np.mean([adjusted(q) for q in grid], axis=0)
+    return -(mean + adjusted(z) * volatility), -(mean + tail_quantile * volatility)
 
 class RiskMetrics:
     """
     Compute risk metrics for a Portfolio.
     Supported metrics: Volatility, VaR, CVaR, Sharpe Ratio.
     Automatically computes all metrics on initialization to ensure numeric values are always available.
+    Returns may be an in-memory DataFrame or an on-disk ReturnsStore, which is processed in chunks.
+    With a ResultCache, the covariance and the initial metrics are reused for unchanged weights and returns.
     """
 
-    def __init__(self, portfolio: Portfolio, returns: Optional[pd.DataFrame] = None, risk_free_rate: float = 0.0):
+    def __init__(self, portfolio: Portfolio, returns: Optional[Union[pd.DataFrame, ReturnsStore]] = None,
+                 risk_free_rate: float = 0.0, cache: Optional[ResultCache] = None):
         self.portfolio = portfolio
-        self.returns = returns
+        self._returns = returns
         self.risk_free_rate = risk_free_rate
+        self.cache = cache
         self.metrics: dict = {} 
         self.formatted_metrics: dict = {}  
 
+        self._portfolio_returns: Optional[pd.Series] = None
+        self._sorted_returns: Optional[np.ndarray] = None
+        self._cov_matrix: Optional[np.ndarray] = None
+        self._asset_mean: Optional[np.ndarray] = None
+        self._cached_weights: Optional[np.ndarray] = None
+        self._returns_key: Optional[str] = None
+        self._online_cov: Optional[OnlineCovariance] = None
+
         if self.returns is not None:
             self._compute_all_metrics()
 
+    @property
+    def returns(self) -> Optional[Union[pd.DataFrame, ReturnsStore]]:
+        return self._returns
+
+    @returns.setter
+    def returns(self, value: Optional[Union[pd.DataFrame, ReturnsStore]]):
+        self._returns = value
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        """
+        Drop the cached portfolio return series, covariance matrix and asset means, and leave incremental mode
+        (its state no longer matches `returns`). Call this after mutating `returns` in place; reassigning
+        `returns` does it automatically.
+        """
+        self._portfolio_returns = None
+        self._sorted_returns = None
+        self._cov_matrix = None
+        self._asset_mean = None
+        self._cached_weights = None
+        self._returns_key = None
+        self.stop_incremental()
+
+    @property
+    def returns_key(self) -> str:
+        """Content fingerprint of the returns panel, hashed once per panel."""
+        if self._returns_key is None:
+            self._returns_key = fingerprint(self.returns)
+        return self._returns_key
+
+    def _current_weights(self) -> np.ndarray:
+        """Return the portfolio weights, dropping the cached return series if they changed."""
+        weights = np.asarray(self.portfolio.weights, dtype=float)
+        if self._cached_weights is None or not np.array_equal(weights, self._cached_weights):
+            self._portfolio_returns = None
+            self._cached_weights = weights.copy()
+        return weights
+
+    @property
+    def portfolio_returns(self) -> pd.Series:
+        """
+        Weighted portfolio return series, computed lazily as a single matrix-vector product.
+        Missing returns count as zero, matching a row-wise weighted sum.
+        """
+        weights = self._current_weights()
+        if self._portfolio_returns is None:
+            weighted = weighted_returns(self.returns, weights) # type: ignore
+            self._portfolio_returns = pd.Series(weighted, index=self.returns.index) # type: ignore
+            self._sorted_returns = None
+        return self._portfolio_returns
+
+    @property
+    def sorted_portfolio_returns(self) -> np.ndarray:
+        """Ascending portfolio returns, sorted once and shared by all tail statistics."""
+        weighted_returns = self.portfolio_returns
+        if self._sorted_returns is None:
+            self._sorted_returns = np.sort(weighted_returns.to_numpy())
+        return self._sorted_returns
+
+    @property
+    def cov_matrix(self) -> np.ndarray:
+        """Covariance matrix of asset returns, computed once per returns panel."""
+        if self._cov_matrix is None:
+            compute = lambda: self.returns.cov().to_numpy() # type: ignore
+            if self.cache is None:
+                self._cov_matrix = compute()
+            else:
+                self._cov_matrix = self.cache.get_or_compute(fingerprint("cov", self.returns_key), compute)
+        return self._cov_matrix
+
+    @property
+    def asset_mean(self) -> np.ndarray:
+        """Mean return per asset with missing values counted as zero, computed once per returns panel."""
+        if self._asset_mean is None:
+            self._asset_mean = zero_filled_mean(self.returns) # type: ignore
+        return self._asset_mean
+
+    @timed("RiskMetrics.compute_all")
     def _compute_all_metrics(self):
         """Compute all metrics and store both numeric and formatted versions."""
+        self._check_batch()
+        if self.cache is not None:
+            key = fingerprint("RiskMetrics", portfolio_fingerprint(self.portfolio), self.returns_key, self.risk_free_rate)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.metrics.update(cached[0])
+                self.formatted_metrics.update(cached[1])
+                return
         self.compute_volatility()
         self.compute_var()
         self.compute_cvar()
         self.compute_sharpe()
+        if self.cache is not None:
+            self.cache.set(key, (dict(self.metrics), dict(self.formatted_metrics)))
 
+    @timed()
     def compute_volatility(self) -> float:
-        weights = np.array(self.portfolio.weights)
-        cov_matrix = self.returns.cov() # type: ignore
-        vol = np.sqrt(weights.T @ cov_matrix.values @ weights)
+        self._check_batch()
+        weights = self._current_weights()
+        vol = np.sqrt(weights.T @ self.cov_matrix @ weights)
         self.metrics['Volatility'] = float(vol)
         self.formatted_metrics['Volatility'] = f"{vol*100:.2f}%"
         return float(vol)
 
-    def compute_var(self, confidence: float = 0.95) -> float:
-        weighted_returns = (self.returns * self.portfolio.weights).sum(axis=1) # type: ignore
-        var = -np.percentile(weighted_returns, (1 - confidence) * 100)
-        key = f'VaR_{int(confidence*100)}'
+    def _parametric(self, confidence: float, method: str) -> Tuple[float, float]:
+        """Parametric (VaR, CVaR) from the cached covariance and portfolio return moments."""
+        weighted_returns = self.portfolio_returns.to_numpy()
+        weights = self._current_weights()
+        volatility = np.sqrt(weights @ self.cov_matrix @ weights)
+        skew, kurt = return_moments(weighted_returns[:, None]) if method == "cornish_fisher" else (None, None)
+        var, cvar = parametric_tail(weighted_returns.mean(), volatility, confidence, skew, kurt)
+        return float(np.squeeze(var)), float(np.squeeze(cvar))
+
+    @timed()
+    def compute_var(self, confidence: float = 0.95, method: str = "historical") -> float:
+        """
+        :param method: 'historical' (percentile of portfolio returns, key VaR_95), 'gaussian'
+                       (delta-normal, key VaR_95_gaussian) or 'cornish_fisher' (key VaR_95_cf)
+        """
+        self._check_batch()
+        if method not in VAR_METHODS:
+            raise ValueError(f"method must be one of {list(VAR_METHODS)}.")
+        if method == "historical":
+            var = -np.percentile(self.portfolio_returns, (1 - confidence) * 100)
+        else:
+            var, _ = self._parametric(confidence, method)
+        key = f'VaR_{level_label(confidence)}{VAR_METHODS[method]}'
         self.metrics[key] = float(var)
         self.formatted_metrics[key] = f"{var*100:.2f}%"
         return float(var)
 
-    def compute_cvar(self, confidence: float = 0.95) -> float:
-        weighted_returns = (self.returns * self.portfolio.weights).sum(axis=1) # type: ignore
-        var_threshold = np.percentile(weighted_returns, (1 - confidence) * 100)
-        cvar = -weighted_returns[weighted_returns <= var_threshold].mean()
-        key = f'CVaR_{int(confidence*100)}'
+    @timed()
+    def compute_cvar(self, confidence: float = 0.95, method: str = "historical") -> float:
+        """
+        :param method: 'historical', 'gaussian' or 'cornish_fisher', keyed like compute_var
+        """
+        self._check_batch()
+        if method not in VAR_METHODS:
+            raise ValueError(f"method must be one of {list(VAR_METHODS)}.")
+        if method == "historical":
+            weighted_returns = self.portfolio_returns
+            var_threshold = np.percentile(weighted_returns, (1 - confidence) * 100)
+            cvar = -weighted_returns[weighted_returns <= var_threshold].mean()
+        else:
+            _, cvar = self._parametric(confidence, method)
+        key = f'CVaR_{level_label(confidence)}{VAR_METHODS[method]}'
         self.metrics[key] = float(cvar)
         self.formatted_metrics[key] = f"{cvar*100:.2f}%"
         return float(cvar)
 
+    @timed()
+    def compute_tail_ladder(self, confidences: Sequence[float] = DEFAULT_CONFIDENCE_LADDER) -> Dict[str, float]:
+        """
+        Compute VaR and CVaR for several confidence levels from a single sort of the portfolio returns.
+        Thresholds interpolate linearly like np.percentile; tail means come from prefix sums.
+        :param confidences: Confidence levels, e.g. (0.95, 0.99)
+        :return: Dict keyed like compute_var/compute_cvar, e.g. {'VaR_95': ..., 'CVaR_95': ...}
+        """
+        self._check_batch()
+        ordered = self.sorted_portfolio_returns
+        levels = np.atleast_1d(np.asarray(confidences, dtype=float))
+        thresholds = sorted_quantile(ordered, tail_probability(levels))
+
+        prefix = np.concatenate(([0.0], np.cumsum(ordered)))
+        counts = np.searchsorted(ordered, thresholds, side="right")
+        tail_means = prefix[counts] / counts
+
+        ladder = {}
+        for confidence, threshold, tail_mean in zip(levels, thresholds, tail_means):
+            label = level_label(confidence)
+            var, cvar = -float(threshold), -float(tail_mean)
+            for key, value in ((f'VaR_{label}', var), (f'CVaR_{label}', cvar)):
+                self.metrics[key] = value
+                self.formatted_metrics[key] = f"{value*100:.2f}%"
+                ladder[key] = value
+        return ladder
+
+    @timed()
+    def parametric_var(self, weights: Union[np.ndarray, pd.DataFrame], confidence: float = 0.95,
+                       method: str = "gaussian") -> pd.DataFrame:
+        """
+        Parametric VaR/CVaR for many weight vectors in one batched quadratic form.
+        :param weights: books x assets matrix; a DataFrame is aligned to the return columns
+        :param confidence: Confidence level
+        :param method: 'gaussian' or 'cornish_fisher' (needs one pass over the returns for higher moments)
+        :return: DataFrame with one row per book: Volatility, VaR and CVaR
+        """
+        self._check_batch()
+        if method not in ("gaussian", "cornish_fisher"):
+            raise ValueError("method must be 'gaussian' or 'cornish_fisher'.")
+        if isinstance(weights, pd.DataFrame):
+            books = weights.index
+            matrix = weights.reindex(columns=self.returns.columns, fill_value=0.0).to_numpy(dtype=float) # type: ignore
+        else:
+            matrix = np.atleast_2d(np.asarray(weights, dtype=float))
+            books = pd.RangeIndex(len(matrix))
+
+        volatility = np.sqrt(np.einsum('ij,jk,ik->i', matrix, self.cov_matrix, matrix))
+        if method == "cornish_fisher":
+            book_returns = weighted_returns(self.returns, matrix) # type: ignore
+            mean = book_returns.mean(axis=0)
+            skew, kurt = return_moments(book_returns)
+        else:
+            mean = matrix @ self.asset_mean
+            skew, kurt = None, None
+        var, cvar = parametric_tail(mean, volatility, confidence, skew, kurt)
+
+        label, suffix = level_label(confidence), VAR_METHODS[method]
+        return pd.DataFrame({
+            'Volatility': volatility,
+            f'VaR_{label}{suffix}': var,
+            f'CVaR_{label}{suffix}': cvar,
+        }, index=books)
+
+    @timed()
     def compute_sharpe(self) -> float:
-        weighted_returns = (self.returns * self.portfolio.weights).sum(axis=1) # type: ignore
+        self._check_batch()
+        weighted_returns = self.portfolio_returns
         excess_returns = weighted_returns - self.risk_free_rate / 252
         sharpe_ratio = excess_returns.mean() / excess_returns.std()
         self.metrics['Sharpe'] = float(sharpe_ratio)
         self.formatted_metrics['Sharpe'] = round(float(sharpe_ratio), 4)
         return float(sharpe_ratio)
 
+    def start_incremental(self, window: Optional[int] = None, halflife: Optional[float] = None,
+                          confidence: float = 0.95):
+        """
+        Seed incremental state from the current returns so that update() can refresh metrics
+        without a full recompute. The state is tied to the current weights; call this again after reweighting.
+        :param window: Optional rolling window length in rows; older rows are dropped as new ones arrive
+        :param halflife: Optional halflife in rows for exponentially weighted volatility and Sharpe
+        :param confidence: Confidence level for the incrementally maintained VaR/CVaR
+        """
+        if isinstance(self.returns, ReturnsStore):
+            raise ValueError("Incremental mode needs an in-memory returns DataFrame.")
+        if window is not None and halflife is not None:
+            raise ValueError("Use either a rolling window or exponential weighting, not both.")
+
+        weights = self._current_weights()
+        values = np.nan_to_num(self.returns.to_numpy(dtype=float)) # type: ignore
+        if window is not None:
+            values = values[-window:]
+        weighted = values @ weights
+
+        self._online_cov = OnlineCovariance(values.shape[1], halflife)
+        self._online_cov.add_rows(values)
+        self._online_tail = RollingQuantile(weighted)
+        self._online_window = window
+        self._online_rows = deque(zip(values, weighted)) if window is not None else None
+        self._online_confidence = confidence
+        self._refresh_incremental()
+
+    @timed()
+    def update(self, new_rows: pd.DataFrame) -> dict:
+        """
+        Append new return rows and refresh all metrics incrementally. Each row costs O(N^2) for the covariance
+        plus O(T) for the sorted tail buffer (a list insert and a prefix sum, both done in C).
+        The returns DataFrame itself is left untouched; the incremental state holds the new rows, so the batch
+        compute_* methods and parametric_var refuse to run until stop_incremental() or invalidate_cache() is
+        called or `returns` is reassigned.
+        :param new_rows: Return rows with the same ticker columns as `returns`
+        :return: Numeric metrics after the update
+        """
+        if self._online_cov is None:
+            self.start_incremental()
+
+        weights = self._cached_weights
+        rows = np.nan_to_num(new_rows.reindex(columns=self.returns.columns).to_numpy(dtype=float)) # type: ignore
+        for row in rows:
+            weighted = float(row @ weights)
+            self._online_cov.add(row)
+            self._online_tail.add(weighted)
+            if self._online_rows is not None:
+                self._online_rows.append((row, weighted))
+                if len(self._online_rows) > self._online_window:
+                    old_row, old_weighted = self._online_rows.popleft()
+                    self._online_cov.remove(old_row)
+                    self._online_tail.remove(old_weighted)
+
+        self._refresh_incremental()
+        return self.metrics
+
+    def stop_incremental(self):
+        """Drop the incremental state; the batch compute_* methods work on `returns` again."""
+        self._online_cov = None
+        self._online_tail = None
+        self._online_rows = None
+
+    def _check_batch(self):
+        """Batch metrics come from `returns`, which lacks the rows passed to update(); refuse to mix the two."""
+        if self._online_cov is not None:
+            raise ValueError("Incremental mode is active and `returns` lacks the rows passed to update(); "
+                             "call stop_incremental() or assign returns including the new rows first.")
+
+    def _refresh_incremental(self):
+        """Recompute every metric from the incremental state."""
+        weights = self._cached_weights
+        cov = self._online_cov.covariance()
+        variance = float(weights @ cov @ weights)
+        vol = np.sqrt(variance)
+
+        confidence = self._online_confidence
+        label = level_label(confidence)
+        threshold = self._online_tail.quantile(tail_probability(confidence))
+        cvar = -self._online_tail.tail_mean(threshold)
+
+        excess_mean = float(self._online_cov.mean @ weights) - self.risk_free_rate / 252
+        sharpe_ratio = excess_mean / vol
+
+        for key, value in (('Volatility', vol), (f'VaR_{label}', -threshold),
+                           (f'CVaR_{label}', cvar), ('Sharpe', sharpe_ratio)):
+            self.metrics[key] = float(value)
+            self.formatted_metrics[key] = format_metric(key, value)
+
     def summary(self, formatted: bool = True) -> dict:
         """
         Return a dictionary of metrics.
@@ -1,51 +1,227 @@
 # src/stress_test.py
 import pandas as pd
 import numpy as np
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, Sequence, Union
 from portfolio import Portfolio
-from risk_metrics import RiskMetrics
+from returns_store import ReturnsStore, weighted_returns
+from risk_metrics import RiskMetrics, batch_metrics, format_metric
+from parallel import resolve, run_parallel, shared
+from cache import ResultCache, fingerprint, portfolio_fingerprint
+from instrumentation import timed
+
+# A non-linear scenario maps the T x N base returns array to shocked returns.
+ScenarioFunc = Callable[[np.ndarray], np.ndarray]
+
+def scenario_multipliers(scenarios: Dict[str, Dict[str, float]], columns: Sequence[str],
+                         groups: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Convert shock dicts into a scenarios x assets matrix of multipliers (1 + shock).
+    Keys are matched against columns first, then against group labels (AssetType, Sector, ...).
+    :param columns: Asset order of the output matrix
+    :param groups: Group label -> integer positions in `columns`
+    """
+    column_index = {c: i for i, c in enumerate(columns)}
+    multipliers = np.ones((len(scenarios), len(columns)))
+    for row, shocks in enumerate(scenarios.values()):
+        for key, shock in shocks.items():
+            if key in column_index:
+                multipliers[row, column_index[key]] *= 1 + shock
+            elif key in groups:
+                multipliers[row, groups[key]] *= 1 + shock
+    return multipliers
+
+def _stress_task(context: tuple, task: tuple) -> Dict[str, float]:
+    """
+    Evaluate one scenario in a worker: either a multiplier vector (applied to the weights)
+    or a non-linear function of the base returns.
+    """
+    source, cov_source, weights, confidence = context
+    multipliers, func = task
+    returns = resolve(source)
+    if func is None:
+        scaled_weights = (multipliers * weights)[None, :]
+        portfolio_returns = weighted_returns(returns, scaled_weights)
+        cov_matrix = resolve(cov_source)
+    else:
+        values = returns.values if isinstance(returns, ReturnsStore) else returns
+        shocked = np.asarray(func(np.asarray(values)), dtype=float)
+        scaled_weights = weights[None, :]
+        portfolio_returns = weighted_returns(shocked, scaled_weights)
+        cov_matrix = pd.DataFrame(shocked).cov().to_numpy()
+    metrics = batch_metrics(portfolio_returns, scaled_weights, cov_matrix, confidence)
+    return {key: format_metric(key, metric[0]) for key, metric in metrics.items()}
 
 class StressTest:
     """
     Perform stress testing on a Portfolio.
     Apply hypothetical or historical shocks and recompute risk metrics.
+    Returns may be an in-memory DataFrame or an on-disk ReturnsStore.
+    With a ResultCache, scenarios already evaluated for the same weights and returns are not recomputed.
     """
 
-    def __init__(self, portfolio: Portfolio, returns: Optional[pd.DataFrame] = None):
+    def __init__(self, portfolio: Portfolio, returns: Optional[Union[pd.DataFrame, ReturnsStore]] = None,
+                 cache: Optional[ResultCache] = None, risk_metrics: Optional[RiskMetrics] = None):
+        """
+        :param risk_metrics: Optional RiskMetrics on the same returns panel; its covariance is reused (see share_covariance)
+        """
         self.portfolio = portfolio
-        self.returns = returns
+        self._returns = returns
+        self.cache = cache
+        self.risk_metrics: Optional[RiskMetrics] = None
         self.scenario_results: Dict[str, Dict] = {}
+        self.scenario_timings: Dict[str, float] = {}
+        self._base_cov: Optional[np.ndarray] = None
+        self._groups: Optional[Dict[str, np.ndarray]] = None
+        self._returns_key: Optional[str] = None
+        if risk_metrics is not None:
+            self.share_covariance(risk_metrics)
+
+    def share_covariance(self, risk_metrics: RiskMetrics):
+        """
+        Take the base covariance from a RiskMetrics on the same returns panel, so it is computed once for both.
+        Ignored when the panels differ; checked again whenever the covariance is needed.
+        """
+        if risk_metrics.returns is self.returns:
+            self.risk_metrics = risk_metrics
+
+    @property
+    def returns(self) -> Optional[Union[pd.DataFrame, ReturnsStore]]:
+        return self._returns
+
+    @returns.setter
+    def returns(self, value: Optional[Union[pd.DataFrame, ReturnsStore]]):
+        self._returns = value
+        self._base_cov = None
+        self._groups = None
+        self._returns_key = None
+
+    @property
+    def returns_key(self) -> str:
+        """Content fingerprint of the returns panel, hashed once per panel."""
+        if self._returns_key is None:
+            self._returns_key = fingerprint(self.returns)
+        return self._returns_key
+
+    @property
+    def base_cov(self) -> np.ndarray:
+        """Covariance of the unshocked returns, computed once and reused by every scenario."""
+        if self._base_cov is None:
+            if self.returns is None:
+                n = len(self.portfolio.tickers)
+                self._base_cov = np.zeros((n, n))
+            elif self.risk_metrics is not None and self.risk_metrics.returns is self.returns:
+                self._base_cov = self.risk_metrics.cov_matrix
+            elif self.cache is None:
+                self._base_cov = self.returns.cov().to_numpy()
+            else:
+                self._base_cov = self.cache.get_or_compute(fingerprint("cov", self.returns_key),
+                                                           lambda: self.returns.cov().to_numpy()) # type: ignore
+        return self._base_cov
 
+    @timed()
     def apply_scenario(self, name: str, shocks: Dict[str, float]) -> Dict[str, float]:
         """
         Apply a shock scenario to the portfolio and compute risk metrics.
         :param name: Scenario name
         :param shocks: Dict mapping Ticker or AssetType to shock percentage (e.g., -0.1 for -10%)
         :return: Dict of risk metrics under this scenario
+
+        Scenario volatility is derived from the base covariance: scaling returns by a diagonal
+        shock D turns the covariance into D @ cov @ D, which is the same as shocking the weights.
         """
-        if self.returns is not None:
-            scenario_returns = self.returns.copy()
-        else:
-            scenario_returns = pd.DataFrame(
-                np.zeros((252, len(self.portfolio.tickers))),
-                columns=self.portfolio.tickers
-            )
+        return self.apply_scenarios({name: shocks})[name]
 
-        for key, shock in shocks.items():
-            if key in scenario_returns.columns:
-                scenario_returns[key] = scenario_returns[key] * (1 + shock)
+    def _group_positions(self) -> Dict[str, np.ndarray]:
+        """Portfolio group indexes translated to return-column positions, cached until returns change."""
+        if self._groups is None:
+            groups = self.portfolio.group_positions()
+            columns = list(self.returns.columns) if self.returns is not None else None
+            if columns is not None and columns != list(self.portfolio.tickers):
+                column_index = {c: i for i, c in enumerate(columns)}
+                to_column = np.array([column_index.get(t, -1) for t in self.portfolio.tickers])
+                groups = {label: to_column[idx][to_column[idx] >= 0] for label, idx in groups.items()}
+            self._groups = groups
+        return self._groups
+
+    def _scenario_multipliers(self, scenarios: Dict[str, Dict[str, float]]) -> np.ndarray:
+        """Scenarios x assets matrix of return multipliers aligned to the return columns."""
+        columns = list(self.returns.columns) if self.returns is not None else list(self.portfolio.tickers)
+        return scenario_multipliers(scenarios, columns, self._group_positions())
+
+    @timed()
+    def apply_scenarios(self, scenarios: Dict[str, Dict[str, float]], chunk_size: int = 256) -> Dict[str, Dict]:
+        """
+        Apply many shock scenarios at once without copying the returns.
+        A shock scales asset returns, so each scenario is evaluated as the base returns
+        times a shocked weight vector; scenarios are processed in chunks of `chunk_size`.
+        :param scenarios: Dict mapping scenario name to a shocks dict (see apply_scenario)
+        :return: Dict of scenario name -> risk metrics, as stored in scenario_results
+        """
+        weights = np.asarray(self.portfolio.weights, dtype=float)
+        names = list(scenarios)
+        keys: Dict[str, str] = {}
+        if self.cache is not None:
+            base_key = fingerprint("StressTest", portfolio_fingerprint(self.portfolio), self.returns_key)
+            pending = []
+            for name in names:
+                keys[name] = fingerprint(base_key, scenarios[name])
+                cached = self.cache.get(keys[name])
+                if cached is None:
+                    pending.append(name)
+                else:
+                    self.scenario_results[name] = dict(cached)
+            names = pending
+        multipliers = self._scenario_multipliers({name: scenarios[name] for name in names})
+
+        for start in range(0, len(names), chunk_size):
+            scaled_weights = multipliers[start:start + chunk_size] * weights
+            if self.returns is None:
+                portfolio_returns = np.zeros((252, len(scaled_weights)))
             else:
-                indices = [i for i, t in enumerate(self.portfolio.asset_types) if t == key]
-                for i in indices:
-                    scenario_returns[self.portfolio.tickers[i]] = scenario_returns[self.portfolio.tickers[i]] * (1 + shock)
-
-        rm = RiskMetrics(self.portfolio, scenario_returns)
-        rm.compute_volatility()
-        rm.compute_var()
-        rm.compute_cvar()
-        rm.compute_sharpe()
-        self.scenario_results[name] = rm.summary()
-        return self.scenario_results[name]
+                portfolio_returns = weighted_returns(self.returns, scaled_weights)
+            metrics = batch_metrics(portfolio_returns, scaled_weights, self.base_cov)
+            for offset, name in enumerate(names[start:start + chunk_size]):
+                self.scenario_results[name] = {key: format_metric(key, metric[offset]) for key, metric in metrics.items()}
+                if name in keys:
+                    self.cache.set(keys[name], dict(self.scenario_results[name])) # type: ignore
+
+        return {name: self.scenario_results[name] for name in scenarios}
+
+    @timed()
+    def run_scenarios(self, scenarios: Dict[str, Union[Dict[str, float], ScenarioFunc]], workers: Optional[int] = None,
+                      backend: str = "process", confidence: float = 0.95) -> Dict[str, Dict]:
+        """
+        Run scenarios one per task on a process or thread pool, for scenarios that don't fit apply_scenarios.
+        The base returns and covariance are placed in shared memory once instead of being pickled per task;
+        a ReturnsStore is reopened from disk by each worker. Results keep the order of `scenarios`
+        and per-scenario wall times are stored in scenario_timings.
+        :param scenarios: Dict mapping scenario name to a shocks dict (see apply_scenario) or to a
+                          picklable function taking the T x N base returns array and returning shocked returns
+        :param workers: Pool size; 1 runs everything in the calling thread
+        :param backend: 'process' or 'thread'
+        :return: Dict of scenario name -> risk metrics, as stored in scenario_results
+        """
+        names = list(scenarios)
+        shock_names = [n for n in names if not callable(scenarios[n])]
+        multipliers = dict(zip(shock_names, self._scenario_multipliers({n: scenarios[n] for n in shock_names})))
+        weights = np.asarray(self.portfolio.weights, dtype=float)
+
+        if self.returns is None:
+            base = np.zeros((252, len(self.portfolio.tickers)))
+        elif isinstance(self.returns, ReturnsStore):
+            base = self.returns
+        else:
+            base = self.returns.to_numpy(dtype=float)
+        mode = "thread" if workers == 1 or len(names) <= 1 else backend
+
+        tasks = [(multipliers.get(n), None if n in multipliers else scenarios[n]) for n in names]
+        with shared(base, mode) as source, shared(self.base_cov, mode) as cov_source:
+            outcomes = run_parallel(_stress_task, tasks, (source, cov_source, weights, confidence), workers, mode)
+
+        for name, (metrics, seconds) in zip(names, outcomes):
+            self.scenario_results[name] = metrics
+            self.scenario_timings[name] = seconds
+        return {name: self.scenario_results[name] for name in names}
 
     def summary(self) -> pd.DataFrame:
         """
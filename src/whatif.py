@@ -0,0 +1,140 @@
+# src/whatif.py
+import numpy as np
+import pandas as pd
+from typing import Dict
+from portfolio import Portfolio
+from risk_metrics import format_metric, level_label
+from stress_test import scenario_multipliers
+
+class WhatIf:
+    """
+    Interactive what-if analysis: edit single weights or set shocks per ticker/AssetType and get updated
+    Volatility, VaR, CVaR and Sharpe without re-running the pipeline.
+    The effective weights are weight * (1 + shock). Only positions whose effective weight changes are touched:
+    volatility uses a rank-k update of w' cov w through the cached cov @ w, and the portfolio return
+    series is updated with the changed return columns only.
+    """
+
+    def __init__(self, portfolio: Portfolio, returns: pd.DataFrame, risk_free_rate: float = 0.0,
+                 confidence: float = 0.95, refresh_every: int = 500):
+        """
+        :param portfolio: Portfolio object (weights are applied to the return columns by position)
+        :param returns: Historical returns DataFrame; missing values count as zero returns
+        :param risk_free_rate: Annual risk-free rate used for Sharpe
+        :param confidence: VaR/CVaR confidence level
+        :param refresh_every: Recompute the running sums exactly after this many updates to bound drift
+        """
+        self.portfolio = portfolio
+        self.risk_free_rate = risk_free_rate
+        self.confidence = confidence
+        self.refresh_every = refresh_every
+        self.tickers = list(portfolio.tickers)
+        self.groups = portfolio.group_positions()
+
+        self.values = np.ascontiguousarray(np.nan_to_num(returns.to_numpy(dtype=np.float64)))
+        self.cov_matrix = returns.cov().to_numpy()
+        self.base_weights = np.asarray(portfolio.weights, dtype=np.float64).copy()
+        self.shocks: Dict[str, float] = {}
+        self.reset()
+
+    def reset(self):
+        """Back to the portfolio weights with no shocks."""
+        self.weights = self.base_weights.copy()
+        self.shocks = {}
+        self.multipliers = np.ones_like(self.weights)
+        self.refresh()
+
+    def refresh(self):
+        """Recompute the running quantities from scratch."""
+        self.effective_weights = self.weights * self.multipliers
+        self._cov_weights = self.cov_matrix @ self.effective_weights
+        self._variance = float(self.effective_weights @ self._cov_weights)
+        self._portfolio_returns = self.values @ self.effective_weights
+        self._updates = 0
+
+    def _apply(self, positions: np.ndarray, new_effective: np.ndarray):
+        """Move the effective weights at `positions` to new values with O(N k + T k) work."""
+        delta = new_effective - self.effective_weights[positions]
+        changed = delta != 0
+        positions, delta = positions[changed], delta[changed]
+        if len(positions) == 0:
+            return
+        cov_columns = self.cov_matrix[:, positions]
+        # (w + d)' C (w + d) = w' C w + 2 d' (C w) + d' C_kk d
+        self._variance += 2 * delta @ self._cov_weights[positions] + delta @ cov_columns[positions] @ delta
+        self._cov_weights += cov_columns @ delta
+        self._portfolio_returns += self.values[:, positions] @ delta
+        self.effective_weights[positions] += delta
+
+        self._updates += 1
+        if self._updates >= self.refresh_every:
+            self.refresh()
+
+    def set_weight(self, ticker: str, weight: float) -> Dict[str, float]:
+        """
+        Change one position's weight (other weights are not renormalized).
+        :return: Updated metrics
+        """
+        position = self.portfolio.ticker_index[ticker]
+        self.weights[position] = weight
+        self._apply(np.array([position]), np.array([weight * self.multipliers[position]]))
+        return self.metrics()
+
+    def set_weights(self, weights: Dict[str, float]) -> Dict[str, float]:
+        """Change several weights at once; see set_weight."""
+        positions = np.array([self.portfolio.ticker_index[t] for t in weights], dtype=np.intp)
+        self.weights[positions] = list(weights.values())
+        self._apply(positions, self.weights[positions] * self.multipliers[positions])
+        return self.metrics()
+
+    def set_shock(self, key: str, shock: float) -> Dict[str, float]:
+        """
+        Set (replace) the shock for a ticker or group label, e.g. set_shock('Equity', -0.2).
+        A shock of 0 removes it. Shocks on overlapping keys compound, as in StressTest.
+        :return: Updated metrics
+        """
+        if shock == 0:
+            self.shocks.pop(key, None)
+        else:
+            self.shocks[key] = shock
+        multipliers = scenario_multipliers({"": self.shocks}, self.tickers, self.groups)[0]
+        positions = np.flatnonzero(multipliers != self.multipliers)
+        self.multipliers = multipliers
+        self._apply(positions, self.weights[positions] * multipliers[positions])
+        return self.metrics()
+
+    def metrics(self) -> Dict[str, float]:
+        """Volatility, VaR, CVaR and Sharpe of the current what-if portfolio, keyed like RiskMetrics."""
+        portfolio_returns = self._portfolio_returns
+        label = level_label(self.confidence)
+        threshold = np.percentile(portfolio_returns, (1 - self.confidence) * 100)
+        excess = portfolio_returns - self.risk_free_rate / 252
+        return {
+            'Volatility': float(np.sqrt(max(self._variance, 0.0))),
+            f'VaR_{label}': float(-threshold),
+            f'CVaR_{label}': float(-portfolio_returns[portfolio_returns <= threshold].mean()),
+            'Sharpe': float(excess.mean() / excess.std(ddof=1)),
+        }
+
+    def summary(self, formatted: bool = True) -> dict:
+        """
+        Current what-if metrics plus the total (unnormalized) weight.
+        :param formatted: True for human-readable strings (e.g., '0.36%'), False for numeric values
+        """
+        metrics = self.metrics()
+        if formatted:
+            metrics = {k: format_metric(k, v) for k, v in metrics.items()}
+        metrics['Total Weight'] = round(float(self.weights.sum()), 4)
+        return metrics
+
+if __name__ == "__main__":
+    portfolio = Portfolio.from_csv("../data/sample_portfolio.csv")
+    np.random.seed(42)
+    returns = pd.DataFrame(np.random.normal(0, 0.01, (252, len(portfolio.tickers))), columns=portfolio.tickers)
+
+    whatif = WhatIf(portfolio, returns)
+    print("Base:", whatif.summary())
+    whatif.set_shock("Equity", -0.2)
+    print("Equity -20%:", whatif.summary())
+    whatif.set_weight("JPM", 0.15)
+    print("JPM to 15%:", whatif.summary())
@@ -0,0 +1,26 @@
+import sys
+import json
+
+sys.path.append("../src")
+
+from benchmark import compare, main, run_suite
+
+def test_run_suite_records_every_stage():
+    """Test that a tiny grid times every stage and builds a scaling curve over assets."""
+    results = run_suite({"assets": [5, 10], "days": [30], "scenarios": [2], "portfolios": [2]}, repeat=1)
+    stages = {r["stage"] for r in results["results"] if r["assets"] == 5}
+    assert {"Portfolio.from_csv", "RiskMetrics.compute_var", "StressTest.apply_scenario",
+            "LiquidityMetrics.apply_scenario", "RiskMatrix.compute_matrix", "Report.generate_csv"} <= stages
+    assert all(r["seconds"] > 0 and r["peak_bytes"] >= 0 for r in results["results"])
+    assert [size for size, _ in results["curves"]["assets"]["RiskMatrix.compute_matrix"]] == [5, 10]
+
+def test_compare_flags_regressions(tmp_path):
+    """Test the CLI output and the regression check against a baseline."""
+    output = tmp_path / "bench.json"
+    assert main(["--assets", "5", "--days", "30", "--scenarios", "2", "--repeat", "1", "-o", str(output)]) == 0
+    baseline = json.loads(output.read_text())
+    slower = json.loads(output.read_text())
+    for r in slower["results"]:
+        r["seconds"] *= 2
+    assert len(compare(baseline, slower)) == len(baseline["results"])
+    assert compare(baseline, baseline) == []
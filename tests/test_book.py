@@ -0,0 +1,100 @@
+import sys
+import pytest
+import pandas as pd
+import numpy as np
+
+sys.path.append("../src")
+
+from portfolio import Portfolio
+from risk_metrics import RiskMetrics
+from stress_test import StressTest
+from liquidity import LiquidityMetrics
+from book import PortfolioBook
+
+@pytest.fixture
+def portfolios(tmp_path):
+    """Create two Portfolio objects over overlapping tickers."""
+    frames = {
+        "Growth": pd.DataFrame({"Ticker": ["AAPL", "TSLA"], "Weight": [0.6, 0.4], "AssetType": ["Equity", "Equity"]}),
+        "Balanced": pd.DataFrame({"Ticker": ["AAPL", "BND"], "Weight": [0.5, 0.5], "AssetType": ["Equity", "Bond"]}),
+    }
+    result = {}
+    for name, data in frames.items():
+        file_path = tmp_path / f"{name}.csv"
+        data.to_csv(file_path, index=False)
+        result[name] = Portfolio.from_csv(file_path)
+    return result
+
+@pytest.fixture
+def sample_returns():
+    """Generate dummy returns for the shared universe."""
+    np.random.seed(42)
+    return pd.DataFrame(np.random.normal(0, 0.01, (252, 3)), columns=["AAPL", "TSLA", "BND"])
+
+def test_book_metrics_match_single_portfolios(portfolios, sample_returns):
+    """Test that batched metrics equal RiskMetrics run portfolio by portfolio."""
+    book = PortfolioBook.from_portfolios(portfolios, sample_returns)
+    metrics = book.compute_metrics()
+
+    for name, portfolio in portfolios.items():
+        expected = RiskMetrics(portfolio, sample_returns[portfolio.tickers]).summary(formatted=False)
+        for key, value in expected.items():
+            assert metrics.loc[name, key] == pytest.approx(value)
+
+def test_book_rejects_holdings_without_returns(sample_returns):
+    """Test that held tickers missing from the returns raise instead of being dropped and renormalized."""
+    weights = pd.DataFrame({"AAPL": [0.5, 1.0], "XOM": [0.5, 0.0]}, index=["Mixed", "AAPL only"])
+    with pytest.raises(ValueError, match="XOM"):
+        PortfolioBook(weights, sample_returns)
+
+    book = PortfolioBook(weights.loc[["AAPL only"]], sample_returns)
+    assert list(book.weights.loc["AAPL only"]) == [1.0, 0.0, 0.0]
+
+def test_book_scenarios_and_liquidity(portfolios, sample_returns):
+    """Test batched stress and liquidity results against the single-portfolio modules."""
+    scores = {"AAPL": 0.9, "TSLA": 0.6, "BND": 0.8}
+    book = PortfolioBook.from_portfolios(portfolios, sample_returns, liquidity_scores=scores)
+    stressed = book.apply_scenarios({"Equity Dip": {"Equity": -0.2}})
+    liquidity = book.liquidity({"Crunch": {"Equity": -0.3}})
+
+    for name, portfolio in portfolios.items():
+        st = StressTest(portfolio, sample_returns[portfolio.tickers])
+        expected = st.apply_scenario("Equity Dip", {"Equity": -0.2})
+        assert stressed["Equity Dip"].loc[name, "VaR_95"] == pytest.approx(float(expected["VaR_95"].strip("%")) / 100, abs=1e-4)
+
+        lm = LiquidityMetrics(portfolio, scores)
+        assert liquidity.loc[name, "Base"] == lm.portfolio_liquidity()
+        assert liquidity.loc[name, "Crunch"] == lm.apply_scenario("Crunch", {"Equity": -0.3})
+
+def test_book_summary_is_tidy(portfolios, sample_returns):
+    """Test that the summary is one long DataFrame covering all portfolios."""
+    book = PortfolioBook.from_portfolios(portfolios, sample_returns)
+    summary = book.summary({"Crash": {"Equity": -0.1}}, {"Crunch": {"Bond": -0.1}})
+
+    assert list(summary.columns) == ["Portfolio", "Scenario", "Metric", "Value"]
+    assert set(summary["Portfolio"]) == {"Growth", "Balanced"}
+    assert {"Base", "Crash", "Crunch"} <= set(summary["Scenario"])
+
+def test_book_from_files(tmp_path, portfolios, sample_returns):
+    """Test that a directory of holdings files loads into the same book as from_portfolios."""
+    for name, portfolio in portfolios.items():
+        portfolio.data.to_csv(tmp_path / f"{name}.csv", index=False)
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    book = PortfolioBook.from_files(tmp_path, sample_returns, workers=2)
+    expected = PortfolioBook.from_portfolios(portfolios, sample_returns)
+
+    assert list(book.names) == ["Balanced", "Growth"]
+    pd.testing.assert_frame_equal(book.weights, expected.weights.loc[book.names], check_names=False)
+    assert book.asset_types == ["Equity", "Equity", "Bond"]
+
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        portfolios["Growth"].data.to_csv(tmp_path / folder / "fund.csv", index=False)
+    book = PortfolioBook.from_files([tmp_path / "a" / "fund.csv", tmp_path / "b" / "fund.csv"], sample_returns)
+    assert list(book.names) == ["a/fund", "b/fund"]
+    assert np.allclose(book.weights.sum(axis=1), 1.0)
+
+    (tmp_path / "a" / "fund.json").write_text("[]")
+    with pytest.raises(ValueError, match="same book id"):
+        PortfolioBook.from_files(tmp_path / "a", sample_returns)
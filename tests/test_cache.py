@@ -0,0 +1,108 @@
+import sys
+import pytest
+import pandas as pd
+import numpy as np
+
+sys.path.append("../src")
+
+from portfolio import Portfolio
+from risk_metrics import RiskMetrics
+from stress_test import StressTest
+from liquidity import LiquidityMetrics
+from cache import ResultCache, fingerprint
+
+@pytest.fixture
+def sample_portfolio(tmp_path):
+    """Creates a sample portfolio for testing."""
+    data = pd.DataFrame({
+        "Ticker": ["AAPL", "TSLA", "BND"],
+        "Weight": [0.5, 0.3, 0.2],
+        "AssetType": ["Equity", "Equity", "Bond"]
+    })
+    file_path = tmp_path / "portfolio.csv"
+    data.to_csv(file_path, index=False)
+    return Portfolio.from_csv(file_path)
+
+@pytest.fixture
+def sample_returns():
+    """Generate dummy returns for testing."""
+    np.random.seed(42)
+    return pd.DataFrame(np.random.normal(0, 0.01, (252, 3)), columns=["AAPL", "TSLA", "BND"])
+
+def test_fingerprint_tracks_content(sample_returns):
+    """Test that fingerprints change with values and ignore object identity."""
+    assert fingerprint(sample_returns, {"a": 1.0}) == fingerprint(sample_returns.copy(), {"a": 1.0})
+    assert fingerprint(sample_returns, {"a": 1.0}) != fingerprint(sample_returns, {"a": 2.0})
+    shifted = sample_returns.copy()
+    shifted.iloc[0, 0] += 1e-9
+    assert fingerprint(sample_returns) != fingerprint(shifted)
+
+def test_memory_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = ResultCache(max_items=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+def test_disk_tier_and_size_eviction(tmp_path):
+    """Test that results survive a new cache instance and old files are evicted past max_bytes."""
+    cache = ResultCache(max_items=1, path=str(tmp_path))
+    cache.set("a", np.arange(10))
+    assert np.array_equal(ResultCache(path=str(tmp_path)).get("a"), np.arange(10))
+
+    small = ResultCache(path=str(tmp_path / "small"), max_bytes=3000)
+    small.set("old", np.zeros(200))
+    small.set("new", np.zeros(200))
+    assert not (tmp_path / "small" / "old.pkl").exists()
+    assert (tmp_path / "small" / "new.pkl").exists()
+
+def test_disk_eviction_scans_only_over_budget(tmp_path, monkeypatch):
+    """Test that writes under budget don't rescan the directory and files removed by another process are skipped."""
+    import cache as cache_module
+    cache = ResultCache(path=str(tmp_path), max_bytes=10_000)
+    listings = []
+    real_listdir = cache_module.os.listdir
+    monkeypatch.setattr(cache_module.os, "listdir", lambda path: listings.append(path) or real_listdir(path) + ["gone.pkl"])
+    for i in range(5):
+        cache.set(str(i), i)
+    assert listings == []
+
+    cache.set("big", np.zeros(2000))
+    assert len(listings) == 1
+    assert (tmp_path / "big.pkl").exists() and not (tmp_path / "0.pkl").exists()
+
+def test_disk_tier_shared_by_threads(tmp_path):
+    """Test that threads writing the same keys don't collide and overwrites don't inflate the tracked size."""
+    from concurrent.futures import ThreadPoolExecutor
+    cache = ResultCache(max_items=4, path=str(tmp_path))
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda i: cache.set(str(i % 8), np.full(50, i)), range(400)))
+
+    on_disk = sum(f.stat().st_size for f in tmp_path.glob("*.pkl"))
+    assert cache._disk_bytes == on_disk and len(list(tmp_path.glob("*.pkl"))) == 8
+    assert not list(tmp_path.glob("*.tmp")) and len(cache) == 4
+
+def test_cached_results_match(sample_portfolio, sample_returns):
+    """Test that cached risk, stress and liquidity results equal fresh ones and are reused."""
+    cache = ResultCache()
+    scenarios = {"Crash": {"Equity": -0.1}, "Rally": {"BND": 0.05}}
+
+    first = RiskMetrics(sample_portfolio, sample_returns, cache=cache).summary()
+    StressTest(sample_portfolio, sample_returns, cache=cache).apply_scenarios(scenarios)
+    LiquidityMetrics(sample_portfolio, cache=cache).apply_scenarios(scenarios)
+    misses = cache.misses
+
+    assert RiskMetrics(sample_portfolio, sample_returns, cache=cache).summary() == first
+    stress = StressTest(sample_portfolio, sample_returns, cache=cache).apply_scenarios(scenarios)
+    liquidity = LiquidityMetrics(sample_portfolio, cache=cache).apply_scenarios(scenarios)
+    assert cache.misses == misses
+
+    assert stress == StressTest(sample_portfolio, sample_returns).apply_scenarios(scenarios)
+    assert liquidity == LiquidityMetrics(sample_portfolio).apply_scenarios(scenarios)
+
+    sample_portfolio.weights = np.array([0.2, 0.3, 0.5])
+    StressTest(sample_portfolio, sample_returns, cache=cache).apply_scenarios(scenarios)
+    assert cache.misses == misses + len(scenarios)
@@ -0,0 +1,93 @@
+import sys
+import json
+import pytest
+import pandas as pd
+import numpy as np
+
+sys.path.append("../src")
+
+from cli import book_returns, load_job, main, run_job
+from returns_store import ReturnsStore
+
+def write_job(tmp_path, books=3):
+    """Writes holdings files, a returns CSV and a job spec; returns the spec path."""
+    holdings = tmp_path / "holdings"
+    holdings.mkdir()
+    tickers = ["AAPL", "TSLA", "BND", "XOM"]
+    for b in range(books):
+        pd.DataFrame({
+            "Ticker": tickers[b % 2:b % 2 + 3],
+            "Allocation": [0.5, 0.3, 0.2],
+            "AssetType": ["Equity", "Equity", "Bond"]
+        }).to_csv(holdings / f"book{b}.csv", index=False)
+    np.random.seed(0)
+    pd.DataFrame(np.random.normal(0, 0.01, (60, 4)), columns=tickers,
+                 index=pd.date_range("2024-01-01", periods=60)).to_csv(tmp_path / "returns.csv")
+    spec = {
+        "portfolios": "holdings",
+        "returns": "returns.csv",
+        "scenarios": {"stress": {"Crash": {"Equity": -0.3}}},
+        "metrics": ["RiskMetrics", "StressTest"],
+        "outputs": {"dir": "out", "format": "csv"},
+    }
+    (tmp_path / "job.json").write_text(json.dumps(spec))
+    return tmp_path / "job.json"
+
+def test_run_job_and_resume(tmp_path):
+    """Test that a run writes reports and a summary, and a rerun only retries the failed book."""
+    job = write_job(tmp_path)
+    (tmp_path / "holdings" / "book1.csv").write_text("Ticker,Allocation\nAAPL,0\n")
+
+    summary = run_job(load_job(str(job)), workers=2, backend="thread", progress=False)
+    assert (summary["books_completed"], summary["books_failed"]) == (2, 1)
+    assert summary["failures"][0]["portfolio"] == "book1"
+    assert (tmp_path / "out" / "book0_StressTest.csv").exists()
+    assert not (tmp_path / "out" / "book0_Liquidity.csv").exists()
+
+    (tmp_path / "holdings" / "book1.csv").write_text("Ticker,Allocation\nAAPL,1\n")
+    summary = run_job(load_job(str(job)), workers=1, progress=False)
+    assert (summary["books_resumed"], summary["books_completed"], summary["books_failed"]) == (2, 1, 0)
+    assert json.loads((tmp_path / "out" / "run_summary.json").read_text())["books_total"] == 3
+
+def test_cli_commands(tmp_path, capsys):
+    """Test the run and status commands and spec validation."""
+    job = write_job(tmp_path, books=2)
+    assert main(["run", str(job), "--workers", "1", "--quiet"]) == 0
+    assert main(["status", str(job)]) == 0
+    assert "2/2 books finished" in capsys.readouterr().out
+
+    (tmp_path / "bad.json").write_text(json.dumps({"portfolios": "holdings"}))
+    assert main(["run", str(tmp_path / "bad.json")]) == 2
+
+def test_books_with_same_file_name(tmp_path):
+    """Test that same-named files in different folders are separate books with separate reports."""
+    job = write_job(tmp_path, books=1)
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "fund.csv").write_text((tmp_path / "holdings" / "book0.csv").read_text())
+    spec = json.loads(job.read_text())
+    spec["portfolios"] = ["a/fund.csv", "b/fund.csv"]
+    job.write_text(json.dumps(spec))
+
+    summary = run_job(load_job(str(job)), workers=1, progress=False)
+    assert summary["books_completed"] == 2
+    assert (tmp_path / "out" / "a" / "fund_StressTest.csv").exists()
+    assert (tmp_path / "out" / "b" / "fund_StressTest.csv").exists()
+
+    (tmp_path / "a" / "fund.json").write_text("[]")
+    spec["portfolios"] = ["a/fund.csv", "a/fund.json"]
+    job.write_text(json.dumps(spec))
+    assert main(["run", str(job)]) == 2
+
+def test_book_returns_subset_and_missing(tmp_path):
+    """Test that a store is read column by column for a book and missing tickers are reported."""
+    np.random.seed(1)
+    returns = pd.DataFrame(np.random.normal(0, 0.01, (30, 4)), columns=["AAPL", "TSLA", "BND", "XOM"])
+    store = ReturnsStore.from_frame(returns, str(tmp_path / "store"), chunk_rows=7)
+    store.to_frame = None  # the whole panel must not be loaded
+
+    pd.testing.assert_frame_equal(book_returns(store, ["XOM", "AAPL"]), returns[["XOM", "AAPL"]])
+    assert book_returns(store, ["AAPL", "TSLA", "BND", "XOM"]) is store
+    for source in (store, returns):
+        with pytest.raises(ValueError, match="NVDA"):
+            book_returns(source, ["AAPL", "NVDA"])
@@ -0,0 +1,76 @@
+import sys
+import json
+import pytest
+import pandas as pd
+import numpy as np
+
+sys.path.append("../src")
+
+import instrumentation
+from instrumentation import JsonLinesSink, PrometheusSink, instrumented, profile, timed
+from portfolio import Portfolio
+from risk_metrics import RiskMetrics
+from stress_test import StressTest
+
+@pytest.fixture
+def inputs():
+    """Creates a three-asset portfolio and 50 days of returns."""
+    portfolio = Portfolio.from_frame(pd.DataFrame({
+        "Ticker": ["AAPL", "TSLA", "BND"],
+        "Weight": [0.5, 0.3, 0.2],
+        "AssetType": ["Equity", "Equity", "Bond"]
+    }))
+    np.random.seed(0)
+    return portfolio, pd.DataFrame(np.random.normal(0, 0.01, (50, 3)), columns=portfolio.tickers)
+
+def test_records_stages_with_sizes(inputs):
+    """Test that instrumented calls are recorded with timings and input sizes, and nothing when disabled."""
+    portfolio, returns = inputs
+    with instrumented(track_memory=True) as sink:
+        RiskMetrics(portfolio, returns)
+        StressTest(portfolio, returns).apply_scenarios({"A": {"Equity": -0.1}, "B": {"Bond": -0.1}})
+    records = {r["stage"]: r for r in sink.records}
+    assert records["RiskMetrics.compute_var"]["assets"] == 3
+    assert records["RiskMetrics.compute_var"]["rows"] == 50
+    assert records["StressTest.apply_scenarios"]["scenarios"] == 2
+    assert all(r["wall_seconds"] >= 0 and r["error"] is None for r in sink.records)
+    assert sink.summary().loc["RiskMetrics.compute_all", "calls"] == 1
+
+    count = len(sink.records)
+    RiskMetrics(portfolio, returns)
+    assert len(sink.records) == count and instrumentation._SINK is None
+
+def test_file_sinks_and_errors(tmp_path):
+    """Test JSON lines and Prometheus output, including failed calls."""
+    @timed("demo.fail")
+    def fail():
+        raise ValueError("boom")
+
+    prometheus = PrometheusSink(path=str(tmp_path / "metrics.prom"))
+    with instrumented(prometheus):
+        with pytest.raises(ValueError):
+            fail()
+    assert 'risklab_stage_calls_total{stage="demo.fail"} 1' in (tmp_path / "metrics.prom").read_text()
+
+    with instrumented(JsonLinesSink(str(tmp_path / "log.jsonl"))):
+        with pytest.raises(ValueError):
+            fail()
+    record = json.loads((tmp_path / "log.jsonl").read_text().splitlines()[0])
+    assert record["stage"] == "demo.fail" and record["error"] == "ValueError"
+
+def test_profile_writes_reports(inputs, tmp_path):
+    """Test that profile() collects cProfile and tracemalloc output."""
+    portfolio, returns = inputs
+    with profile(str(tmp_path / "run"), top=5) as run:
+        RiskMetrics(portfolio, returns).compute_tail_ladder()
+    assert "risk_metrics.py" in run.stats_text
+    assert run.peak_bytes > 0
+    assert (tmp_path / "run.prof").exists() and (tmp_path / "run_memory.txt").exists()
+
+def test_package_exports_share_state():
+    """Test that the package-level exports record calls made through the package classes."""
+    import src
+    assert src.instrumentation is instrumentation
+    with src.instrumented() as sink:
+        src.Portfolio.from_csv("../data/sample_portfolio.csv")
+    assert "Portfolio.from_csv" in {r["stage"] for r in sink.records}
@@ -0,0 +1,96 @@
+import sys
+import pytest
+import pandas as pd
+import numpy as np
+
+sys.path.append("../src")
+
+from portfolio import Portfolio
+from liquidity import LiquidityMetrics
+from liquidation import LiquidationModel
+
+@pytest.fixture
+def sample_portfolio(tmp_path):
+    """Creates a sample portfolio with two asset types."""
+    data = pd.DataFrame({
+        "Ticker": ["AAPL", "TSLA", "BND"],
+        "Weight": [0.5, 0.3, 0.2],
+        "AssetType": ["Equity", "Equity", "Bond"]
+    })
+    file_path = tmp_path / "portfolio.csv"
+    data.to_csv(file_path, index=False)
+    return Portfolio.from_csv(file_path)
+
+@pytest.fixture
+def liquidity_obj(sample_portfolio):
+    """Returns a LiquidityMetrics object with clipped scores."""
+    return LiquidityMetrics(sample_portfolio, {"AAPL": 0.9, "TSLA": 1.4, "BND": 0.8, "XOM": 0.1})
+
+def double_scores(scores):
+    """Module-level liquidity scenario so it can be pickled for worker processes."""
+    return {t: v * 2 for t, v in scores.items()}
+
+def test_scores_aligned_to_positions(liquidity_obj):
+    """Test that scores are an array in portfolio order, clipped to [0, 1]."""
+    assert list(liquidity_obj.score_array) == [0.9, 1.0, 0.8]
+    assert liquidity_obj.scores == {"AAPL": 0.9, "TSLA": 1.0, "BND": 0.8}
+    assert liquidity_obj.portfolio_liquidity() == round(0.5 * 0.9 + 0.3 * 1.0 + 0.2 * 0.8, 4)
+    with pytest.raises(TypeError):
+        liquidity_obj.scores["AAPL"] = 0.1
+    liquidity_obj.scores = {"AAPL": 0.1}
+    assert liquidity_obj.scores["AAPL"] == 0.1
+
+def test_apply_scenarios_batched(liquidity_obj):
+    """Test that batched scenarios match per-scenario results and clip at the bounds."""
+    scenarios = {
+        "Crunch": {"Equity": -0.2, "Bond": -0.05},
+        "Rally": {"AAPL": 0.5},
+        "Wipeout": {"Equity": -2.0},
+    }
+    results = liquidity_obj.apply_scenarios(scenarios, chunk_size=2)
+
+    assert list(results) == list(scenarios)
+    assert results["Crunch"] == round(0.5 * 0.72 + 0.3 * 0.8 + 0.2 * 0.76, 4)
+    assert results["Rally"] == round(0.5 * 1.0 + 0.3 * 1.0 + 0.2 * 0.8, 4)
+    assert results["Wipeout"] == round(0.2 * 0.8, 4)
+    for name, shocks in scenarios.items():
+        assert liquidity_obj.apply_scenario(name, shocks) == results[name]
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_run_scenarios_matches_batched(liquidity_obj, backend):
+    """Test that pooled scenarios give the same results as the batched path."""
+    shocks = {"Crunch": {"Equity": -0.2, "Bond": -0.05}, "Rally": {"AAPL": 0.5}}
+    expected = liquidity_obj.apply_scenarios(shocks)
+    results = liquidity_obj.run_scenarios({**shocks, "Double": double_scores}, workers=2, backend=backend)
+
+    assert {k: results[k] for k in shocks} == expected
+    assert results["Double"] == round(0.5 * 1.0 + 0.3 * 1.0 + 0.2 * 1.0, 4)
+
+def test_liquidation_model(sample_portfolio):
+    """Test days to liquidate and square-root impact, base and under shocks."""
+    adv = {"AAPL": 1000.0, "TSLA": 300.0, "BND": 50.0}
+    model = LiquidationModel(sample_portfolio, adv, portfolio_value=1000.0, participation=0.5,
+                             volatility={"AAPL": 0.02, "TSLA": 0.04, "BND": 0.01})
+    values = np.array([500.0, 300.0, 200.0])
+    volume = np.array([1000.0, 300.0, 50.0])
+    vol = np.array([0.02, 0.04, 0.01])
+
+    positions = model.position_liquidation()
+    assert np.allclose(positions["Days to Liquidate"], values / (0.5 * volume))
+    assert np.allclose(positions["Impact Cost"], vol * values * np.sqrt(values / volume))
+
+    scenarios = {"Crunch": {"Equity": -0.5, "TSLA": -0.2}, "Frozen": {"Bond": -1.0}}
+    results = model.liquidate(scenarios)
+    assert list(results.index) == ["Base", "Crunch", "Frozen"]
+    for name, shocks in [("Base", {}), ("Crunch", scenarios["Crunch"])]:
+        expected = model.position_liquidation(shocks)
+        days = expected["Days to Liquidate"].to_numpy()
+        assert results.loc[name, "Days to Liquidate"] == pytest.approx(days.max())
+        assert results.loc[name, "Avg Days"] == pytest.approx(days @ values / values.sum())
+        assert results.loc[name, "Impact Cost"] == pytest.approx(expected["Impact Cost"].sum())
+    assert np.isinf(results.loc["Frozen", "Days to Liquidate"])
+
+def test_liquidation_requires_adv(sample_portfolio):
+    """Test that every position needs a positive ADV."""
+    with pytest.raises(ValueError):
+        LiquidationModel(sample_portfolio, {"AAPL": 1000.0, "TSLA": 0.0})
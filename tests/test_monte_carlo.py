@@ -0,0 +1,58 @@
+import sys
+import pytest
+import pandas as pd
+import numpy as np
+from statistics import NormalDist
+
+sys.path.append("../src")
+
+from portfolio import Portfolio
+from monte_carlo import MonteCarloVaR
+
+@pytest.fixture
+def sample_portfolio(tmp_path):
+    """Create a sample Portfolio object."""
+    data = pd.DataFrame({
+        "Ticker": ["AAPL", "GOOGL", "TSLA"],
+        "Weight": [0.4, 0.35, 0.25]
+    })
+    file_path = tmp_path / "sample_portfolio.csv"
+    data.to_csv(file_path, index=False)
+    return Portfolio.from_csv(file_path)
+
+@pytest.fixture
+def sample_returns(sample_portfolio):
+    """Generate dummy returns for the portfolio."""
+    np.random.seed(42)
+    return pd.DataFrame(np.random.normal(0, 0.01, (252, len(sample_portfolio.tickers))),
+                        columns=sample_portfolio.tickers)
+
+def test_monte_carlo_reproducible_across_workers(sample_portfolio, sample_returns):
+    """Test that results depend on the seed but not on the number of workers."""
+    serial = MonteCarloVaR(sample_portfolio, sample_returns, n_paths=20_000, chunk_size=3_000, seed=1).simulate()
+    parallel = MonteCarloVaR(sample_portfolio, sample_returns, n_paths=20_000, chunk_size=3_000, seed=1,
+                             workers=2).simulate()
+    assert serial == parallel
+
+def test_monte_carlo_close_to_gaussian(sample_portfolio, sample_returns):
+    """Test that simulated VaR converges to the delta-normal VaR with a valid interval."""
+    mc = MonteCarloVaR(sample_portfolio, sample_returns, n_paths=200_000, chunk_size=25_000, seed=3)
+    results = mc.simulate(confidence=0.95)
+
+    weights = np.array(sample_portfolio.weights)
+    sigma = np.sqrt(weights @ sample_returns.cov().values @ weights)
+    mu = sample_returns.mean().values @ weights
+    expected = -(mu + NormalDist().inv_cdf(0.05) * sigma)
+
+    assert results["VaR_95"] == pytest.approx(expected, rel=0.02)
+    assert results["VaR_95_low"] < results["VaR_95"] < results["VaR_95_high"]
+    assert results["CVaR_95"] > results["VaR_95"]
+
+def test_monte_carlo_single_chunk_interval(sample_portfolio, sample_returns):
+    """Test that one chunk gets a normal-approximation interval matching the spread of estimates across seeds."""
+    runs = [MonteCarloVaR(sample_portfolio, sample_returns, n_paths=20_000, chunk_size=20_000, seed=s).simulate()
+            for s in range(40)]
+    for name in ("VaR_95", "CVaR_95"):
+        assert all(r[f"{name}_low"] < r[name] < r[f"{name}_high"] for r in runs)
+        reported = np.mean([(r[f"{name}_high"] - r[f"{name}_low"]) / 2 for r in runs]) / NormalDist().inv_cdf(0.975)
+        assert reported == pytest.approx(np.std([r[name] for r in runs], ddof=1), rel=0.35)
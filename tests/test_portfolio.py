@@ -31,4 +31,44 @@ def test_portfolio_load(portfolio):
 def test_portfolio_sum_weights(portfolio):
     """Test that weights sum to 1.0."""
     total_weight = portfolio.data["Weight"].sum()
-    assert abs(total_weight - 1.0) < 1e-6
\ No newline at end of file
+    assert abs(total_weight - 1.0) < 1e-6
+
+def test_portfolio_group_index(tmp_path):
+    """Test that AssetType and extra group columns are indexed by position."""
+    data = pd.DataFrame({
+        "Ticker": ["AAPL", "JPM", "TSLA", "BND"],
+        "Weight": [0.4, 0.2, 0.2, 0.2],
+        "AssetType": ["Equity", "Equity", "Equity", "Bond"],
+        "Sector": ["Tech", "Financials", "Tech", None],
+    })
+    file_path = tmp_path / "grouped.csv"
+    data.to_csv(file_path, index=False)
+    portfolio = Portfolio.from_csv(file_path, group_columns=["Sector"])
+
+    assert list(portfolio.groups["AssetType"]["Equity"]) == [0, 1, 2]
+    assert list(portfolio.groups["Sector"]["Tech"]) == [0, 2]
+    assert list(portfolio.group_positions()["Unknown"]) == [3]
+
+def test_portfolio_columnar(portfolio):
+    """Test that weights are a float64 array and asset types are categorical codes."""
+    assert portfolio.weights.dtype == "float64"
+    assert portfolio.weights.flags["C_CONTIGUOUS"]
+    assert portfolio.ticker_index == {"AAPL": 0, "GOOGL": 1, "TSLA": 2}
+    assert list(portfolio.asset_types) == ["Unknown"] * 3
+    assert list(portfolio.asset_type_codes) == [0, 0, 0]
+
+def test_portfolio_from_json(tmp_path):
+    """Test the JSON loader with a column projection."""
+    data = pd.DataFrame({
+        "Ticker": ["AAPL", "BND"],
+        "Allocation": [3, 1],
+        "AssetType": ["Equity", "Bond"],
+        "Comment": ["core", "hedge"],
+    })
+    file_path = tmp_path / "holdings.json"
+    data.to_json(file_path, orient="records")
+    portfolio = Portfolio.from_file(file_path, columns=["Ticker", "Allocation", "AssetType"])
+
+    assert list(portfolio.data.columns) == ["Ticker", "Weight", "AssetType"]
+    assert list(portfolio.weights) == [0.75, 0.25]
+    assert list(portfolio.asset_types) == ["Equity", "Bond"]
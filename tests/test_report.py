@@ -0,0 +1,83 @@
+import sys
+import pytest
+import pandas as pd
+import numpy as np
+
+sys.path.append("../src")
+
+from portfolio import Portfolio
+from risk_metrics import RiskMetrics
+from stress_test import StressTest
+from liquidity import LiquidityMetrics
+from report import Report
+from cache import ResultCache
+
+@pytest.fixture
+def report(tmp_path):
+    """Creates a report over a small portfolio with every module attached."""
+    portfolio = Portfolio.from_frame(pd.DataFrame({
+        "Ticker": ["AAPL", "TSLA", "BND"],
+        "Weight": [0.5, 0.3, 0.2],
+        "AssetType": ["Equity", "Equity", "Bond"]
+    }))
+    np.random.seed(0)
+    returns = pd.DataFrame(np.random.normal(0, 0.01, (100, 3)), columns=portfolio.tickers)
+    stress = StressTest(portfolio, returns)
+    stress.apply_scenario("Equity Crash", {"Equity": -0.3})
+    liquidity = LiquidityMetrics(portfolio, {"AAPL": 0.9, "TSLA": 0.7, "BND": 0.8})
+    return Report(portfolio, RiskMetrics(portfolio, returns), stress, liquidity, output_dir=str(tmp_path))
+
+def test_streaming_csv_export(report, tmp_path):
+    """Test that the threaded per-table export writes the same tables as generate_summary_tables."""
+    assert report.export("out.csv", workers=3) == list(Report.TABLES)
+    tables = report.generate_summary_tables()
+    for name in Report.TABLES:
+        written = pd.read_csv(tmp_path / f"out_{name}.csv", index_col=0)
+        assert written.shape == tables[name].shape
+    assert "Notice" in pd.read_csv(tmp_path / "out_RiskMatrix.csv").columns
+
+def test_parquet_export(report, tmp_path):
+    """Test Parquet export when an engine is installed."""
+    pytest.importorskip("pyarrow")
+    report.export("out.parquet")
+    stress = pd.read_parquet(tmp_path / "out_StressTest.parquet")
+    assert list(stress.index) == list(report.generate_table("StressTest").index)
+
+def test_export_batch(report, tmp_path):
+    """Test that many reports are written in one pass with per-report file names."""
+    written = Report.export_batch({"fund_a": report, "fund_b": report}, fmt="csv", workers=4)
+    assert written == {"fund_a": list(Report.TABLES), "fund_b": list(Report.TABLES)}
+    assert (tmp_path / "fund_b_Liquidity.csv").exists()
+    with pytest.raises(ValueError):
+        report.export("out.txt")
+
+def test_selected_sections_only(report):
+    """Test that requesting sections evaluates just them and their inputs, sharing the covariance."""
+    assert report.plan(["Liquidity"]) == ["Liquidity"]
+    assert report.plan(["StressTest", "RiskMatrix"]) == ["StressTest", "metrics", "RiskMatrix"]
+
+    tables = report.generate_summary_tables(sections=["StressTest", "Liquidity"])
+    assert list(tables) == ["StressTest", "Liquidity"]
+    assert report._nodes == {}
+
+    stress = StressTest(report.portfolio, report.risk_metrics.returns, risk_metrics=report.risk_metrics)
+    stress.apply_scenario("Equity Crash", {"Equity": -0.3})
+    assert stress.base_cov is report.risk_metrics.cov_matrix
+
+    tables = report.generate_summary_tables(sections=["Portfolio"])
+    tables["Portfolio"].loc[0, "Weight"] = 99.0
+    assert report.portfolio.data.loc[0, "Weight"] != 99.0
+    with pytest.raises(ValueError):
+        report.generate_summary_tables(sections=["Missing"])
+
+def test_cached_metrics_skip_intermediates(report, tmp_path):
+    """Test that the RiskMetrics section of a cached book computes no covariance or return series."""
+    cache = ResultCache()
+    returns = report.risk_metrics.returns
+    RiskMetrics(report.portfolio, returns, cache=cache)
+    risk_metrics = RiskMetrics(report.portfolio, returns, cache=cache)
+
+    cached = Report(report.portfolio, risk_metrics, output_dir=str(tmp_path))
+    table = cached.generate_table("RiskMetrics")
+    assert table.loc[0, "Volatility"] == report.generate_table("RiskMetrics").loc[0, "Volatility"]
+    assert risk_metrics._cov_matrix is None and risk_metrics._portfolio_returns is None
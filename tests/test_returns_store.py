@@ -0,0 +1,70 @@
+import sys
+import pytest
+import pandas as pd
+import numpy as np
+
+sys.path.append("../src")
+
+from portfolio import Portfolio
+from risk_metrics import RiskMetrics
+from stress_test import StressTest
+from returns_store import ReturnsStore
+
+@pytest.fixture
+def sample_portfolio(tmp_path):
+    """Create a sample Portfolio object."""
+    data = pd.DataFrame({
+        "Ticker": ["AAPL", "GOOGL", "TSLA"],
+        "Weight": [0.4, 0.35, 0.25]
+    })
+    file_path = tmp_path / "sample_portfolio.csv"
+    data.to_csv(file_path, index=False)
+    return Portfolio.from_csv(file_path)
+
+@pytest.fixture
+def sample_returns(sample_portfolio):
+    """Generate dummy returns with a few missing values."""
+    np.random.seed(42)
+    returns = pd.DataFrame(np.random.normal(0, 0.01, (252, len(sample_portfolio.tickers))),
+                           columns=sample_portfolio.tickers,
+                           index=pd.bdate_range("2024-01-01", periods=252))
+    returns.iloc[[3, 50, 120], 1] = np.nan
+    return returns
+
+@pytest.fixture
+def store(sample_returns, tmp_path):
+    """Write the returns to a store with small chunks to exercise streaming."""
+    return ReturnsStore.from_frame(sample_returns, str(tmp_path / "returns"), chunk_rows=40)
+
+def test_store_roundtrip(store, sample_returns):
+    """Test that a reopened store reproduces the original panel."""
+    reopened = ReturnsStore(store.path)
+    assert reopened.shape == sample_returns.shape
+    pd.testing.assert_frame_equal(reopened.to_frame(), sample_returns, check_freq=False)
+
+def test_store_streaming_cov(store, sample_returns):
+    """Test that the chunked covariance matches pandas, including pairwise missing values."""
+    assert np.allclose(store.cov().values, sample_returns.cov().values)
+
+def test_risk_metrics_from_store(sample_portfolio, sample_returns, store):
+    """Test that RiskMetrics and StressTest give the same results on a store and a DataFrame."""
+    assert RiskMetrics(sample_portfolio, store).summary() == RiskMetrics(sample_portfolio, sample_returns).summary()
+
+    shocks = {"Unknown": -0.2}
+    on_store = StressTest(sample_portfolio, store).apply_scenario("Dip", shocks)
+    in_memory = StressTest(sample_portfolio, sample_returns).apply_scenario("Dip", shocks)
+    assert on_store == in_memory
+
+def test_store_append_after_interrupted_write(sample_returns, tmp_path):
+    """Test that appends only extend the files and bytes from an uncommitted append are discarded."""
+    store = ReturnsStore.from_frame(sample_returns.iloc[:100], str(tmp_path / "returns"))
+    with open(tmp_path / "returns" / ReturnsStore.VALUES_FILE, "ab") as f:
+        f.write(b"\0" * 24)
+    with open(tmp_path / "returns" / ReturnsStore.DATES_FILE, "a") as f:
+        f.write('"2099-01-01"\n')
+
+    reopened = ReturnsStore(store.path)
+    pd.testing.assert_frame_equal(reopened.to_frame(), sample_returns.iloc[:100], check_freq=False)
+    reopened.append(sample_returns.iloc[100:])
+    pd.testing.assert_frame_equal(ReturnsStore(store.path).to_frame(), sample_returns, check_freq=False)
+    assert not (tmp_path / "returns" / (ReturnsStore.INDEX_FILE + ".tmp")).exists()
@@ -58,4 +58,47 @@ def test_risk_matrix_values_positive(sample_portfolio, sample_risk_metrics):
     df = rmat.compute_matrix()
     
     values = df.values.flatten()
-    assert all(v >= 0 for v in values), "All risk values should be non-negative"
\ No newline at end of file
+    assert all(v >= 0 for v in values), "All risk values should be non-negative"
+
+def test_risk_matrix_matches_pairwise_formula(sample_portfolio, sample_risk_metrics):
+    """Test that the broadcast matrix matches the pairwise likelihood x impact formula."""
+    likelihoods = {"AAPL": 0.2, "GOOGL": 0.5, "TSLA": 0.05}
+    rmat = RiskMatrix(sample_portfolio, sample_risk_metrics, likelihoods)
+    impact = sample_risk_metrics.summary(formatted=False)["VaR_95"]
+
+    df = rmat.compute_matrix()
+    for t1 in sample_portfolio.tickers:
+        for t2 in sample_portfolio.tickers:
+            expected = round((likelihoods[t1] + likelihoods[t2]) / 2 * impact, 6)
+            assert df.loc[t1, t2] == pytest.approx(expected)
+
+    array = rmat.compute_matrix(output="array")
+    assert array.dtype == np.float32
+    assert np.allclose(array, df.values, atol=1e-6)
+
+def test_risk_matrix_top_pairs(sample_portfolio, sample_risk_metrics):
+    """Test that the top-k view returns the highest-scoring pairs in order."""
+    likelihoods = {"AAPL": 0.2, "GOOGL": 0.5, "TSLA": 0.05}
+    rmat = RiskMatrix(sample_portfolio, sample_risk_metrics, likelihoods)
+
+    top = rmat.compute_matrix(output="topk", k=2)
+    assert list(zip(top["Ticker1"], top["Ticker2"])) == [("GOOGL", "GOOGL"), ("AAPL", "GOOGL")]
+    assert top["RiskScore"].is_monotonic_decreasing
+
+def test_risk_matrix_aggregated_views(sample_portfolio, sample_risk_metrics):
+    """Test that group, tile and drill-down views agree with blocks of the full matrix."""
+    likelihoods = {"AAPL": 0.2, "GOOGL": 0.5, "TSLA": 0.05}
+    rmat = RiskMatrix(sample_portfolio, sample_risk_metrics, likelihoods)
+    full = rmat.compute_matrix()
+
+    by_type = rmat.aggregate("AssetType")
+    assert by_type.loc["Unknown", "Unknown"] == pytest.approx(full.values.mean(), abs=1e-6)
+    assert rmat.aggregate("AssetType", how="max").iloc[0, 0] == pytest.approx(full.values.max(), abs=1e-6)
+
+    tiles = rmat.downsample(tiles=2)
+    assert list(tiles.index) == ["AAPL", "GOOGL..TSLA"]
+    assert tiles.iloc[1, 1] == pytest.approx(full.loc[["GOOGL", "TSLA"], ["GOOGL", "TSLA"]].values.mean(), abs=1e-6)
+    pd.testing.assert_frame_equal(rmat.drill_down(1, 0, tiles=2), full.loc[["GOOGL", "TSLA"], ["AAPL"]])
+
+    with pytest.raises(ValueError):
+        rmat.aggregate("Sector")
@@ -69,4 +69,105 @@ def test_summary_output(sample_risk_metrics):
     assert isinstance(summary_formatted, dict)
     for key in ["Volatility", "VaR 95%", "CVaR 95%", "Sharpe Ratio"]:
         assert key in summary_numeric
-        assert key in summary_formatted
\ No newline at end of file
+        assert key in summary_formatted
+
+def test_portfolio_returns_cached(sample_portfolio, sample_returns):
+    """Test that the portfolio return series matches the weighted sum and is reused."""
+    rm = RiskMetrics(sample_portfolio, sample_returns)
+    expected = (sample_returns * sample_portfolio.weights).sum(axis=1)
+
+    assert np.allclose(rm.portfolio_returns.values, expected.values)
+    assert rm.portfolio_returns is rm.portfolio_returns
+
+def test_portfolio_returns_invalidated(sample_portfolio, sample_returns):
+    """Test that changing weights or returns refreshes the cached series."""
+    rm = RiskMetrics(sample_portfolio, sample_returns)
+    before = rm.portfolio_returns
+
+    sample_portfolio.weights = [1.0, 0.0, 0.0]
+    assert np.allclose(rm.portfolio_returns.values, sample_returns["AAPL"].values)
+
+    rm.returns = sample_returns * 2
+    assert np.allclose(rm.portfolio_returns.values, 2 * sample_returns["AAPL"].values)
+    assert rm.portfolio_returns is not before
+
+def test_tail_ladder_matches_single_levels(sample_portfolio, sample_returns):
+    """Test that the batched ladder agrees with compute_var/compute_cvar per level."""
+    rm = RiskMetrics(sample_portfolio, sample_returns)
+    ladder = rm.compute_tail_ladder([0.90, 0.95, 0.975, 0.99])
+
+    assert set(ladder) == {"VaR_90", "CVaR_90", "VaR_95", "CVaR_95",
+                           "VaR_97.5", "CVaR_97.5", "VaR_99", "CVaR_99"}
+    for confidence, label in [(0.90, "90"), (0.95, "95"), (0.975, "97.5"), (0.99, "99")]:
+        assert np.isclose(ladder[f"VaR_{label}"], rm.compute_var(confidence))
+        assert np.isclose(ladder[f"CVaR_{label}"], rm.compute_cvar(confidence))
+
+def test_incremental_update_matches_full_recompute(sample_portfolio, sample_returns):
+    """Test that streaming updates reproduce a full recompute on the combined history."""
+    rm = RiskMetrics(sample_portfolio, sample_returns.iloc[:200])
+    rm.start_incremental()
+    rm.update(sample_returns.iloc[200:230])
+    updated = rm.update(sample_returns.iloc[230:])
+
+    expected = RiskMetrics(sample_portfolio, sample_returns).summary(formatted=False)
+    for key, value in expected.items():
+        assert updated[key] == pytest.approx(value)
+
+def test_incremental_rolling_window(sample_portfolio, sample_returns):
+    """Test that a rolling window only reflects the most recent rows."""
+    rm = RiskMetrics(sample_portfolio, sample_returns.iloc[:200])
+    rm.start_incremental(window=100)
+    updated = rm.update(sample_returns.iloc[200:])
+
+    expected = RiskMetrics(sample_portfolio, sample_returns.iloc[-100:]).summary(formatted=False)
+    for key, value in expected.items():
+        assert updated[key] == pytest.approx(value)
+
+def test_batch_compute_blocked_while_incremental(sample_portfolio, sample_returns):
+    """Test that batch metrics can't silently overwrite incremental ones computed on newer rows."""
+    rm = RiskMetrics(sample_portfolio, sample_returns.iloc[:200])
+    updated = dict(rm.update(sample_returns.iloc[200:]))
+    with pytest.raises(ValueError):
+        rm.compute_var()
+    assert rm.summary(formatted=False) == updated
+
+    rm.returns = sample_returns
+    assert rm.compute_var() == pytest.approx(updated["VaR_95"])
+
+    rm.update(sample_returns.iloc[-5:])
+    with pytest.raises(ValueError):
+        rm.parametric_var(sample_portfolio.weights)
+    rm.invalidate_cache()
+    rm.update(sample_returns.iloc[-5:])  # restarts incremental mode from `returns`
+
+def test_parametric_var_methods(sample_portfolio, sample_returns):
+    """Test that parametric VaR/CVaR are stored under their own keys and ordered sensibly."""
+    rm = RiskMetrics(sample_portfolio, sample_returns)
+    gaussian_var = rm.compute_var(method="gaussian")
+    gaussian_cvar = rm.compute_cvar(method="gaussian")
+    cf_var = rm.compute_var(method="cornish_fisher")
+
+    metrics = rm.summary(formatted=False)
+    assert metrics["VaR_95_gaussian"] == gaussian_var
+    assert metrics["VaR_95_cf"] == cf_var
+    assert "VaR_95" in metrics
+    assert gaussian_cvar > gaussian_var > 0
+    assert cf_var == pytest.approx(gaussian_var, rel=0.2)
+
+def test_parametric_var_batched(sample_portfolio, sample_returns):
+    """Test that the batched quadratic form matches single-portfolio results per book."""
+    rm = RiskMetrics(sample_portfolio, sample_returns)
+    books = pd.DataFrame([sample_portfolio.weights, [1.0, 0.0, 0.0]],
+                         index=["Main", "AAPL only"], columns=sample_portfolio.tickers)
+
+    for method, suffix in [("gaussian", "_gaussian"), ("cornish_fisher", "_cf")]:
+        table = rm.parametric_var(books, method=method)
+        assert list(table.index) == ["Main", "AAPL only"]
+        assert table.loc["Main", f"VaR_95{suffix}"] == pytest.approx(rm.compute_var(method=method))
+        assert table.loc["Main", f"CVaR_95{suffix}"] == pytest.approx(rm.compute_cvar(method=method))
+
+    mean = rm.asset_mean
+    rm.parametric_var(books)
+    assert rm.asset_mean is mean
+    rm.returns = sample_returns * 2
+    assert np.allclose(rm.asset_mean, 2 * mean)
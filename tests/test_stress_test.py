@@ -6,6 +6,7 @@ import numpy as np
 sys.path.append("../src")
 
 from portfolio import Portfolio
+from risk_metrics import RiskMetrics
 from stress_test import StressTest
 
 @pytest.fixture
@@ -58,4 +59,63 @@ def test_multiple_scenarios(stress_test_obj):
         stress_test_obj.apply_scenario(name, adj)
     
     df = stress_test_obj.summary()
-    assert set(df.index) == set(scenarios.keys())
\ No newline at end of file
+    assert set(df.index) == set(scenarios.keys())
+
+def test_apply_scenarios_matches_shocked_returns(stress_test_obj):
+    """Test that the batched engine matches metrics recomputed on explicitly shocked returns."""
+    tickers = stress_test_obj.portfolio.tickers
+    scenarios = {
+        "Base": {t: 0.0 for t in tickers},
+        "Crash": {t: -0.1 for t in tickers},
+        "Unknown Dip": {"Unknown": -0.15, tickers[0]: 0.2},
+    }
+    multipliers = {
+        "Base": [1.0, 1.0, 1.0],
+        "Crash": [0.9, 0.9, 0.9],
+        "Unknown Dip": [0.85 * 1.2, 0.85, 0.85],
+    }
+
+    results = stress_test_obj.apply_scenarios(scenarios)
+
+    assert list(results) == list(scenarios)
+    for name, scale in multipliers.items():
+        expected = RiskMetrics(stress_test_obj.portfolio, stress_test_obj.returns * scale).summary()
+        assert stress_test_obj.scenario_results[name] == expected
+
+def double_returns(values):
+    """Non-linear scenario used by the worker-pool tests (module level so it pickles)."""
+    return values * 2
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_run_scenarios_parallel(stress_test_obj, backend):
+    """Test that pooled execution matches the batched engine, keeps order and records timings."""
+    scenarios = {"Crash": {"Unknown": -0.1}, "Doubled": double_returns, "Base": {}}
+    results = stress_test_obj.run_scenarios(scenarios, workers=2, backend=backend)
+
+    reference = StressTest(stress_test_obj.portfolio, stress_test_obj.returns)
+    reference.apply_scenarios({"Crash": {"Unknown": -0.1}, "Base": {}})
+    expected_doubled = RiskMetrics(stress_test_obj.portfolio, stress_test_obj.returns * 2).summary()
+
+    assert list(results) == list(scenarios)
+    assert results["Crash"] == reference.scenario_results["Crash"]
+    assert results["Base"] == reference.scenario_results["Base"]
+    assert results["Doubled"] == expected_doubled
+    assert set(stress_test_obj.scenario_timings) == set(scenarios)
+
+def test_group_column_shocks(tmp_path):
+    """Test that shocks keyed by an extra group column hit only that group's tickers."""
+    data = pd.DataFrame({
+        "Ticker": ["AAPL", "JPM", "TSLA"],
+        "Weight": [0.4, 0.3, 0.3],
+        "Sector": ["Tech", "Financials", "Tech"],
+    })
+    file_path = tmp_path / "sectors.csv"
+    data.to_csv(file_path, index=False)
+    portfolio = Portfolio.from_csv(file_path, group_columns=["Sector"])
+
+    np.random.seed(0)
+    returns = pd.DataFrame(np.random.normal(0, 0.01, (252, 3)), columns=portfolio.tickers)
+    result = StressTest(portfolio, returns).apply_scenario("Tech Selloff", {"Tech": -0.3})
+
+    expected = RiskMetrics(portfolio, returns * [0.7, 1.0, 0.7]).summary()
+    assert result == expected
@@ -0,0 +1,59 @@
+import sys
+import pytest
+import pandas as pd
+import numpy as np
+
+sys.path.append("../src")
+
+from portfolio import Portfolio
+from risk_metrics import RiskMetrics
+from whatif import WhatIf
+
+@pytest.fixture
+def sample_portfolio(tmp_path):
+    """Creates a sample portfolio with two asset types."""
+    data = pd.DataFrame({
+        "Ticker": ["AAPL", "TSLA", "BND", "GLD"],
+        "Weight": [0.4, 0.3, 0.2, 0.1],
+        "AssetType": ["Equity", "Equity", "Bond", "Commodity"]
+    })
+    file_path = tmp_path / "portfolio.csv"
+    data.to_csv(file_path, index=False)
+    return Portfolio.from_csv(file_path)
+
+@pytest.fixture
+def sample_returns(sample_portfolio):
+    """Generate dummy returns for testing."""
+    np.random.seed(42)
+    return pd.DataFrame(np.random.normal(0, 0.01, (252, 4)), columns=sample_portfolio.tickers)
+
+def full_metrics(portfolio, returns, weights):
+    """Metrics recomputed from scratch by RiskMetrics for the given effective weights."""
+    portfolio.weights = np.asarray(weights, dtype=float)
+    return RiskMetrics(portfolio, returns).summary(formatted=False)
+
+def test_whatif_base_matches_risk_metrics(sample_portfolio, sample_returns):
+    """Test that the untouched what-if state equals the base metrics."""
+    whatif = WhatIf(sample_portfolio, sample_returns)
+    expected = RiskMetrics(sample_portfolio, sample_returns).summary(formatted=False)
+    for key, value in whatif.metrics().items():
+        assert value == pytest.approx(expected[key])
+
+def test_whatif_incremental_updates(sample_portfolio, sample_returns):
+    """Test that chained shock and weight edits match a full recomputation."""
+    whatif = WhatIf(sample_portfolio, sample_returns)
+    whatif.set_shock("Equity", -0.2)
+    whatif.set_weight("BND", 0.35)
+    whatif.set_shock("AAPL", 0.1)
+    metrics = whatif.set_shock("Equity", -0.3)
+
+    expected_weights = np.array([0.4 * 0.7 * 1.1, 0.3 * 0.7, 0.35, 0.1])
+    assert np.allclose(whatif.effective_weights, expected_weights)
+    expected = full_metrics(sample_portfolio, sample_returns, expected_weights)
+    for key, value in metrics.items():
+        assert value == pytest.approx(expected[key])
+
+    whatif.set_shock("Equity", 0.0)
+    assert whatif.shocks == {"AAPL": 0.1}
+    whatif.reset()
+    assert np.allclose(whatif.effective_weights, [0.4, 0.3, 0.2, 0.1])